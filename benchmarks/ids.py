@@ -0,0 +1,127 @@
+"""
+Compare random and time ordered ids of transactions on insert throughput and index size.
+
+    python -m benchmarks.ids --rows 2000000 --cache-mb 16
+
+For each generator the transactions table of a sqlite database in a temporary file is seeded with
+``--rows`` transactions in batches, the throughput of the last ``--measure`` of them is reported with
+the size of the table and its indexes. The page cache is kept at ``--cache-mb`` so the indexes
+outgrow it, as they do on a busy database.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+
+from django.conf import settings
+
+
+DATABASE = os.path.join(tempfile.mkdtemp(), 'ids.sqlite3')
+
+settings.configure(
+    DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': DATABASE}},
+    INSTALLED_APPS=['django.contrib.contenttypes', 'django.contrib.auth', 'sagepaypi'],
+    USE_TZ=True,
+    SECRET_KEY='benchmark',
+)
+
+import django  # noqa
+
+django.setup()
+
+from django.core.management import call_command  # noqa
+from django.db import connection, transaction  # noqa
+from django.test import override_settings  # noqa
+from django.utils import timezone  # noqa
+
+from sagepaypi.models import CardIdentifier, Transaction  # noqa
+
+
+GENERATORS = ['uuid.uuid4', 'sagepaypi.ids.uuid7']
+
+
+def insert(card_identifier, count):
+    with transaction.atomic():
+        Transaction.objects.bulk_create([
+            Transaction(
+                type='Payment',
+                amount=100,
+                currency='GBP',
+                description='Payment',
+                card_identifier=card_identifier,
+            )
+            for i in range(count)
+        ])
+
+
+def sizes():
+    """
+    The size of the table and the indexes of the id and the vendor tx code, which sqlite names
+    after the order of the columns.
+    """
+
+    names = {
+        'sagepaypi_transaction': 'table',
+        'sqlite_autoindex_sagepaypi_transaction_1': 'id index',
+        'sqlite_autoindex_sagepaypi_transaction_2': 'vendor_tx_code index',
+    }
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT name, sum(pgsize) FROM dbstat GROUP BY name')
+        return {names[name]: size for name, size in cursor.fetchall() if name in names}
+
+
+def run(rows, measure, batch_size, cache_mb):
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA cache_size = -%d' % (cache_mb * 1024))
+
+    card_identifier = CardIdentifier.objects.create(
+        first_name='Sam',
+        last_name='Jones',
+        billing_address_1='88',
+        billing_city='London',
+        billing_postal_code='412',
+        billing_country='GB',
+        card_identifier_expiry=timezone.now()
+    )
+
+    inserted = 0
+    elapsed = 0
+
+    while inserted < rows:
+        count = min(batch_size, rows - inserted)
+        start = time.perf_counter()
+        insert(card_identifier, count)
+        if inserted >= rows - measure:
+            elapsed += time.perf_counter() - start
+        inserted += count
+
+    return min(measure, rows) / elapsed, sizes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--measure', type=int, default=100000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--cache-mb', type=int, default=16)
+    parser.add_argument('--generator', action='append', choices=GENERATORS)
+    args = parser.parse_args()
+
+    for generator in args.generator or GENERATORS:
+        call_command('migrate', 'sagepaypi', verbosity=0)
+
+        with override_settings(SAGEPAYPI_ID_GENERATOR=generator):
+            throughput, table_sizes = run(args.rows, args.measure, args.batch_size, args.cache_mb)
+
+        print('%s: %.0f inserts per second' % (generator, throughput))
+        print('    ' + ', '.join('%s %.1fMB' % (name, size / 1024 / 1024) for name, size in table_sizes.items()))
+
+        call_command('migrate', 'sagepaypi', 'zero', verbosity=0)
+        with connection.cursor() as cursor:
+            cursor.execute('VACUUM')
+
+
+if __name__ == '__main__':
+    main()
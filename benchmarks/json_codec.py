@@ -0,0 +1,83 @@
+"""
+Compare the json codecs on the payloads of ``tests/mocks.py``.
+
+    python -m benchmarks.json_codec --number 20000
+
+For each codec the request is encoded, the response decoded and the response encoded
+again for the audit record, then with the raw response reused for the audit record.
+"""
+
+import argparse
+import timeit
+
+from django.conf import settings
+
+
+settings.configure()
+
+from sagepaypi.jsoncodec import JSONCodec, OrjsonCodec, RawJSON  # noqa
+from tests import mocks  # noqa
+
+
+REQUEST = {
+    'transactionType': 'Payment',
+    'paymentMethod': {
+        'card': {
+            'merchantSessionKey': 'M1E996F5-A9BC-41FE-B088-E5B73DB94277',
+            'cardIdentifier': 'C6F92981-8C2D-457A-AA1E-16EBCD6D3AC6'
+        }
+    },
+    'vendorTxCode': '13bf01cf-7d3b-4bfa-b8d8-c1c7a2b5e1a5',
+    'amount': 100,
+    'currency': 'GBP',
+    'description': 'Payment',
+    'apply3DSecure': 'UseMSPSetting',
+    'customerFirstName': 'Sam',
+    'customerLastName': 'Jones',
+    'billingAddress': {
+        'address1': '88',
+        'city': 'London',
+        'postalCode': '412',
+        'country': 'GB'
+    },
+    'entryMethod': 'Ecommerce'
+}
+
+RESPONSES = [
+    mocks.TRANSACTION_DATA,
+    mocks.auth_required_response().json(),
+    mocks.outcome_live_response().json(),
+    mocks.malformed_response().json(),
+]
+
+
+def call(codec, raw_responses, reuse_raw):
+    for raw in raw_responses:
+        codec.dumps(REQUEST)
+        data = codec.loads(raw)
+        if reuse_raw:
+            RawJSON(data, raw).raw.decode('utf-8')
+        else:
+            codec.dumps(data).decode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=10000)
+    args = parser.parse_args()
+
+    raw_responses = [JSONCodec().dumps(data) for data in RESPONSES]
+
+    for codec in [JSONCodec(), OrjsonCodec()]:
+        for reuse_raw in [False, True]:
+            elapsed = timeit.timeit(lambda: call(codec, raw_responses, reuse_raw), number=args.number)
+            calls = args.number * len(raw_responses)
+            print('%s%s: %.2fus per call' % (
+                codec.__class__.__name__,
+                ', raw reused' if reuse_raw else '',
+                elapsed / calls * 1000000
+            ))
+
+
+if __name__ == '__main__':
+    main()
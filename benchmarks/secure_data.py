@@ -0,0 +1,120 @@
+"""
+Compare the size and fetch time of transaction rows with the 3-D Secure messages in the
+transaction table, as before migration ``0014_secure_data``, and moved into ``TransactionSecureData``.
+
+    python -m benchmarks.secure_data --transactions 20000 --secure 0.3
+
+The transactions are created in an in-memory sqlite database, ``--secure`` of them with a pareq
+of ``--message-size`` bytes, and the transactions then fetched the way a list or a bulk run does.
+"""
+
+import argparse
+import base64
+import os
+import random
+import timeit
+import uuid
+
+from django.conf import settings
+
+
+settings.configure(
+    DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+    INSTALLED_APPS=['django.contrib.contenttypes', 'django.contrib.auth', 'sagepaypi'],
+    USE_TZ=True,
+    SECRET_KEY='benchmark',
+    SAGEPAYPI_VENDOR_NAME='benchmark',
+    SAGEPAYPI_INTEGRATION_KEY='user',
+    SAGEPAYPI_INTEGRATION_PASSWORD='pass',
+)
+
+import django  # noqa
+
+django.setup()
+
+from django.core.management import call_command  # noqa
+from django.db import connection  # noqa
+from django.db.migrations.executor import MigrationExecutor  # noqa
+from django.utils import timezone  # noqa
+
+
+BEFORE = ('sagepaypi', '0013_outcome_polling')
+
+
+def historical_models(migration):
+    apps = MigrationExecutor(connection).loader.project_state(migration).apps
+    return apps.get_model('sagepaypi', 'CardIdentifier'), apps.get_model('sagepaypi', 'Transaction')
+
+
+def create_transactions(count, secure, message_size):
+    CardIdentifier, Transaction = historical_models(BEFORE)
+
+    card_identifier = CardIdentifier.objects.create(
+        id=uuid.uuid4(),
+        first_name='Sam',
+        last_name='Jones',
+        billing_address_1='88',
+        billing_city='London',
+        billing_postal_code='412',
+        billing_country='GB',
+        card_identifier_expiry=timezone.now()
+    )
+
+    Transaction.objects.bulk_create([
+        Transaction(
+            id=uuid.uuid4(),
+            type='Payment',
+            vendor_tx_code=uuid.uuid4().hex,
+            amount=100,
+            currency='GBP',
+            description='Payment',
+            card_identifier=card_identifier,
+            status_code='2007',
+            status='3DAuth',
+            pareq=base64.b64encode(os.urandom(message_size)).decode() if random.random() < secure else None
+        )
+        for i in range(count)
+    ], batch_size=500)
+
+
+def row_size():
+    columns = [column.name for column in connection.introspection.get_table_description(
+        connection.cursor(), 'sagepaypi_transaction'
+    )]
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT avg(%s) FROM sagepaypi_transaction' % ' + '.join(
+            'coalesce(length(%s), 0)' % connection.ops.quote_name(column) for column in columns
+        ))
+        return cursor.fetchone()[0]
+
+
+def fetch(Transaction):
+    list(Transaction.objects.order_by('created_at')[:1000])
+
+
+def report(label, Transaction, number):
+    elapsed = timeit.timeit(lambda: fetch(Transaction), number=number)
+    print('%s: %.0f bytes per row, %.2fms per 1000 transactions' % (label, row_size(), elapsed / number * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--transactions', type=int, default=10000)
+    parser.add_argument('--secure', type=float, default=0.3)
+    parser.add_argument('--message-size', type=int, default=1500)
+    parser.add_argument('--number', type=int, default=50)
+    args = parser.parse_args()
+
+    call_command('migrate', *BEFORE, verbosity=0)
+    create_transactions(args.transactions, args.secure, args.message_size)
+    report('messages in the transaction row', historical_models(BEFORE)[1], args.number)
+
+    call_command('migrate', 'sagepaypi', verbosity=0)
+
+    from sagepaypi.models import Transaction
+
+    report('messages in TransactionSecureData', Transaction, args.number)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+A local Sage Pay simulator for the benchmarks.
+
+Responds to the gateway endpoints with the payloads of ``tests/mocks.py`` after a fixed latency.
+``serve()`` runs it over HTTP/1.1 in a thread, ``app`` is an ASGI app to run it over HTTP/2,
+ie ``hypercorn benchmarks.simulator:app --certfile cert.pem --keyfile key.pem``.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import asyncio
+import json
+import os
+import threading
+import time
+
+# seconds each call waits before responding, roughly the time Sage Pay takes
+LATENCY = float(os.environ.get('SIMULATOR_LATENCY', 0.02))
+
+MERCHANT_SESSION_KEY = {
+    'merchantSessionKey': 'M1E996F5-A9BC-41FE-B088-E5B73DB94277',
+    'expiry': '2015-08-11T11:45:16.285+01:00'
+}
+
+CARD_IDENTIFIER = {
+    'cardIdentifier': 'C6F92981-8C2D-457A-AA1E-16EBCD6D3AC6',
+    'expiry': '2015-08-11T11:45:16.285+01:00',
+    'cardType': 'Visa'
+}
+
+TRANSACTION = {
+    'transactionId': 'T6569400-1516-0A3F-E3FA-7F222CC79752',
+    'transactionType': 'Payment',
+    'status': 'Ok',
+    'statusCode': '0000',
+    'statusDetail': 'The Authorisation was Successful.',
+    'retrievalReference': 13745186,
+    'bankAuthorisationCode': '999777',
+    'paymentMethod': {'card': {'cardType': 'Visa', 'lastFourDigits': '0006', 'expiryDate': '0317'}},
+    'amount': {'totalAmount': 100, 'saleAmount': 100, 'surchargeAmount': 0},
+    'currency': 'GBP',
+    'fiRecipient': {},
+    '3DSecure': {'status': 'NotChecked'}
+}
+
+
+def respond(method, path):
+    """
+    The status and payload of a call.
+    """
+
+    if path.endswith('/merchant-session-keys'):
+        return 201, MERCHANT_SESSION_KEY
+    if path.endswith('/card-identifiers'):
+        return 201, CARD_IDENTIFIER
+    if path.endswith('/instructions'):
+        return 201, {'instructionType': 'release', 'date': '2015-08-11T11:45:16.285+01:00'}
+    if method == 'POST':
+        return 201, TRANSACTION
+    return 200, TRANSACTION
+
+
+class SimulatorHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def handle_call(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.rfile.read(length)
+        time.sleep(LATENCY)
+
+        status, payload = respond(self.command, self.path)
+        body = json.dumps(payload).encode()
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    do_GET = do_POST = do_HEAD = handle_call
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SimulatorServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def serve(host='127.0.0.1', port=0):
+    """
+    Run the simulator over HTTP/1.1 in a background thread.
+
+    :returns: the server, its url is ``'http://%s:%s' % server.server_address``.
+    """
+
+    server = SimulatorServer((host, port), SimulatorHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def app(scope, receive, send):
+    """
+    The simulator as an ASGI app, to run it with a server that speaks HTTP/2.
+    """
+
+    if scope['type'] != 'http':
+        return
+
+    more_body = True
+    while more_body:
+        message = await receive()
+        more_body = message.get('more_body', False)
+
+    await asyncio.sleep(LATENCY)
+
+    status, payload = respond(scope['method'], scope['path'])
+    body = json.dumps(payload).encode()
+
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+    })
+    await send({'type': 'http.response.body', 'body': body})
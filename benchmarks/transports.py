@@ -0,0 +1,101 @@
+"""
+Compare the throughput of the gateway transports against the local simulator.
+
+    python -m benchmarks.transports --calls 2000 --concurrency 32
+    python -m benchmarks.transports --transport http2 --url https://localhost:8443/api/v1
+
+Without ``--url`` the simulator is started over HTTP/1.1, the HTTP/2 transport needs the
+simulator run with a server that speaks HTTP/2, see ``benchmarks/simulator.py``.
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import statistics
+import time
+
+from django.conf import settings
+
+
+settings.configure(
+    SAGEPAYPI_VENDOR_NAME='benchmark',
+    SAGEPAYPI_INTEGRATION_KEY='user',
+    SAGEPAYPI_INTEGRATION_PASSWORD='pass',
+)
+
+from sagepaypi.gateway import SagepayGateway  # noqa
+from sagepaypi.transports import HTTP2Transport, RequestsTransport  # noqa
+from benchmarks.simulator import serve  # noqa
+
+
+TRANSPORTS = {
+    'http1': RequestsTransport,
+    'http2': HTTP2Transport,
+}
+
+
+def gateway_for(url, transport):
+    class SimulatorGateway(SagepayGateway):
+        @classmethod
+        def api_url(cls):
+            return url
+
+    return SimulatorGateway(transport)
+
+
+def run(gateway, calls, concurrency):
+    """
+    Submit ``calls`` transactions from ``concurrency`` threads.
+
+    :returns: the time taken and the latency of each call.
+    """
+
+    def call(i):
+        start = time.perf_counter()
+        gateway.submit_transaction({'transactionType': 'Payment', 'vendorTxCode': str(i), 'amount': 100})
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(call, range(calls)))
+    return time.perf_counter() - start, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--transport', choices=sorted(TRANSPORTS), action='append')
+    parser.add_argument('--url', help='The api url of a running simulator.')
+    parser.add_argument('--calls', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--pool-size', type=int, default=10)
+    args = parser.parse_args()
+
+    url = args.url
+    if not url:
+        server = serve()
+        url = 'http://%s:%s/api/v1' % server.server_address
+
+    for name in args.transport or ['http1']:
+        transport = TRANSPORTS[name](pool_size=args.pool_size)
+        gateway = gateway_for(url, transport)
+
+        # warm up the connections so they are not counted
+        run(gateway, args.concurrency, args.concurrency)
+
+        elapsed, latencies = run(gateway, args.calls, args.concurrency)
+        latencies.sort()
+
+        print(
+            '%s: %d calls in %.2fs, %.0f calls/s, p50 %.1fms, p99 %.1fms' % (
+                name,
+                args.calls,
+                elapsed,
+                args.calls / elapsed,
+                statistics.median(latencies) * 1000,
+                latencies[int(len(latencies) * 0.99) - 1] * 1000
+            )
+        )
+        transport.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,12 @@
 from django.http import HttpResponseRedirect
-from django.shortcuts import render
 from django.urls import reverse
+from django.utils.encoding import force_str
 from django.views.generic import DetailView
 
 from formtools.wizard.views import SessionWizardView
 from sagepaypi.conf import get_setting
 from sagepaypi.forms import CardIdentifierForm
+from sagepaypi.http import SecureRedirectResponse
 from sagepaypi.models import Transaction
 
 from example.forms import TransactionForm
@@ -44,11 +45,7 @@ class TransactionCreateView(SessionWizardView):
         transaction.submit_transaction()
 
         if transaction.requires_3d_secure:
-            return render(
-                self.request,
-                'sagepaypi/3d_secure_redirect_form.html',
-                {'transaction': transaction}
-            )
+            return SecureRedirectResponse(self.request, transaction)
 
         transaction.refresh_from_db()
         tidb64, token = transaction.get_tokens()
@@ -56,7 +53,7 @@ class TransactionCreateView(SessionWizardView):
         return HttpResponseRedirect(
             reverse(
                 get_setting('POST_3D_SECURE_REDIRECT_URL'),
-                kwargs={'tidb64': tidb64.decode('utf-8'), 'token': token}
+                kwargs={'tidb64': force_str(tidb64), 'token': token}
             )
         )
 
@@ -1,9 +1,45 @@
+from datetime import timedelta
+
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.forms.models import BaseInlineFormSet
+from django.http import HttpResponseRedirect, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.html import format_html
+from django.utils.translation import gettext_lazy as _
 
-from sagepaypi.models import CardIdentifier, Transaction, TransactionResponse
+from sagepaypi.conf import get_setting
+from sagepaypi.constants import (
+    AVS_CVC_STATUS_CHOICES,
+    INSTRUCTION_CHOICES,
+    SECURE_STATUS_CHOICES,
+    TRANSACTION_STATUS_CHOICES
+)
+from sagepaypi.export import export_transactions
+from sagepaypi.routers import get_replica, use_read_replica
+from sagepaypi.models import (
+    ArchivedTransaction,
+    ArchivedTransactionResponse,
+    CardIdentifier,
+    DailySummary,
+    Transaction,
+    TransactionResponse
+)
 
 
 class ReadOnlyAdmin:
+    """
+    Sage Pay records are only viewed in the admin, changelists are read from a replica when
+    ``SAGEPAYPI_READ_REPLICAS`` and ``sagepaypi.routers.ReplicaRouter`` are set up.
+    """
+
+    def changelist_view(self, request, extra_context=None):
+        return use_read_replica(super().changelist_view)(request, extra_context)
 
     def has_add_permission(self, request, obj=None):
         return False
@@ -18,20 +54,180 @@ class CardIdentifierAdmin(ReadOnlyAdmin, admin.ModelAdmin):
         'display_text',
         'first_name',
         'last_name',
+        'reusable',
         'created_at'
     ]
 
 
-class TransactionResponseAdmin(ReadOnlyAdmin, admin.StackedInline):
+def estimated_count(queryset):
+    """
+    The number of rows in the table of the queryset as estimated by the PostgreSQL statistics,
+    ``None`` for other databases.
+    """
+
+    connection = connections[queryset.db]
+
+    if connection.vendor != 'postgresql':
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [queryset.model._meta.db_table])
+        row = cursor.fetchone()
+
+    # a table that has never been analyzed has no estimate
+    if not row or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that uses the estimated number of rows of an unfiltered changelist once the table
+    is larger than ``SAGEPAYPI_ADMIN_ESTIMATED_COUNT_THRESHOLD``, rather than counting every row.
+    """
+
+    @cached_property
+    def count(self):
+        if not self.object_list.query.where:
+            estimate = estimated_count(self.object_list)
+            if estimate is not None and estimate >= get_setting('ADMIN_ESTIMATED_COUNT_THRESHOLD'):
+                return estimate
+        return super().count
+
+
+class ChoicesListFilter(admin.SimpleListFilter):
+    """
+    Filter with fixed choices, so the changelist does not query the distinct values of the field.
+    """
+
+    choices = []
+
+    def lookups(self, request, model_admin):
+        return self.choices
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.parameter_name: self.value()})
+
+
+class StatusListFilter(ChoicesListFilter):
+    title = _('Status')
+    parameter_name = 'status'
+    choices = TRANSACTION_STATUS_CHOICES
+
+
+class AvsCvcStatusListFilter(ChoicesListFilter):
+    title = _('AVS/CVC status')
+    parameter_name = 'avs_cvc_status'
+    choices = AVS_CVC_STATUS_CHOICES
+
+
+class SecureStatusListFilter(ChoicesListFilter):
+    title = _('Secure status')
+    parameter_name = 'secure_status'
+    choices = SECURE_STATUS_CHOICES
+
+
+class InstructionListFilter(ChoicesListFilter):
+    title = _('Instruction')
+    parameter_name = 'instruction'
+    choices = INSTRUCTION_CHOICES
+
+
+class LatestResponsesFormSet(BaseInlineFormSet):
+    """
+    Only the latest responses are shown inline, without their data.
+    """
+
+    def get_queryset(self):
+        if not hasattr(self, '_latest_queryset'):
+            limit = get_setting('ADMIN_INLINE_RESPONSES')
+            self._latest_queryset = super().get_queryset().defer('data')[:limit]
+        return self._latest_queryset
+
+
+class TransactionResponseInline(ReadOnlyAdmin, admin.TabularInline):
     model = TransactionResponse
+    formset = LatestResponsesFormSet
+    fields = [
+        'step',
+        'status_code',
+        'created_at',
+        'view_data'
+    ]
+    readonly_fields = [
+        'created_at',
+        'view_data'
+    ]
 
     def has_delete_permission(self, request, obj=None):
         return False
 
+    def view_data(self, obj):
+        url = reverse('admin:sagepaypi_transactionresponse_change', args=[obj.pk])
+        return format_html('<a href="{}">{}</a>', url, _('View data'))
+
+    view_data.short_description = _('Data')
+
+
+class LatencyChangeList(ChangeList):
+    """
+    Changelist with the latency of each step per day of the filtered responses,
+    over the last ``SAGEPAYPI_ADMIN_LATENCY_DAYS`` days, the slowest steps first.
+    """
+
+    @cached_property
+    def latency(self):
+        since = timezone.now() - timedelta(days=get_setting('ADMIN_LATENCY_DAYS'))
+        rows = self.queryset.filter(created_at__gte=since).latency_by('day', 'step')
+        return sorted(rows, key=lambda row: (row['day'], row['avg_duration']), reverse=True)
+
+
+class TransactionResponseAdmin(ReadOnlyAdmin, admin.ModelAdmin):
+    list_display = [
+        'pk',
+        'transaction_id',
+        'step',
+        'status_code',
+        'duration',
+        'time_to_first_byte',
+        'retry_count',
+        'created_at'
+    ]
+    list_filter = [
+        'step'
+    ]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return LatencyChangeList
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+def export_response(queryset, format, content_type):
+    response = StreamingHttpResponse(
+        export_transactions(
+            queryset.using(get_replica()).order_by('created_at', 'pk'),
+            format=format,
+            include_response=True
+        ),
+        content_type=content_type
+    )
+    response['Content-Disposition'] = 'attachment; filename="transactions.%s"' % format
+    return response
+
 
 class TransactionAdmin(ReadOnlyAdmin, admin.ModelAdmin):
+    actions = [
+        'export_as_csv',
+        'export_as_jsonl'
+    ]
+    date_hierarchy = 'created_at'
     inlines = [
-        TransactionResponseAdmin
+        TransactionResponseInline
     ]
     list_display = [
         'pk',
@@ -41,9 +237,126 @@ class TransactionAdmin(ReadOnlyAdmin, admin.ModelAdmin):
         'status',
         'transaction_id',
         'instruction',
+        'card_identifier',
         'created_at'
     ]
+    list_filter = [
+        StatusListFilter,
+        'type',
+        InstructionListFilter,
+        AvsCvcStatusListFilter,
+        SecureStatusListFilter
+    ]
+    list_select_related = [
+        'card_identifier'
+    ]
+    paginator = EstimatedCountPaginator
+    readonly_fields = [
+        'all_responses'
+    ]
+    # case sensitive exact matches, ``=`` is case insensitive and can't use the indexes
+    search_fields = [
+        'transaction_id__exact',
+        'vendor_tx_code__exact',
+        'card_last_four__exact'
+    ]
+    show_full_result_count = False
+
+    def _get_obj_does_not_exist_redirect(self, request, opts, object_id):
+        # read through to the archive so links to archived transactions still resolve
+        try:
+            archived = ArchivedTransaction.objects.filter(pk=object_id).exists()
+        except ValidationError:
+            archived = False
+
+        if archived:
+            return HttpResponseRedirect(reverse('admin:sagepaypi_archivedtransaction_change', args=[object_id]))
+        return super()._get_obj_does_not_exist_redirect(request, opts, object_id)
+
+    def all_responses(self, obj):
+        url = reverse('admin:sagepaypi_transactionresponse_changelist')
+        return format_html('<a href="{}?transaction__id__exact={}">{}</a>', url, obj.pk, _('View all responses'))
+
+    all_responses.short_description = _('Responses')
+
+    def export_as_csv(self, request, queryset):
+        return export_response(queryset, 'csv', 'text/csv')
+
+    export_as_csv.allowed_permissions = ['view']
+    export_as_csv.short_description = _('Export selected transactions as csv')
+
+    def export_as_jsonl(self, request, queryset):
+        return export_response(queryset, 'jsonl', 'application/x-ndjson')
+
+    export_as_jsonl.allowed_permissions = ['view']
+    export_as_jsonl.short_description = _('Export selected transactions as json lines')
+
+
+class ArchivedTransactionResponseInline(ReadOnlyAdmin, admin.TabularInline):
+    model = ArchivedTransactionResponse
+    fields = [
+        'step',
+        'status_code',
+        'created_at',
+        'data'
+    ]
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+class ArchivedTransactionAdmin(ReadOnlyAdmin, admin.ModelAdmin):
+    date_hierarchy = 'created_at'
+    inlines = [
+        ArchivedTransactionResponseInline
+    ]
+    list_display = [
+        'pk',
+        'type',
+        'amount',
+        'currency',
+        'status',
+        'transaction_id',
+        'created_at',
+        'archived_at'
+    ]
+    list_filter = [
+        StatusListFilter,
+        'type'
+    ]
+    paginator = EstimatedCountPaginator
+    search_fields = [
+        'transaction_id__exact',
+        'vendor_tx_code__exact'
+    ]
+    show_full_result_count = False
+
+
+class DailySummaryAdmin(ReadOnlyAdmin, admin.ModelAdmin):
+    date_hierarchy = 'date'
+    list_display = [
+        'date',
+        'currency',
+        'type',
+        'status_code',
+        'count',
+        'amount',
+        'successful_count',
+        'successful_amount',
+        'secure_count',
+        'secure_authenticated_count'
+    ]
+    list_filter = [
+        'type',
+        'currency'
+    ]
+
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 
+admin.site.register(ArchivedTransaction, ArchivedTransactionAdmin)
 admin.site.register(CardIdentifier, CardIdentifierAdmin)
+admin.site.register(DailySummary, DailySummaryAdmin)
 admin.site.register(Transaction, TransactionAdmin)
+admin.site.register(TransactionResponse, TransactionResponseAdmin)
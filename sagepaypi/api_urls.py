@@ -0,0 +1,24 @@
+from django.urls import path
+
+from sagepaypi.views.api import CardIdentifierListView, TransactionListView, TransactionResponseListView
+
+
+app_name = 'sagepaypi_api'
+
+urlpatterns = [
+    path(
+        'transactions/',
+        TransactionListView.as_view(),
+        name='transactions'
+    ),
+    path(
+        'transaction-responses/',
+        TransactionResponseListView.as_view(),
+        name='transaction_responses'
+    ),
+    path(
+        'card-identifiers/',
+        CardIdentifierListView.as_view(),
+        name='card_identifiers'
+    )
+]
@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+
+from sagepaypi.conf import get_setting
+
+
+class SagepayPIConfig(AppConfig):
+    name = 'sagepaypi'
+    default_auto_field = 'django.db.models.AutoField'
+
+    def ready(self):
+        if get_setting('WARM_UP'):
+            from sagepaypi.warmup import register_fork_hook, start_warm_up
+            start_warm_up()
+            # workers forked from a preloaded app warm up their own connections
+            register_fork_hook()
@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+from django.db import transaction as db_transaction
+
+from sagepaypi.conf import get_setting
+from sagepaypi.constants import DEFERRED_DAYS_VALID
+
+
+def archive_cutoff(days=None, now=None):
+    """
+    Transactions created before the cutoff can be archived.
+    """
+
+    from sagepaypi.models import Transaction
+
+    days = days or get_setting('ARCHIVE_AFTER_DAYS')
+
+    # a deferred transaction can be released or aborted until then
+    if days <= DEFERRED_DAYS_VALID:
+        raise ValueError('transactions can only be archived after %s days' % DEFERRED_DAYS_VALID)
+
+    return (now or Transaction.utc_now()) - timedelta(days=days)
+
+
+def archive_batch(pks):
+    """
+    Move the transactions and their responses into the archive.
+
+    The copy is committed before the transactions are deleted, when the archive is another
+    database and the delete fails the copy is left for the next run, which skips rows that
+    are already archived.
+    """
+
+    from sagepaypi.models import ArchivedTransaction, Transaction, TransactionResponse
+
+    transactions = list(Transaction.objects.filter(pk__in=pks))
+    responses = list(TransactionResponse.objects.filter(transaction__in=pks).order_by())
+
+    with db_transaction.atomic():
+        with db_transaction.atomic(using=get_setting('ARCHIVE_DATABASE')):
+            ArchivedTransaction.objects.archive(transactions, responses)
+
+        Transaction.objects.filter(pk__in=pks).delete()
+
+
+def archive_transactions(before=None, batch_size=None, max_batches=None):
+    """
+    Archive the settled transactions created before a date, in batches.
+
+    The newest transactions are archived first so a repeat or refund is always archived
+    before the transaction it refers to. Each batch is committed on its own, an interrupted
+    run is resumed by running it again.
+
+    :param before: archive transactions created before this date, defaults to
+        ``SAGEPAYPI_ARCHIVE_AFTER_DAYS`` ago.
+    :param batch_size: the number of transactions archived at a time.
+    :param max_batches: stop after this many batches.
+
+    :returns: the number of transactions archived.
+    """
+
+    from sagepaypi.models import Transaction
+
+    before = before or archive_cutoff()
+    batch_size = batch_size or get_setting('ARCHIVE_BATCH_SIZE')
+
+    archived = 0
+    batches = 0
+
+    while max_batches is None or batches < max_batches:
+        pks = list(
+            Transaction.objects
+            .archivable(before)
+            .order_by('-created_at')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+
+        if not pks:
+            break
+
+        archive_batch(pks)
+        archived += len(pks)
+        batches += 1
+
+    return archived
@@ -0,0 +1,96 @@
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from sagepaypi.conf import get_setting
+from sagepaypi.gateway import SagepayHttpResponse
+from sagepaypi.results import TransactionResult
+
+
+# the responses the checks and the card of a transaction are taken from, the latest wins
+BACKFILL_STEPS = {
+    'submit_transaction': [
+        SagepayHttpResponse.HTTP_200,
+        SagepayHttpResponse.HTTP_201,
+        SagepayHttpResponse.HTTP_202
+    ],
+    'get_transaction_outcome': [
+        SagepayHttpResponse.HTTP_200
+    ],
+}
+
+
+def backfill_batch(pks):
+    """
+    Set the checks and the card of the transactions from their latest responses.
+
+    :returns: the number of transactions updated.
+    """
+
+    from sagepaypi.bulk import RESPONSE_DETAIL_FIELDS
+    from sagepaypi.models import Transaction, TransactionResponse
+
+    results = {}
+
+    responses = (
+        TransactionResponse.objects
+        .filter(transaction__in=pks, step__in=list(BACKFILL_STEPS))
+        .order_by('created_at', 'pk')
+        .only('transaction_id', 'step', 'status_code', 'data')
+    )
+
+    for response in responses.iterator():
+        if response.status_code in BACKFILL_STEPS[response.step] and isinstance(response.data, dict):
+            results[response.transaction_id] = TransactionResult(response.status_code, response.data)
+
+    transactions = list(Transaction.objects.filter(pk__in=list(results)).only('pk', *RESPONSE_DETAIL_FIELDS))
+    now = timezone.now()
+
+    for obj in transactions:
+        obj.set_response_details(results[obj.pk])
+        # bulk_update skips auto_now, the daily summaries pick up the rows changed since they ran
+        obj.updated_at = now
+
+    with db_transaction.atomic():
+        Transaction.objects.bulk_update(transactions, RESPONSE_DETAIL_FIELDS + ['updated_at'])
+
+    return len(transactions)
+
+
+def backfill_response_details(after=None, batch_size=None, max_batches=None):
+    """
+    Set the checks and the card of the transactions submitted before they were columns, from
+    their responses, in batches ordered by the primary key.
+
+    Each batch is committed on its own, an interrupted run is resumed from the last primary key
+    it reported with ``after``.
+
+    :param after: start after the transaction with this primary key.
+    :param batch_size: the number of transactions updated at a time.
+    :param max_batches: stop after this many batches.
+
+    :returns: ``(updated, last_pk)``, the number of transactions updated and the primary key
+        of the last transaction of the last batch.
+    """
+
+    from sagepaypi.models import Transaction
+
+    batch_size = batch_size or get_setting('BACKFILL_BATCH_SIZE')
+
+    updated = 0
+    batches = 0
+
+    while max_batches is None or batches < max_batches:
+        queryset = Transaction.objects.filter(transaction_id__isnull=False).order_by('pk')
+        if after is not None:
+            queryset = queryset.filter(pk__gt=after)
+
+        pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+
+        if not pks:
+            break
+
+        updated += backfill_batch(pks)
+        after = pks[-1]
+        batches += 1
+
+    return updated, after
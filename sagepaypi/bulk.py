@@ -0,0 +1,568 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import uuid
+
+from django.core.exceptions import ValidationError
+from django.db import transaction as db_transaction
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from sagepaypi.conf import get_setting
+from sagepaypi.exceptions import InvalidTransactionStatus
+from sagepaypi.ratelimit import BATCH, get_rate_limiter, priority
+from sagepaypi.results import InstructionResult, TransactionResult
+from sagepaypi.validation import validate
+
+
+# transaction fields updated from the checks and the card of a response
+RESPONSE_DETAIL_FIELDS = [
+    'avs_cvc_status',
+    'bank_response_code',
+    'card_type',
+    'card_last_four',
+    'secure_status',
+]
+
+# transaction fields updated from the response of a submitted transaction
+SUBMIT_RESPONSE_FIELDS = [
+    'status_code',
+    'status',
+    'status_detail',
+    'transaction_id',
+    'retrieval_reference',
+    'bank_authorisation_code',
+    'acs_url',
+    'outcome_polls',
+    'next_outcome_poll_at',
+] + RESPONSE_DETAIL_FIELDS
+
+# transaction fields updated from the response of a transaction outcome
+OUTCOME_RESPONSE_FIELDS = [
+    'status_code',
+    'status',
+    'status_detail',
+    'transaction_id',
+    'retrieval_reference',
+    'bank_authorisation_code',
+    'outcome_polls',
+    'next_outcome_poll_at',
+] + RESPONSE_DETAIL_FIELDS
+
+# transaction fields updated from the response of a transaction instruction
+INSTRUCTION_RESPONSE_FIELDS = [
+    'instruction',
+    'instruction_created_at',
+]
+
+
+class BulkResult:
+    """
+    The result of a bulk operation.
+
+    ``transactions`` are the transactions created or resumed by the run and ``errors``
+    is a list of ``(obj, message)`` for anything that could not be processed. ``unknown``
+    is a list of ``(obj, message)`` for resumed transactions Sage Pay did not accept again,
+    they may have been accepted by the interrupted run and are left pending to be checked.
+    """
+
+    def __init__(self, run_key=None):
+        self.run_key = run_key
+        self.transactions = []
+        self.errors = []
+        self.unknown = []
+
+    @property
+    def successful(self):
+        return [t for t in self.transactions if t.successful]
+
+    @property
+    def unsuccessful(self):
+        return [t for t in self.transactions if not t.successful]
+
+
+def run_concurrently(items, func, max_workers=None, rate_limiter=None):
+    """
+    Call ``func`` for each item in a thread pool, limiting the rate calls are started.
+    Calls are made in the batch priority lane so they give way to interactive calls.
+
+    Results are yielded as ``(item, result, exception)`` in the order they complete.
+    Only the gateway calls should be made by ``func``, any database work is left to
+    the caller so it happens in the calling thread.
+    """
+
+    max_workers = max_workers or get_setting('BULK_MAX_WORKERS')
+    rate_limiter = rate_limiter or get_rate_limiter(None)
+
+    def call(item):
+        rate_limiter.acquire()
+        with priority(BATCH):
+            return func(item)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(call, item): item for item in items}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                yield item, future.result(), None
+            except Exception as e:
+                yield item, None, e
+
+
+def save_responses(responses, fields):
+    """
+    Record the responses and update the transactions in a single database transaction.
+
+    :param responses: list of ``(transaction, step, result)``.
+    :param fields: the transaction fields to update.
+    """
+
+    if not responses:
+        return
+
+    from sagepaypi.models import Transaction, TransactionResponse
+
+    now = timezone.now()
+    transactions = {}
+    audit = []
+
+    for obj, step, step_result in responses:
+        obj.updated_at = now
+        transactions[obj.pk] = obj
+        audit.append(TransactionResponse.from_result(obj, step, step_result))
+
+    with db_transaction.atomic():
+        TransactionResponse.objects.bulk_create(audit)
+        Transaction.objects.bulk_update(list(transactions.values()), list(fields) + ['updated_at'])
+        # only transactions that require 3-D Secure have messages to save
+        for obj in transactions.values():
+            obj.save_secure_data()
+
+
+def submit_transactions(transactions, result, max_workers=None, rate=None, batch_size=None, resumed=()):
+    """
+    Submit saved transactions to Sage Pay concurrently, saving the responses in batches.
+
+    Payloads are built and checked up front so no queries are made in the worker threads.
+    Transactions that fail to submit are left as is to be picked up by another run.
+
+    ``resumed`` are the primary keys of transactions an interrupted run may already have
+    sent. Sage Pay rejects a vendor tx code it has seen, so when one of them is not accepted
+    the response is recorded but the transaction is left pending and added to ``result.unknown``
+    rather than saved as failed.
+    """
+
+    from sagepaypi.gateway import default_gateway, SagepayHttpResponse
+
+    if rate is None:
+        rate = get_setting('BULK_RATE_LIMIT')
+    batch_size = batch_size or get_setting('BULK_BATCH_SIZE')
+    payloads = {}
+
+    for obj in list(transactions):
+        try:
+            payloads[obj.pk] = obj.get_submit_data()
+            obj.check_can_submit(payloads[obj.pk])
+        except InvalidTransactionStatus as e:
+            result.errors.append((obj, str(e.args[0])))
+            payloads.pop(obj.pk, None)
+
+    transactions = [obj for obj in transactions if obj.pk in payloads]
+
+    def submit(obj):
+        return TransactionResult.from_response(default_gateway.submit_transaction(payloads[obj.pk]))
+
+    responses = []
+
+    for obj, submitted, error in run_concurrently(transactions, submit, max_workers, get_rate_limiter(rate)):
+        if error:
+            result.errors.append((obj, str(error)))
+            continue
+
+        if obj.pk in resumed and submitted.status_code not in [
+            SagepayHttpResponse.HTTP_200,
+            SagepayHttpResponse.HTTP_201,
+            SagepayHttpResponse.HTTP_202
+        ]:
+            result.unknown.append((obj, submitted.status_detail or str(submitted.status_code)))
+        else:
+            obj.set_submit_result(submitted)
+        responses.append((obj, 'submit_transaction', submitted))
+
+        if len(responses) >= batch_size:
+            save_responses(responses, SUBMIT_RESPONSE_FIELDS)
+            responses = []
+
+    save_responses(responses, SUBMIT_RESPONSE_FIELDS)
+
+
+def repeat_vendor_tx_code(original, run_key):
+    """
+    The vendor tx code of the repeat of a transaction within a run.
+
+    It is derived from the run so a run can be resumed without creating or
+    charging a repeat twice, Sage Pay will also reject a duplicate vendor tx code.
+    """
+
+    return str(uuid.uuid5(uuid.UUID(str(original.pk)), run_key))
+
+
+def bulk_repeat(originals, run_key=None, max_workers=None, rate=None, batch_size=None, **kwargs):
+    """
+    Repeat many transactions.
+
+    Originals are validated in memory, the repeats are inserted in bulk then submitted
+    concurrently. Running again with the same ``run_key`` resumes the run, only
+    repeats that have not been submitted yet are submitted.
+
+    A resumed repeat without a response may have been accepted by Sage Pay before the run
+    was interrupted, so it is submitted again with the same vendor tx code. If Sage Pay
+    does not accept it, ie as a duplicate, it is left pending in ``result.unknown`` to be
+    checked on MySagePay instead of being saved as failed.
+
+    :param originals: the transactions to repeat.
+    :param run_key: a unique key for the billing run, generated if not given.
+    :param max_workers: the number of concurrent calls made to Sage Pay.
+    :param rate: the max number of calls per second made to Sage Pay.
+    :param batch_size: the number of rows inserted or updated at a time.
+    :param kwargs: Pass any defaults for the repeat transactions,
+        ie {'amount': 1, 'description': 'Repeat of payment'}
+
+    :returns: a ``BulkResult``.
+    """
+
+    from sagepaypi.models import Transaction
+
+    result = BulkResult(run_key or uuid.uuid4().hex)
+    batch_size = batch_size or get_setting('BULK_BATCH_SIZE')
+    kwargs.pop('vendor_tx_code', None)
+
+    valid = []
+    for original in originals:
+        try:
+            original.check_can_repeat()
+        except InvalidTransactionStatus as e:
+            result.errors.append((original, str(e.args[0])))
+        else:
+            valid.append(original)
+
+    codes = {original.pk: repeat_vendor_tx_code(original, result.run_key) for original in valid}
+    existing = {
+        obj.vendor_tx_code: obj
+        for obj in Transaction.objects.filter(vendor_tx_code__in=codes.values())
+    }
+
+    repeats = []
+    new_repeats = []
+    resumed = set()
+
+    for original in valid:
+        repeat = existing.get(codes[original.pk])
+
+        if repeat:
+            repeat.reference_transaction = original
+            resumed.add(repeat.pk)
+        else:
+            repeat = original.build_repeat(vendor_tx_code=codes[original.pk], **kwargs)
+            try:
+                # the card identifier and reference come from a saved transaction and the
+                # vendor tx code is unique to the run, skip the queries to validate them
+                repeat.full_clean(exclude=['card_identifier', 'reference_transaction'], validate_unique=False)
+                repeat.check_can_submit()
+            except ValidationError as e:
+                result.errors.append((original, '; '.join(e.messages)))
+                continue
+            except InvalidTransactionStatus as e:
+                result.errors.append((original, str(e.args[0])))
+                continue
+            new_repeats.append(repeat)
+
+        repeats.append(repeat)
+
+    Transaction.objects.bulk_create(new_repeats, batch_size=batch_size)
+
+    pending = [repeat for repeat in repeats if repeat.status_code is None]
+    submit_transactions(pending, result, max_workers, rate, batch_size, resumed=resumed)
+
+    result.transactions = repeats
+    return result
+
+
+def refund_vendor_tx_code(original, run_key, index=0):
+    """
+    The vendor tx code of a refund of a transaction within a run, ``index`` counts the refunds
+    of the same transaction in the run.
+
+    It is derived from the run so a run can be resumed without refunding a transaction twice.
+    """
+
+    return str(uuid.uuid5(uuid.UUID(str(original.pk)), 'refund:%s:%s' % (run_key, index)))
+
+
+def bulk_refund(refunds, run_key=None, max_workers=None, rate=None, batch_size=None, **kwargs):
+    """
+    Refund many transactions.
+
+    The originals are locked and the amounts already refunded, or being refunded by refunds
+    without a response yet, are fetched for all of them in a single query. Any refund that
+    would take the total refunded over the original amount is rejected before anything is
+    sent to Sage Pay. The valid refunds are inserted in bulk while the originals are locked,
+    then submitted concurrently.
+
+    Running again with the same ``run_key`` and refunds resumes the run, only refunds that
+    have not been submitted yet are submitted. As with ``bulk_repeat`` a resumed refund that
+    Sage Pay does not accept again is left pending in ``result.unknown``.
+
+    :param refunds: ``(transaction, amount)`` pairs, an amount of ``None`` refunds
+        the amount that has not been refunded yet.
+    :param run_key: a unique key for the run, generated if not given.
+    :param max_workers: the number of concurrent calls made to Sage Pay.
+    :param rate: the max number of calls per second made to Sage Pay.
+    :param batch_size: the number of rows inserted or updated at a time.
+    :param kwargs: Pass any defaults for the refund transactions,
+        ie {'description': 'Refund of payment'}
+
+    :returns: a ``BulkResult``.
+    """
+
+    from sagepaypi.models import Transaction
+
+    result = BulkResult(run_key or uuid.uuid4().hex)
+    batch_size = batch_size or get_setting('BULK_BATCH_SIZE')
+    refunds = list(refunds)
+    kwargs.pop('amount', None)
+    kwargs.pop('vendor_tx_code', None)
+
+    codes = []
+    counts = {}
+    for original, amount in refunds:
+        index = counts.get(original.pk, 0)
+        counts[original.pk] = index + 1
+        codes.append(refund_vendor_tx_code(original, result.run_key, index))
+
+    resumed = []
+    new_refunds = []
+
+    with db_transaction.atomic():
+        refundable = Transaction.objects.lock_refundable_amounts([original for original, amount in refunds])
+        # read once the originals are locked so a concurrent run of the same run key is seen
+        existing = {
+            obj.vendor_tx_code: obj
+            for obj in Transaction.objects.filter(vendor_tx_code__in=codes)
+        }
+
+        for (original, amount), code in zip(refunds, codes):
+            refund = existing.get(code)
+
+            # made by an earlier attempt of the run and already counted against the original
+            if refund:
+                refund.reference_transaction = original
+                resumed.append(refund)
+                continue
+
+            try:
+                original.check_can_refund()
+            except InvalidTransactionStatus as e:
+                result.errors.append((original, str(e.args[0])))
+                continue
+
+            refundable_amount = refundable[original.pk]
+            amount = amount or refundable_amount
+
+            if amount <= 0 or amount > refundable_amount:
+                result.errors.append((original, _('can only refund up to the original amount and no more')))
+                continue
+
+            refund = original.build_refund(amount=amount, vendor_tx_code=code, **kwargs)
+            try:
+                # the card identifier and reference come from a saved transaction and the
+                # vendor tx code is unique to the run, skip the queries to validate them
+                refund.full_clean(exclude=['card_identifier', 'reference_transaction'], validate_unique=False)
+                refund.check_can_submit()
+            except ValidationError as e:
+                result.errors.append((original, '; '.join(e.messages)))
+                continue
+            except InvalidTransactionStatus as e:
+                result.errors.append((original, str(e.args[0])))
+                continue
+
+            # count the refund against the transaction so the rest of the batch cannot over refund it
+            refundable[original.pk] = refundable_amount - amount
+            new_refunds.append(refund)
+
+        Transaction.objects.bulk_create(new_refunds, batch_size=batch_size)
+
+    pending = [refund for refund in resumed if refund.status_code is None] + new_refunds
+    submit_transactions(
+        pending,
+        result,
+        max_workers,
+        rate,
+        batch_size,
+        resumed={refund.pk for refund in resumed}
+    )
+
+    result.transactions = resumed + new_refunds
+    return result
+
+
+def bulk_instruct(transactions, instruction_type, max_workers=None, rate=None, batch_size=None):
+    """
+    Release or abort many deferred transactions.
+
+    Transactions are checked in memory and the instructions are submitted concurrently,
+    an aborted transaction also gets its outcome as ``Transaction.abort`` does.
+    The responses are saved in batches.
+
+    :param transactions: the deferred transactions.
+    :param instruction_type: either "release" or "abort".
+    :param max_workers: the number of concurrent calls made to Sage Pay.
+    :param rate: the max number of calls per second made to Sage Pay.
+    :param batch_size: the number of rows updated at a time.
+
+    :returns: a ``BulkResult``.
+    """
+
+    from sagepaypi.gateway import default_gateway, SagepayHttpResponse
+    from sagepaypi.outcomes import cache_outcome
+
+    if instruction_type not in ['release', 'abort']:
+        raise ValueError('instruction_type must be either "release" or "abort"')
+
+    if rate is None:
+        rate = get_setting('BULK_RATE_LIMIT')
+    batch_size = batch_size or get_setting('BULK_BATCH_SIZE')
+    result = BulkResult()
+
+    valid = []
+    for obj in transactions:
+        try:
+            if instruction_type == 'release':
+                obj.check_can_release()
+            else:
+                obj.check_can_abort()
+        except InvalidTransactionStatus as e:
+            result.errors.append((obj, str(e.args[0])))
+        else:
+            valid.append(obj)
+
+    def instruct(obj):
+        post_data = {'instructionType': instruction_type, 'amount': obj.amount}
+        validate('instruction', post_data)
+
+        instructed = InstructionResult.from_response(
+            default_gateway.submit_transaction_instruction(obj.transaction_id, post_data)
+        )
+        results = [(instruction_type, instructed)]
+
+        if instruction_type == 'abort' and instructed.status_code == SagepayHttpResponse.HTTP_201:
+            outcome = TransactionResult.from_response(default_gateway.get_transaction_outcome(obj.transaction_id))
+            cache_outcome(obj.transaction_id, outcome)
+            results.append(('get_transaction_outcome', outcome))
+
+        return results
+
+    fields = INSTRUCTION_RESPONSE_FIELDS + OUTCOME_RESPONSE_FIELDS
+    responses = []
+
+    for obj, response, error in run_concurrently(valid, instruct, max_workers, get_rate_limiter(rate)):
+        if error:
+            result.errors.append((obj, str(error)))
+            continue
+
+        for step, step_result in response:
+            if step == 'get_transaction_outcome':
+                obj.set_outcome_result(step_result)
+            else:
+                obj.set_instruction_result(step_result)
+            responses.append((obj, step, step_result))
+
+        result.transactions.append(obj)
+
+        if len(responses) >= batch_size:
+            save_responses(responses, fields)
+            responses = []
+
+    save_responses(responses, fields)
+
+    return result
+
+
+def poll_outcomes(now=None, limit=None, max_workers=None, rate=None, batch_size=None):
+    """
+    Get the outcome of the transactions due to be polled, the longest due first.
+
+    The outcomes are looked up concurrently, sharing the lookups in flight for the same
+    transactions, and the responses are saved in batches. Each transaction is scheduled
+    to be polled again until it has a final status, a lookup that fails backs off as well.
+
+    :param now: the time the transactions are due by, defaults to now.
+    :param limit: the max number of transactions polled, defaults to ``SAGEPAYPI_OUTCOME_POLL_BATCH_SIZE``.
+    :param max_workers: the number of concurrent calls made to Sage Pay.
+    :param rate: the max number of calls per second made to Sage Pay.
+    :param batch_size: the number of rows updated at a time.
+
+    :returns: a ``BulkResult``.
+    """
+
+    from sagepaypi.gateway import default_gateway
+    from sagepaypi.models import Transaction
+    from sagepaypi.models.transaction import outcome_flight
+    from sagepaypi.outcomes import cache_outcome
+
+    if rate is None:
+        rate = get_setting('BULK_RATE_LIMIT')
+    limit = limit or get_setting('OUTCOME_POLL_BATCH_SIZE')
+    batch_size = batch_size or get_setting('BULK_BATCH_SIZE')
+    result = BulkResult()
+
+    transactions = list(Transaction.objects.outcome_poll_due(now).order_by('next_outcome_poll_at')[:limit])
+
+    def poll(obj):
+        def get_outcome():
+            outcome = TransactionResult.from_response(default_gateway.get_transaction_outcome(obj.transaction_id))
+            cache_outcome(obj.transaction_id, outcome)
+            return outcome
+
+        return outcome_flight.do(
+            obj.transaction_id,
+            get_outcome,
+            cache_alias=get_setting('OUTCOME_LOCK_CACHE'),
+            timeout=get_setting('OUTCOME_LOCK_TIMEOUT')
+        )
+
+    responses = []
+    failed = []
+
+    for obj, polled, error in run_concurrently(transactions, poll, max_workers, get_rate_limiter(rate)):
+        if error:
+            result.errors.append((obj, str(error)))
+            obj.outcome_polls += 1
+            obj.schedule_outcome_poll()
+            failed.append(obj)
+            continue
+
+        outcome, shared = polled
+        result.transactions.append(obj)
+
+        # a shared outcome was saved by the lookup that made the call
+        if shared:
+            continue
+
+        obj.set_outcome_result(outcome)
+        responses.append((obj, 'get_transaction_outcome', outcome))
+
+        if len(responses) >= batch_size:
+            save_responses(responses, OUTCOME_RESPONSE_FIELDS)
+            responses = []
+
+    save_responses(responses, OUTCOME_RESPONSE_FIELDS)
+
+    if failed:
+        for obj in failed:
+            obj.updated_at = timezone.now()
+        Transaction.objects.bulk_update(
+            failed,
+            ['outcome_polls', 'next_outcome_poll_at', 'updated_at'],
+            batch_size=batch_size
+        )
+
+    return result
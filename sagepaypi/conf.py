@@ -8,7 +8,50 @@ SETTINGS_DEFAULTS = {
     'INTEGRATION_KEY': None,
     'INTEGRATION_PASSWORD': None,
     'TOKEN_URL_DAYS_VALID': 1,
-    'POST_3D_SECURE_REDIRECT_URL': None
+    'POST_3D_SECURE_REDIRECT_URL': None,
+    'BULK_MAX_WORKERS': 4,
+    'BULK_RATE_LIMIT': 10,
+    'BULK_BATCH_SIZE': 100,
+    'RATE_LIMITS': {},
+    'RATE_LIMIT_RESERVE': 0.2,
+    'RATE_LIMIT_BACKEND': 'sagepaypi.ratelimit.TokenBucket',
+    'RATE_LIMIT_CACHE': 'default',
+    'DEFERRED_EXPIRY_DAYS': 5,
+    'DEFERRED_EXPIRY_POLICY': None,
+    'EXPORT_CHUNK_SIZE': 2000,
+    'ADMIN_ESTIMATED_COUNT_THRESHOLD': 10000,
+    'ADMIN_INLINE_RESPONSES': 20,
+    'ADMIN_LATENCY_DAYS': 7,
+    'API_PAGE_SIZE': 100,
+    'API_MAX_PAGE_SIZE': 1000,
+    'SUMMARY_LAG': 60,
+    'ARCHIVE_DATABASE': 'default',
+    'ARCHIVE_AFTER_DAYS': 365,
+    'ARCHIVE_BATCH_SIZE': 1000,
+    'BACKFILL_BATCH_SIZE': 1000,
+    'READ_REPLICAS': [],
+    'READ_REPLICA_STICKY_SECONDS': 10,
+    'READ_REPLICA_CACHE': 'default',
+    'CHALLENGE_WINDOW_SIZE': 'FullScreen',
+    'CONNECTION_POOL_SIZE': 10,
+    'CONNECT_RETRIES': 0,
+    'TRANSPORT': 'sagepaypi.transports.RequestsTransport',
+    'JSON_CODEC': None,
+    'ID_GENERATOR': 'uuid.uuid4',
+    'MERCHANT_SESSION_KEY_MIN_SECONDS': 60,
+    'OUTCOME_LOCK_CACHE': None,
+    'OUTCOME_LOCK_TIMEOUT': 10,
+    'OUTCOME_CACHE': None,
+    'OUTCOME_CACHE_TIMEOUT': 86400,
+    'OUTCOME_POLL_INTERVAL': 60,
+    'OUTCOME_POLL_MAX_INTERVAL': 3600,
+    'OUTCOME_POLL_MAX_POLLS': 20,
+    'OUTCOME_POLL_BATCH_SIZE': 500,
+    'CARD_IDENTIFIER_CACHE': None,
+    'CARD_IDENTIFIER_MIN_SECONDS': 60,
+    'WARM_UP': False,
+    'WARM_UP_CONNECTIONS': 2,
+    'WARM_UP_MERCHANT_SESSION_KEY': False
 }
 
 
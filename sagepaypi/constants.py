@@ -3,11 +3,51 @@ from django.utils.translation import gettext_lazy as _
 import pycountry
 
 
+AVS_CVC_STATUS_CHOICES = [
+    ('AllMatched', _('All matched')),
+    ('SecurityCodeMatchOnly', _('Security code match only')),
+    ('AddressMatchOnly', _('Address match only')),
+    ('NoMatches', _('No matches')),
+    ('NotChecked', _('Not checked')),
+]
+
 COUNTRY_CHOICES = sorted(
     [(o.alpha_2, o.name) for o in pycountry.countries],
     key=lambda o: o[1]
 )
 
+# the number of days a deferred transaction can be released or aborted
+DEFERRED_DAYS_VALID = 30
+
+INSTRUCTION_CHOICES = [
+    ('release', _('Release')),
+    ('abort', _('Abort')),
+    ('void', _('Void')),
+]
+
+SECURE_STATUS_CHOICES = [
+    ('Authenticated', _('Authenticated')),
+    ('NotAuthenticated', _('Not authenticated')),
+    ('AttemptOnly', _('Attempt only')),
+    ('CardNotEnrolled', _('Card not enrolled')),
+    ('IssuerNotEnrolled', _('Issuer not enrolled')),
+    ('NotChecked', _('Not checked')),
+    ('Force', _('Force')),
+    ('Incomplete', _('Incomplete')),
+    ('MalformedOrInvalid', _('Malformed or invalid')),
+    ('Error', _('Error')),
+]
+
+TRANSACTION_STATUS_CHOICES = [
+    ('Ok', _('Ok')),
+    ('NotAuthed', _('Not authed')),
+    ('Rejected', _('Rejected')),
+    ('3DAuth', _('3D auth')),
+    ('Malformed', _('Malformed')),
+    ('Invalid', _('Invalid')),
+    ('Error', _('Error')),
+]
+
 TRANSACTION_TYPE_CHOICES = [
     ('Payment', _('Payment')),
     ('Deferred', _('Deferred')),
@@ -0,0 +1,135 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models import OuterRef, Subquery
+
+from sagepaypi.conf import get_setting
+
+
+# the transaction fields exported, the 3-D Secure blobs are left out
+TRANSACTION_FIELDS = [
+    'id',
+    'created_at',
+    'updated_at',
+    'type',
+    'card_identifier_id',
+    'vendor_tx_code',
+    'amount',
+    'currency',
+    'description',
+    'status_code',
+    'status',
+    'status_detail',
+    'transaction_id',
+    'retrieval_reference',
+    'bank_authorisation_code',
+    'secure_status',
+    'avs_cvc_status',
+    'bank_response_code',
+    'card_type',
+    'card_last_four',
+    'instruction',
+    'instruction_created_at',
+    'reference_transaction_id',
+]
+
+# the fields of the latest response joined to each transaction
+RESPONSE_FIELDS = [
+    'response_step',
+    'response_status_code',
+    'response_created_at',
+    'response_data',
+]
+
+FORMATS = ['csv', 'jsonl']
+
+
+class Echo:
+    """
+    File like object that returns what is written, so the csv writer can be streamed.
+    """
+
+    def write(self, value):
+        return value
+
+
+def with_latest_response(queryset):
+    """
+    Annotate the transactions with their latest response using subqueries, rather than a query per row.
+    """
+
+    from sagepaypi.models import TransactionResponse
+
+    latest = TransactionResponse.objects.filter(transaction=OuterRef('pk')).order_by('-created_at', '-pk')
+
+    return queryset.annotate(
+        response_step=Subquery(latest.values('step')[:1]),
+        response_status_code=Subquery(latest.values('status_code')[:1]),
+        response_created_at=Subquery(latest.values('created_at')[:1]),
+        response_data=Subquery(latest.values('data')[:1], output_field=models.JSONField()),
+    )
+
+
+def export_fields(include_response=False):
+    return TRANSACTION_FIELDS + (RESPONSE_FIELDS if include_response else [])
+
+
+def export_rows(queryset, include_response=False, chunk_size=None):
+    """
+    Iterate the transactions as dicts, fetching them from the database in chunks.
+    """
+
+    if include_response:
+        queryset = with_latest_response(queryset)
+
+    chunk_size = chunk_size or get_setting('EXPORT_CHUNK_SIZE')
+
+    return queryset.values(*export_fields(include_response)).iterator(chunk_size=chunk_size)
+
+
+def csv_lines(rows, fields):
+    """
+    Write the rows as csv lines, json values are written as json.
+    """
+
+    writer = csv.writer(Echo())
+
+    yield writer.writerow(fields)
+
+    for row in rows:
+        if row.get('response_data') is not None:
+            row['response_data'] = json.dumps(row['response_data'], cls=DjangoJSONEncoder)
+        yield writer.writerow([row[field] for field in fields])
+
+
+def jsonl_lines(rows):
+    """
+    Write the rows as json lines.
+    """
+
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+def export_transactions(queryset, format='csv', include_response=False, chunk_size=None):
+    """
+    Export transactions as csv or json lines with constant memory.
+
+    :param queryset: the transactions to export.
+    :param format: either "csv" or "jsonl".
+    :param include_response: join the latest response of each transaction.
+    :param chunk_size: the number of rows fetched from the database at a time.
+
+    :returns: an iterator of lines.
+    """
+
+    if format not in FORMATS:
+        raise ValueError('format must be one of %s' % ', '.join(FORMATS))
+
+    rows = export_rows(queryset, include_response, chunk_size)
+
+    if format == 'csv':
+        return csv_lines(rows, export_fields(include_response))
+    return jsonl_lines(rows)
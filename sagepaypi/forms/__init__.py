@@ -1,2 +1,2 @@
 from .card_identifier import CardIdentifierForm
-from .transaction import Complete3DSecureForm
+from .transaction import Complete3DSecureChallengeForm, Complete3DSecureForm
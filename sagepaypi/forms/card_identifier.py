@@ -1,12 +1,72 @@
-import dateutil
+from datetime import datetime, timezone
 
 from django import forms
+from django.core.cache import caches
+from django.utils.crypto import salted_hmac
 from django.utils.translation import gettext_lazy as _
 
+from sagepaypi.conf import get_setting
 from sagepaypi.gateway import SagepayHttpResponse
 from sagepaypi.constants import US_STATE_CHOICES, COUNTRY_CHOICES
 from sagepaypi.fields import CardNumberField, CardCVCodeField, CardExpiryDateField
 from sagepaypi.models import CardIdentifier
+from sagepaypi.results import CardIdentifierResult
+
+
+def card_digest(card_details):
+    """
+    A keyed digest of the card details, so they can be matched without being kept.
+    """
+
+    value = '|'.join(card_details[key] for key in ['cardholderName', 'cardNumber', 'expiryDate', 'securityCode'])
+    return salted_hmac('sagepaypi.card_identifier', value, algorithm='sha256').hexdigest()
+
+
+def card_identifier_cache_key(digest):
+    return 'sagepaypi:card_identifier:%s' % digest
+
+
+def seconds_valid(result):
+    """
+    The seconds a card identifier can still be used for, leaving ``SAGEPAYPI_CARD_IDENTIFIER_MIN_SECONDS`` to use it.
+    """
+
+    remaining = (result.expiry - datetime.now(timezone.utc)).total_seconds()
+    return int(remaining - get_setting('CARD_IDENTIFIER_MIN_SECONDS'))
+
+
+def get_cached_card_identifier(digest):
+    """
+    A card identifier created for the same card details that can still be used,
+    from the cache set by ``SAGEPAYPI_CARD_IDENTIFIER_CACHE``.
+    """
+
+    alias = get_setting('CARD_IDENTIFIER_CACHE')
+    if not alias:
+        return None
+
+    cached = caches[alias].get(card_identifier_cache_key(digest))
+    if not cached:
+        return None
+
+    status_code, data, merchant_session_key = cached
+    result = CardIdentifierResult(status_code, data, merchant_session_key=merchant_session_key)
+    return result if seconds_valid(result) > 0 else None
+
+
+def cache_card_identifier(digest, result):
+    alias = get_setting('CARD_IDENTIFIER_CACHE')
+    timeout = seconds_valid(result)
+
+    if alias and timeout > 0:
+        cached = result.status_code, dict(result.data), result.merchant_session_key
+        caches[alias].set(card_identifier_cache_key(digest), cached, timeout)
+
+
+def forget_card_identifier(digest):
+    alias = get_setting('CARD_IDENTIFIER_CACHE')
+    if alias:
+        caches[alias].delete(card_identifier_cache_key(digest))
 
 
 class CardIdentifierForm(forms.ModelForm):
@@ -39,6 +99,44 @@ class CardIdentifierForm(forms.ModelForm):
         ]
         model = CardIdentifier
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._card_identifiers = {}
+        self._card_digest = None
+
+    def get_card_identifier(self, data):
+        """
+        Create a card identifier with Sage Pay.
+
+        The result is kept against a digest of the card details, so validating the form again
+        does not call Sage Pay again. A card identifier created is also kept in the cache set by
+        ``SAGEPAYPI_CARD_IDENTIFIER_CACHE`` while it can still be used, for forms validated again
+        in later requests, ie by a form wizard.
+
+        :returns: a ``CardIdentifierResult`` or ``None`` if Sage Pay cannot be reached.
+        """
+
+        from sagepaypi.gateway import default_gateway
+
+        digest = card_digest(data['cardDetails'])
+        self._card_digest = digest
+
+        if digest in self._card_identifiers:
+            return self._card_identifiers[digest]
+
+        result = get_cached_card_identifier(digest)
+
+        if not result:
+            result = default_gateway.create_card_identifier(data)
+            if not result:
+                return None
+
+            if result.status_code == SagepayHttpResponse.HTTP_201:
+                cache_card_identifier(digest, result)
+
+        self._card_identifiers[digest] = result
+        return result
+
     def clean(self):
         """
         Here we are overriding the clean method in the form to get a new
@@ -60,8 +158,6 @@ class CardIdentifierForm(forms.ModelForm):
         if all([card_holder_name, card_number, card_expiry_date, card_security_code]):
             # submit new card to Sage Pay only if all fields are clean
 
-            from sagepaypi.gateway import default_gateway
-
             data = {
                 'cardDetails': {
                     'cardholderName': card_holder_name,
@@ -71,22 +167,20 @@ class CardIdentifierForm(forms.ModelForm):
                 }
             }
 
-            card_identifier = default_gateway.create_card_identifier(data)
+            result = self.get_card_identifier(data)
 
-            if not card_identifier:
+            if not result:
                 err = _('Cannot connect to Sagepay, please try again later.')
                 self.add_error(None, err)
                 return self.cleaned_data
 
-            data = card_identifier[0].json()
-
-            if card_identifier[0].status_code == SagepayHttpResponse.HTTP_201:
-                self.instance.merchant_session_key = card_identifier[1]
-                self.instance.card_identifier = data['cardIdentifier']
-                self.instance.card_identifier_expiry = dateutil.parser.parse(data['expiry'])
-                self.instance.card_type = data['cardType']
+            if result.status_code == SagepayHttpResponse.HTTP_201:
+                self.instance.merchant_session_key = result.merchant_session_key
+                self.instance.card_identifier = result.card_identifier
+                self.instance.card_identifier_expiry = result.expiry
+                self.instance.card_type = result.card_type
 
-            elif card_identifier[0].status_code == SagepayHttpResponse.HTTP_422:
+            elif result.status_code == SagepayHttpResponse.HTTP_422:
                 # add any errors relating to the fields filled in
                 # and map them to form field properties
                 error_field_mappings = {
@@ -95,17 +189,15 @@ class CardIdentifierForm(forms.ModelForm):
                     'cardDetails.expiryDate': 'card_expiry_date',
                     'cardDetails.securityCode': 'card_security_code',
                 }
-                errors = data.get('errors')
-                if errors and isinstance(errors, list):
-                    for error in errors:
-                        prop = error.get('property')
-                        msg = error.get('clientMessage')
-                        if prop and msg and prop in error_field_mappings:
-                            # the prop is in the mapping so add the error to the field
-                            self.add_error(error_field_mappings[prop], msg)
-                        elif msg:
-                            # if not add the error to the NON_FIELD_ERRORS
-                            self.add_error(None, msg)
+                for error in result.errors:
+                    prop = error.get('property')
+                    msg = error.get('clientMessage')
+                    if prop and msg and prop in error_field_mappings:
+                        # the prop is in the mapping so add the error to the field
+                        self.add_error(error_field_mappings[prop], msg)
+                    elif msg:
+                        # if not add the error to the NON_FIELD_ERRORS
+                        self.add_error(None, msg)
 
             else:
                 # something unexpected has happened
@@ -117,8 +209,13 @@ class CardIdentifierForm(forms.ModelForm):
     def save(self, commit=True):
         """
         Set additional required instance attributes before save.
+
+        The card identifier now belongs to the instance so it is removed from the cache.
         """
 
+        if self._card_digest:
+            forget_card_identifier(self._card_digest)
+
         self.instance.last_four_digits = self.cleaned_data['card_number'][-4:]
         self.instance.expiry_date = self.cleaned_data['card_expiry_date'].strftime('%m%y')
 
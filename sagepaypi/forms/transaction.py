@@ -11,3 +11,19 @@ class Complete3DSecureForm(forms.Form):
     def save(self):
         self.transaction.get_3d_secure_status(self.cleaned_data['PaRes'])
         return self.transaction
+
+
+class Complete3DSecureChallengeForm(forms.Form):
+    cres = forms.CharField()
+    threeDSSessionData = forms.CharField()
+
+    def __init__(self, transaction, *args, **kwargs):
+        self.transaction = transaction
+        super().__init__(*args, **kwargs)
+
+    def save(self):
+        self.transaction.complete_3d_secure_challenge(
+            self.cleaned_data['cres'],
+            self.cleaned_data['threeDSSessionData']
+        )
+        return self.transaction
@@ -1,10 +1,14 @@
-import dateutil.parser
+from datetime import datetime, timezone
 from enum import IntEnum
+import threading
 
-import requests
 from requests.auth import HTTPBasicAuth
 
+from django.utils.module_loading import import_string
+
 from sagepaypi.conf import get_setting
+from sagepaypi.ratelimit import current_priority
+from sagepaypi.results import CardIdentifierResult, InstructionResult, parse_datetime, TransactionResult
 
 
 class SagepayHttpResponse(IntEnum):
@@ -20,11 +24,31 @@ class SagepayHttpResponse(IntEnum):
     HTTP_405 = 405  # The method requested is not permitted against this resource.
     HTTP_408 = 408  # Request timeout.
     HTTP_422 = 422  # The request was well-formed but contains invalid values or missing properties.
+    HTTP_429 = 429  # Too many requests, the vendor is being throttled.
     HTTP_500 = 500  # An issue occurred at Sage Pay.
     HTTP_502 = 502  # An issue occurred at Sage Pay.
 
 
 class SagepayGateway:
+    """
+    Makes the calls to Sage Pay.
+
+    Calls are rate limited per endpoint by ``SAGEPAYPI_RATE_LIMITS``, the endpoints being
+    ``merchant-session-keys``, ``card-identifiers``, ``transactions``, ``transaction-outcome``,
+    ``3d-secure`` and ``instructions``. Rate limiters are shared by all gateways in the process,
+    or between processes with the cache backend.
+
+    Calls are sent by a transport, ``SAGEPAYPI_TRANSPORT`` by default which is shared by all
+    gateways in the process so connections to Sage Pay are pooled and kept alive between calls.
+    Pass a transport to use another for the calls of a gateway, ie ``SagepayGateway(HTTP2Transport())``.
+    """
+
+    _rate_limiters = {}
+    _rate_limiters_lock = threading.Lock()
+    _transports = {}
+    _transports_lock = threading.Lock()
+    _merchant_session_key = None
+    _merchant_session_key_lock = threading.Lock()
 
     @classmethod
     def basic_auth(cls):
@@ -43,18 +67,113 @@ class SagepayGateway:
             return 'https://pi-test.sagepay.com/api/v1'
         return 'https://pi-live.sagepay.com/api/v1'
 
+    def __init__(self, transport=None):
+        self._transport = transport
+
+    @property
+    def transport(self):
+        """
+        The transport of the gateway, the shared ``SAGEPAYPI_TRANSPORT`` when none was given.
+        """
+
+        if self._transport is not None:
+            return self._transport
+
+        path = get_setting('TRANSPORT')
+
+        with self._transports_lock:
+            if path not in self._transports:
+                self._transports[path] = import_string(path)()
+            return self._transports[path]
+
+    def get_rate_limiter(self, endpoint):
+        """
+        Get the rate limiter of an endpoint, ``None`` when it is not limited.
+        """
+
+        limits = get_setting('RATE_LIMITS')
+        rate = limits.get(endpoint, limits.get('default'))
+
+        if not rate:
+            return None
+
+        backend = get_setting('RATE_LIMIT_BACKEND')
+        key = (backend, endpoint, rate)
+
+        with self._rate_limiters_lock:
+            if key not in self._rate_limiters:
+                capacity = max(rate, 1)
+                self._rate_limiters[key] = import_string(backend)(
+                    rate,
+                    capacity=capacity,
+                    reserve=capacity * get_setting('RATE_LIMIT_RESERVE'),
+                    name=endpoint
+                )
+            return self._rate_limiters[key]
+
+    def throttle(self, endpoint):
+        """
+        Wait until a call can be made to the endpoint in the current priority lane.
+        """
+
+        limiter = self.get_rate_limiter(endpoint)
+        if limiter:
+            limiter.acquire(priority=current_priority())
+
+    def throttled(self, endpoint, response):
+        """
+        Check the response for throttling by Sage Pay, slowing further calls to the endpoint.
+        """
+
+        if response.status_code == SagepayHttpResponse.HTTP_429:
+            limiter = self.get_rate_limiter(endpoint)
+            if limiter:
+                limiter.drain()
+
+        return response
+
+    def prefetch_merchant_session_key(self):
+        """
+        Get a merchant session key ahead of time, it is used by the next call to ``get_merchant_session_key``.
+        """
+
+        session_key = self.fetch_merchant_session_key()
+        if session_key:
+            with self._merchant_session_key_lock:
+                SagepayGateway._merchant_session_key = session_key
+        return session_key
+
     def get_merchant_session_key(self):
+        """
+        Get a merchant session key, using the prefetched key once when it is not about to expire.
+        """
+
+        with self._merchant_session_key_lock:
+            session_key, SagepayGateway._merchant_session_key = SagepayGateway._merchant_session_key, None
+
+        if session_key:
+            remaining = session_key[1] - datetime.now(timezone.utc)
+            if remaining.total_seconds() > get_setting('MERCHANT_SESSION_KEY_MIN_SECONDS'):
+                return session_key
+
+        return self.fetch_merchant_session_key()
+
+    def fetch_merchant_session_key(self):
         url = '%s/merchant-session-keys' % self.api_url()
         post_data = {'vendorName': self.vendor_name()}
 
-        response = requests.post(url, json=post_data, auth=self.basic_auth())
+        self.throttle('merchant-session-keys')
+        response = self.throttled(
+            'merchant-session-keys',
+            self.transport.post(url, json=post_data, auth=self.basic_auth())
+        )
 
         if response.status_code != SagepayHttpResponse.HTTP_201:
             return None
 
         data = response.json()
         merchant_session_key = data['merchantSessionKey']
-        expiry = dateutil.parser.parse(data['expiry'])
+        expiry = parse_datetime(data['expiry'])
 
         return merchant_session_key, expiry
 
@@ -67,27 +186,60 @@ class SagepayGateway:
 
         headers = {'Authorization': 'Bearer %s' % session_key[0]}
 
-        return requests.post(url, json=data, headers=headers), session_key[0]
+        self.throttle('card-identifiers')
+        response = self.throttled(
+            'card-identifiers',
+            self.transport.post(url, json=data, headers=headers)
+        )
+
+        result = CardIdentifierResult.from_response(response)
+        result.merchant_session_key = session_key[0]
+        return result
 
     def get_3d_secure_status(self, transaction_id, data):
         url = '%s/transactions/%s/3d-secure' % (self.api_url(), transaction_id)
 
-        return requests.post(url, json=data, auth=self.basic_auth())
+        self.throttle('3d-secure')
+        return TransactionResult.from_response(self.throttled(
+            '3d-secure',
+            self.transport.post(url, json=data, auth=self.basic_auth())
+        ))
+
+    def complete_3d_secure_challenge(self, transaction_id, data):
+        url = '%s/transactions/%s/3d-secure-challenge' % (self.api_url(), transaction_id)
+
+        self.throttle('3d-secure')
+        return TransactionResult.from_response(self.throttled(
+            '3d-secure',
+            self.transport.post(url, json=data, auth=self.basic_auth())
+        ))
 
     def get_transaction_outcome(self, transaction_id):
         url = '%s/transactions/%s' % (self.api_url(), transaction_id)
 
-        return requests.get(url, auth=self.basic_auth())
+        self.throttle('transaction-outcome')
+        return TransactionResult.from_response(self.throttled(
+            'transaction-outcome',
+            self.transport.get(url, auth=self.basic_auth())
+        ))
 
     def submit_transaction(self, data):
         url = '%s/transactions' % self.api_url()
 
-        return requests.post(url, json=data, auth=self.basic_auth())
+        self.throttle('transactions')
+        return TransactionResult.from_response(self.throttled(
+            'transactions',
+            self.transport.post(url, json=data, auth=self.basic_auth())
+        ))
 
     def submit_transaction_instruction(self, transaction_id, data):
         url = '%s/transactions/%s/instructions' % (self.api_url(), transaction_id)
 
-        return requests.post(url, json=data, auth=self.basic_auth())
+        self.throttle('instructions')
+        return InstructionResult.from_response(self.throttled(
+            'instructions',
+            self.transport.post(url, json=data, auth=self.basic_auth())
+        ))
 
 
 default_gateway = SagepayGateway()
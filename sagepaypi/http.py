@@ -0,0 +1,136 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.urls import get_script_prefix, get_urlconf, reverse
+from django.utils.encoding import force_str
+from django.utils.html import format_html
+from django.utils.translation import gettext_lazy as _
+
+from sagepaypi.conf import get_setting
+
+
+# placeholders reversed into the TermUrl path, swapped for the tokens of each transaction
+TIDB64_PLACEHOLDER = 'sagepaypi-tidb64'
+TOKEN_PLACEHOLDER = 'sagepaypi-token'
+
+SECURE_REDIRECT_HTML = (
+    '<!DOCTYPE html>'
+    '<html>'
+    '<head><title>{}</title></head>'
+    '<body onload="document.getElementById(\'pa-form\').submit()">'
+    '<form id="pa-form" method="post" action="{}">'
+    '<input type="hidden" name="PaReq" value="{}">'
+    '<input type="hidden" name="TermUrl" value="{}">'
+    '<input type="hidden" name="MD" value="{}">'
+    '<noscript><button type="submit">{}</button></noscript>'
+    '</form>'
+    '</body>'
+    '</html>'
+)
+
+
+SECURE_CHALLENGE_HTML = (
+    '<!DOCTYPE html>'
+    '<html>'
+    '<head><title>{}</title></head>'
+    '<body onload="document.getElementById(\'challenge-form\').submit()">'
+    '<form id="challenge-form" method="post" action="{}">'
+    '<input type="hidden" name="creq" value="{}">'
+    '<input type="hidden" name="threeDSSessionData" value="{}">'
+    '<noscript><button type="submit">{}</button></noscript>'
+    '</form>'
+    '</body>'
+    '</html>'
+)
+
+
+@lru_cache(maxsize=None)
+def term_path_format(urlconf, script_prefix):
+    """
+    The path of the complete 3-D Secure view with placeholders for the tokens, reversed
+    once for each urlconf and script prefix.
+    """
+
+    return reverse(
+        'sagepaypi:complete_3d_secure',
+        urlconf=urlconf,
+        kwargs={'tidb64': TIDB64_PLACEHOLDER, 'token': TOKEN_PLACEHOLDER}
+    )
+
+
+def get_term_url(request, transaction):
+    """
+    The TermUrl Sage Pay redirects back to after the 3-D Secure authentication.
+    """
+
+    tidb64, token = transaction.get_tokens()
+    path = term_path_format(get_urlconf(), get_script_prefix())
+    path = path.replace(TIDB64_PLACEHOLDER, force_str(tidb64)).replace(TOKEN_PLACEHOLDER, token)
+    return request.build_absolute_uri(path)
+
+
+def get_strong_customer_authentication(request, **kwargs):
+    """
+    The strong customer authentication details of the customer's browser for 3-D Secure 2,
+    set them on the transaction before it is submitted, ie::
+
+        transaction.strong_customer_authentication = get_strong_customer_authentication(request)
+        transaction.submit_transaction()
+
+    :param request: the request of the customer paying.
+    :param kwargs: details to add or override, ie those collected with javascript
+        ``browserJavascriptEnabled=True, browserColorDepth='24', browserScreenHeight='1080'``...
+
+    :returns: dict to send as the ``strongCustomerAuthentication`` of the transaction.
+    """
+
+    language = request.META.get('HTTP_ACCEPT_LANGUAGE', '').split(',')[0].split(';')[0].strip()
+
+    data = {
+        'notificationURL': request.build_absolute_uri(reverse('sagepaypi:complete_3d_secure_challenge')),
+        'browserIP': request.META.get('REMOTE_ADDR'),
+        'browserAcceptHeader': request.META.get('HTTP_ACCEPT') or 'text/html',
+        'browserJavascriptEnabled': False,
+        'browserLanguage': language or settings.LANGUAGE_CODE,
+        'browserUserAgent': request.META.get('HTTP_USER_AGENT', ''),
+        'challengeWindowSize': get_setting('CHALLENGE_WINDOW_SIZE'),
+        'transType': 'GoodsAndServicePurchase',
+    }
+    data.update(kwargs)
+    return data
+
+
+class SecureRedirectResponse(HttpResponse):
+    """
+    A page that posts the transaction to the 3-D Secure ``acs_url`` as soon as it loads,
+    built without the template engine. The creq is posted for a 3-D Secure 2 challenge,
+    otherwise the pareq, ie::
+
+        transaction.submit_transaction()
+
+        if transaction.requires_3d_secure:
+            return SecureRedirectResponse(request, transaction)
+    """
+
+    def __init__(self, request, transaction, *args, **kwargs):
+        if transaction.creq:
+            content = format_html(
+                SECURE_CHALLENGE_HTML,
+                _('Redirecting to 3-D Secure'),
+                transaction.acs_url,
+                transaction.creq,
+                transaction.get_3d_secure_session_data(),
+                _('Continue')
+            )
+        else:
+            content = format_html(
+                SECURE_REDIRECT_HTML,
+                _('Redirecting to 3-D Secure'),
+                transaction.acs_url,
+                transaction.pareq,
+                get_term_url(request, transaction),
+                transaction.transaction_id,
+                _('Continue')
+            )
+        super().__init__(content, *args, **kwargs)
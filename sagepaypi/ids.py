@@ -0,0 +1,63 @@
+import secrets
+import threading
+import time
+import uuid
+from functools import lru_cache
+
+from django.utils.module_loading import import_string
+
+from sagepaypi.conf import get_setting
+
+
+_uuid7_lock = threading.Lock()
+_uuid7_last = [0, 0]
+
+
+def uuid7():
+    """
+    A time ordered UUID, version 7 of RFC 9562, the unix time in milliseconds followed by random bits.
+
+    New rows keyed by these land next to each other at the end of an index rather than at random
+    positions in it. UUIDs made by the process within the same millisecond are ordered by a counter
+    in the 12 bits after the time.
+    """
+
+    with _uuid7_lock:
+        ms = time.time_ns() // 1000000
+        if ms > _uuid7_last[0]:
+            # the counter starts at a random value with room to count up
+            _uuid7_last[:] = [ms, secrets.randbits(11)]
+        else:
+            _uuid7_last[1] += 1
+            if _uuid7_last[1] > 0xfff:
+                _uuid7_last[:] = [_uuid7_last[0] + 1, secrets.randbits(11)]
+        ms, counter = _uuid7_last
+
+    return uuid.UUID(int=(
+        (ms & 0xffffffffffff) << 80 |
+        0x7 << 76 |
+        counter << 64 |
+        0b10 << 62 |
+        secrets.randbits(62)
+    ))
+
+
+@lru_cache()
+def _get_generator(path):
+    return import_string(path)
+
+
+def generate_id():
+    """
+    The id of a new transaction or card identifier, made by ``SAGEPAYPI_ID_GENERATOR``.
+    """
+
+    return _get_generator(get_setting('ID_GENERATOR'))()
+
+
+def generate_vendor_tx_code():
+    """
+    The vendor tx code of a new transaction, made by ``SAGEPAYPI_ID_GENERATOR``.
+    """
+
+    return str(generate_id())
@@ -0,0 +1,90 @@
+import json
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+from sagepaypi.conf import get_setting
+
+
+class RawJSON(dict):
+    """
+    A decoded json object that keeps the bytes it was decoded from in ``raw``,
+    so it can be stored without being encoded again. It should not be changed.
+    """
+
+    def __init__(self, data, raw):
+        super().__init__(data)
+        self.raw = raw
+
+
+class JSONCodec:
+    """
+    Encodes and decodes json with the standard library.
+    """
+
+    def dumps(self, obj):
+        """
+        :returns: bytes.
+        """
+        return json.dumps(obj, cls=DjangoJSONEncoder, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    """
+    Encodes and decodes json with ``orjson``, anything it cannot encode is encoded as ``DjangoJSONEncoder`` would.
+    """
+
+    def __init__(self):
+        try:
+            import orjson
+        except ImportError:
+            raise ImproperlyConfigured('OrjsonCodec requires orjson, pip install orjson')
+
+        self.orjson = orjson
+        self.default = DjangoJSONEncoder().default
+
+    def dumps(self, obj):
+        return self.orjson.dumps(obj, default=self.default)
+
+    def loads(self, data):
+        return self.orjson.loads(data)
+
+
+_codecs = {}
+_codecs_lock = threading.Lock()
+
+
+def get_codec():
+    """
+    The codec set by ``SAGEPAYPI_JSON_CODEC``, by default ``OrjsonCodec`` when orjson is installed
+    falling back to ``JSONCodec``.
+    """
+
+    path = get_setting('JSON_CODEC')
+
+    with _codecs_lock:
+        if path not in _codecs:
+            if path:
+                _codecs[path] = import_string(path)()
+            else:
+                try:
+                    _codecs[path] = OrjsonCodec()
+                except ImproperlyConfigured:
+                    _codecs[path] = JSONCodec()
+        return _codecs[path]
+
+
+def loads_raw(content):
+    """
+    Decode the content of a response, an object keeps the content as ``RawJSON``.
+    """
+
+    data = get_codec().loads(content)
+    if isinstance(data, dict):
+        return RawJSON(data, content)
+    return data
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sagepaypi.archive import archive_cutoff
+from sagepaypi.models import Transaction
+
+
+class Command(BaseCommand):
+    help = (
+        'Move settled transactions older than SAGEPAYPI_ARCHIVE_AFTER_DAYS and their responses into the archive, '
+        'an interrupted run is resumed by running it again.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Archive transactions older than this many days.')
+        parser.add_argument('--batch-size', type=int, help='The number of transactions archived at a time.')
+        parser.add_argument('--max-batches', type=int, help='Stop after this many batches.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report the transactions found.')
+
+    def handle(self, *args, **options):
+        try:
+            before = archive_cutoff(options['days'])
+        except ValueError as e:
+            raise CommandError(str(e).capitalize() + '.')
+
+        self.stdout.write('Archiving transactions created before %s' % before.date().isoformat())
+
+        if options['dry_run']:
+            self.stdout.write('Transactions to archive: %s' % Transaction.objects.archivable(before).count())
+            return
+
+        archived = Transaction.objects.archive(
+            before=before,
+            batch_size=options['batch_size'],
+            max_batches=options['max_batches']
+        )
+
+        self.stdout.write('Transactions archived: %s' % archived)
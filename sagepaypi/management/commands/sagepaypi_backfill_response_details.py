@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from sagepaypi.backfill import backfill_response_details
+
+
+class Command(BaseCommand):
+    help = (
+        'Set the AVS/CVC status, 3-D Secure status, bank response code and card of transactions '
+        'from their responses, in batches. An interrupted run is resumed with --after.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--after', help='Start after the transaction with this id.')
+        parser.add_argument('--batch-size', type=int, help='The number of transactions updated at a time.')
+        parser.add_argument('--max-batches', type=int, help='Stop after this many batches.')
+
+    def handle(self, *args, **options):
+        updated, last_pk = backfill_response_details(
+            after=options['after'],
+            batch_size=options['batch_size'],
+            max_batches=options['max_batches']
+        )
+
+        self.stdout.write('Transactions updated: %s' % updated)
+        if last_pk is not None:
+            self.stdout.write('Last transaction: %s' % last_pk)
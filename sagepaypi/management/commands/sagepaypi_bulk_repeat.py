@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sagepaypi.models import Transaction
+
+
+class Command(BaseCommand):
+    help = 'Repeat many transactions on Sage Pay, running again with the same --run-key resumes the run.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('transaction_ids', nargs='*', help='The ids of the transactions to repeat.')
+        parser.add_argument('--file', help='A file of transaction ids to repeat, one per line.')
+        parser.add_argument('--run-key', help='A unique key for the run, used to resume it.')
+        parser.add_argument('--amount', type=int, help='The amount of each repeat.')
+        parser.add_argument('--description', help='The description of each repeat.')
+        parser.add_argument('--workers', type=int, help='The number of concurrent calls made to Sage Pay.')
+        parser.add_argument('--rate', type=float, help='The max number of calls per second made to Sage Pay.')
+        parser.add_argument('--batch-size', type=int, help='The number of rows inserted or updated at a time.')
+
+    def handle(self, *args, **options):
+        ids = list(options['transaction_ids'])
+
+        if options['file']:
+            with open(options['file']) as f:
+                ids.extend(line.strip() for line in f if line.strip())
+
+        if not ids:
+            raise CommandError('No transactions to repeat.')
+
+        kwargs = {}
+        if options['amount']:
+            kwargs['amount'] = options['amount']
+        if options['description']:
+            kwargs['description'] = options['description']
+
+        originals = Transaction.objects.filter(pk__in=ids).order_by('created_at')
+
+        result = Transaction.objects.bulk_repeat(
+            originals,
+            run_key=options['run_key'],
+            max_workers=options['workers'],
+            rate=options['rate'],
+            batch_size=options['batch_size'],
+            **kwargs
+        )
+
+        self.stdout.write('Run key: %s' % result.run_key)
+        self.stdout.write(
+            'Repeats: %s, successful: %s, unsuccessful: %s, errors: %s, unknown: %s' % (
+                len(result.transactions),
+                len(result.successful),
+                len(result.unsuccessful),
+                len(result.errors),
+                len(result.unknown)
+            )
+        )
+
+        for obj, message in result.errors:
+            self.stderr.write('%s: %s' % (obj.pk, message))
+
+        for obj, message in result.unknown:
+            self.stderr.write('%s: unknown, check on MySagePay: %s' % (obj.pk, message))
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sagepaypi.bulk import bulk_instruct
+from sagepaypi.conf import get_setting
+from sagepaypi.models import Transaction
+
+
+class Command(BaseCommand):
+    help = (
+        'Find deferred transactions that Sage Pay will soon auto abort and release or abort them '
+        'as configured by SAGEPAYPI_DEFERRED_EXPIRY_POLICY.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Find transactions that expire within this many days.')
+        parser.add_argument(
+            '--policy',
+            choices=['release', 'abort', 'none'],
+            help='Release or abort the transactions found, "none" only reports them.'
+        )
+        parser.add_argument('--workers', type=int, help='The number of concurrent calls made to Sage Pay.')
+        parser.add_argument('--rate', type=float, help='The max number of calls per second made to Sage Pay.')
+        parser.add_argument('--batch-size', type=int, help='The number of rows updated at a time.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report the transactions found.')
+
+    def handle(self, *args, **options):
+        days = options['days'] or get_setting('DEFERRED_EXPIRY_DAYS')
+        policy = options['policy'] or get_setting('DEFERRED_EXPIRY_POLICY') or 'none'
+
+        if policy not in ['release', 'abort', 'none']:
+            raise CommandError('Unknown policy "%s".' % policy)
+
+        transactions = list(Transaction.objects.deferred_expiring(days).order_by('created_at'))
+
+        self.stdout.write('Deferred transactions expiring within %s days: %s' % (days, len(transactions)))
+
+        if options['verbosity'] > 1:
+            for obj in transactions:
+                self.stdout.write('%s created %s' % (obj.pk, obj.created_at.isoformat()))
+
+        if options['dry_run'] or policy == 'none' or not transactions:
+            return
+
+        result = bulk_instruct(
+            transactions,
+            policy,
+            max_workers=options['workers'],
+            rate=options['rate'],
+            batch_size=options['batch_size']
+        )
+
+        instructed = [obj for obj in result.transactions if obj.instruction == policy]
+
+        self.stdout.write(
+            'Policy: %s, instructed: %s, failed: %s, errors: %s' % (
+                policy,
+                len(instructed),
+                len(result.transactions) - len(instructed),
+                len(result.errors)
+            )
+        )
+
+        for obj, message in result.errors:
+            self.stderr.write('%s: %s' % (obj.pk, message))
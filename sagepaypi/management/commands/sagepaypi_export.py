@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from sagepaypi.export import export_transactions, FORMATS
+from sagepaypi.models import Transaction
+from sagepaypi.routers import get_replica
+
+
+def parse_date(value):
+    """
+    Midnight of the date in the current time zone, so the rows are filtered on the index of created_at.
+    """
+
+    try:
+        return timezone.make_aware(datetime.strptime(value, '%Y-%m-%d'))
+    except ValueError:
+        raise CommandError('Invalid date "%s", use the format YYYY-MM-DD.' % value)
+
+
+class Command(BaseCommand):
+    help = 'Export transactions as csv or json lines, streamed with constant memory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=FORMATS, default='csv', help='The format of the export.')
+        parser.add_argument('--since', help='Export transactions created on or after this date, YYYY-MM-DD.')
+        parser.add_argument('--until', help='Export transactions created before this date, YYYY-MM-DD.')
+        parser.add_argument('--include-response', action='store_true', help='Include the latest response.')
+        parser.add_argument('--chunk-size', type=int, help='The number of rows fetched at a time.')
+        parser.add_argument('--output', help='The file to write to, defaults to stdout.')
+
+    def handle(self, *args, **options):
+        queryset = Transaction.objects.using(get_replica()).order_by('created_at', 'pk')
+
+        if options['since']:
+            queryset = queryset.filter(created_at__gte=parse_date(options['since']))
+        if options['until']:
+            queryset = queryset.filter(created_at__lt=parse_date(options['until']))
+
+        lines = export_transactions(
+            queryset,
+            format=options['format'],
+            include_response=options['include_response'],
+            chunk_size=options['chunk_size']
+        )
+
+        if options['output']:
+            with open(options['output'], 'w', newline='') as f:
+                f.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from sagepaypi.bulk import poll_outcomes
+from sagepaypi.outcomes import is_terminal
+
+
+class Command(BaseCommand):
+    help = (
+        'Get the outcome of the transactions without a final status that are due to be polled, '
+        'backing off after each poll as configured by the SAGEPAYPI_OUTCOME_POLL settings.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, help='The max number of transactions polled.')
+        parser.add_argument('--workers', type=int, help='The number of concurrent calls made to Sage Pay.')
+        parser.add_argument('--rate', type=float, help='The max number of calls per second made to Sage Pay.')
+        parser.add_argument('--batch-size', type=int, help='The number of rows updated at a time.')
+
+    def handle(self, *args, **options):
+        result = poll_outcomes(
+            limit=options['limit'],
+            max_workers=options['workers'],
+            rate=options['rate'],
+            batch_size=options['batch_size']
+        )
+
+        final = [obj for obj in result.transactions if is_terminal(obj.status)]
+
+        self.stdout.write(
+            'Transactions polled: %s, final: %s, errors: %s' % (
+                len(result.transactions),
+                len(final),
+                len(result.errors)
+            )
+        )
+
+        for obj, message in result.errors:
+            self.stderr.write('%s: %s' % (obj.pk, message))
@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from sagepaypi.models import DailySummary
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError('Invalid date "%s", use the format YYYY-MM-DD.' % value)
+
+
+class Command(BaseCommand):
+    help = (
+        'Update the daily transaction summaries with the transactions updated since the last run, '
+        'or recalculate the summaries of a range of days.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Recalculate the summaries from this date, YYYY-MM-DD.')
+        parser.add_argument('--until', help='Recalculate the summaries up to and including this date, YYYY-MM-DD.')
+
+    def handle(self, *args, **options):
+        if not options['since']:
+            if options['until']:
+                raise CommandError('--until can only be used with --since.')
+
+            days = DailySummary.objects.refresh()
+            self.stdout.write('Days summarised: %s' % len(days))
+            return
+
+        since = parse_date(options['since'])
+        until = parse_date(options['until']) if options['until'] else timezone.localdate()
+
+        if until < since:
+            raise CommandError('--until must be on or after --since.')
+
+        days = [since + timedelta(days=i) for i in range((until - since).days + 1)]
+        DailySummary.objects.rebuild(days)
+
+        self.stdout.write('Days summarised: %s' % len(days))
@@ -0,0 +1,32 @@
+# Generated by Django 3.2.25 on 2026-10-19 12:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sagepaypi', '0004_alter_transactionresponse_data'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cardidentifier',
+            name='customer_reference',
+            field=models.CharField(blank=True, help_text='A reference to the customer in your system, used to look up their saved cards.', max_length=255, null=True, verbose_name='Customer reference'),
+        ),
+        migrations.AddField(
+            model_name='cardidentifier',
+            name='reusable',
+            field=models.BooleanField(default=False, help_text='Designates whether Sage Pay has saved the card identifier so it can be used for future transactions without entering the card details again.', verbose_name='Reusable'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='save_card',
+            field=models.BooleanField(default=False, help_text='Request Sage Pay to save the card identifier so it can be reused once the transaction is successful.', verbose_name='Save card'),
+        ),
+        migrations.AddIndex(
+            model_name='cardidentifier',
+            index=models.Index(fields=['customer_reference', 'reusable'], name='sagepaypi_card_customer_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-19 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sagepaypi', '0005_auto_20261019_0752'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('instruction__isnull', True), ('status_code', '0000'), ('type', 'Deferred')), fields=['created_at'], name='sagepaypi_deferred_pending_idx'),
+        ),
+    ]
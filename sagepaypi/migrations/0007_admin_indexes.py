@@ -0,0 +1,33 @@
+# Generated by Django 3.2.25 on 2026-10-19 13:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sagepaypi', '0006_transaction_sagepaypi_deferred_pending_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['created_at'], name='sagepaypi_tx_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['status', 'created_at'], name='sagepaypi_tx_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['type', 'created_at'], name='sagepaypi_tx_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['transaction_id'], name='sagepaypi_tx_sagepay_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transactionresponse',
+            index=models.Index(fields=['transaction', 'created_at'], name='sagepaypi_response_tx_idx'),
+        ),
+    ]
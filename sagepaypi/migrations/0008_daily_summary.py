@@ -0,0 +1,50 @@
+# Generated by Django 3.2.25 on 2026-10-19 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sagepaypi', '0007_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('currency', models.CharField(max_length=3, verbose_name='Currency')),
+                ('type', models.CharField(choices=[('Payment', 'Payment'), ('Deferred', 'Deferred'), ('Repeat', 'Repeat'), ('Refund', 'Refund')], max_length=8, verbose_name='Type')),
+                ('status_code', models.CharField(blank=True, help_text='The status code of the transactions, blank when they have not been submitted.', max_length=4, verbose_name='Status code')),
+                ('count', models.IntegerField(default=0, verbose_name='Count')),
+                ('amount', models.BigIntegerField(default=0, verbose_name='Amount')),
+                ('successful_count', models.IntegerField(default=0, verbose_name='Successful count')),
+                ('successful_amount', models.BigIntegerField(default=0, verbose_name='Successful amount')),
+                ('secure_count', models.IntegerField(default=0, help_text='The number of transactions with a 3-D Secure status.', verbose_name='3-D Secure count')),
+                ('secure_authenticated_count', models.IntegerField(default=0, verbose_name='3-D Secure authenticated count')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+            ],
+            options={
+                'verbose_name_plural': 'Daily summaries',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SummaryCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='Name')),
+                ('high_water_mark', models.DateTimeField(blank=True, help_text='Transactions updated up to this date have been summarised.', null=True, verbose_name='High water mark')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['updated_at'], name='sagepaypi_tx_updated_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailysummary',
+            constraint=models.UniqueConstraint(fields=('date', 'currency', 'type', 'status_code'), name='sagepaypi_daily_summary_unique'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 3.2.25 on 2026-10-19 13:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+import sagepaypi.models.archive
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sagepaypi', '0008_daily_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTransaction',
+            fields=[
+                ('id', models.UUIDField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(db_index=True, verbose_name='Created at')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Archived at')),
+                ('type', models.CharField(choices=[('Payment', 'Payment'), ('Deferred', 'Deferred'), ('Repeat', 'Repeat'), ('Refund', 'Refund')], max_length=8, verbose_name='Type')),
+                ('vendor_tx_code', models.CharField(db_index=True, max_length=40, verbose_name='Vendor tx code')),
+                ('amount', models.IntegerField(verbose_name='Amount')),
+                ('currency', models.CharField(max_length=3, verbose_name='Currency')),
+                ('status_code', models.CharField(blank=True, max_length=4, null=True, verbose_name='Status code')),
+                ('status', models.CharField(blank=True, max_length=50, null=True, verbose_name='Status')),
+                ('transaction_id', models.CharField(blank=True, db_index=True, max_length=36, null=True, verbose_name='Transaction id')),
+                ('card_identifier_id', models.UUIDField(db_index=True, verbose_name='Card identifier id')),
+                ('reference_transaction_id', models.UUIDField(blank=True, db_index=True, null=True, verbose_name='Reference transaction id')),
+                ('data', models.JSONField(encoder=sagepaypi.models.archive.ArchiveJSONEncoder, help_text='The fields of the transaction when it was archived.', verbose_name='Data')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedTransactionResponse',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(verbose_name='Created at')),
+                ('step', models.CharField(max_length=100, verbose_name='Step')),
+                ('status_code', models.IntegerField(null=True, verbose_name='Status code')),
+                ('data', models.JSONField(default=dict, verbose_name='Data')),
+                ('transaction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='responses', to='sagepaypi.archivedtransaction', verbose_name='Transaction')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.25 on 2026-10-19 13:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sagepaypi', '0009_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='creq',
+            field=models.TextField(blank=True, help_text='A Base64 encoded challenge request that needs to be passed to the issuing bank as part of the 3-D Secure 2 authentication.', null=True, verbose_name='Creq'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='cres',
+            field=models.TextField(blank=True, help_text='A Base64 encoded challenge response sent back by the issuing bank to the notification url at the end of the 3-D Secure 2 authentication.', null=True, verbose_name='Cres'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='strong_customer_authentication',
+            field=models.JSONField(blank=True, help_text='The browser details and notification url sent to Sage Pay for 3-D Secure 2.', null=True, verbose_name='Strong customer authentication'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.25 on 2026-10-19 13:19
+
+from django.db import migrations
+import sagepaypi.models.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sagepaypi', '0010_secure_challenge'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transactionresponse',
+            name='data',
+            field=sagepaypi.models.fields.CodecJSONField(default=dict, verbose_name='Data'),
+        ),
+    ]
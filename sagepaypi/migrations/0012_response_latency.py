@@ -0,0 +1,67 @@
+# Generated by Django 3.2.25 on 2026-10-19 13:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sagepaypi', '0011_codec_json_field'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedtransactionresponse',
+            name='duration',
+            field=models.FloatField(blank=True, null=True, verbose_name='Duration'),
+        ),
+        migrations.AddField(
+            model_name='archivedtransactionresponse',
+            name='request_size',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Request size'),
+        ),
+        migrations.AddField(
+            model_name='archivedtransactionresponse',
+            name='response_size',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Response size'),
+        ),
+        migrations.AddField(
+            model_name='archivedtransactionresponse',
+            name='retry_count',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Retry count'),
+        ),
+        migrations.AddField(
+            model_name='archivedtransactionresponse',
+            name='time_to_first_byte',
+            field=models.FloatField(blank=True, null=True, verbose_name='Time to first byte'),
+        ),
+        migrations.AddField(
+            model_name='transactionresponse',
+            name='duration',
+            field=models.FloatField(blank=True, help_text='The time taken by the call in milliseconds.', null=True, verbose_name='Duration'),
+        ),
+        migrations.AddField(
+            model_name='transactionresponse',
+            name='request_size',
+            field=models.PositiveIntegerField(blank=True, help_text='The size of the request body in bytes.', null=True, verbose_name='Request size'),
+        ),
+        migrations.AddField(
+            model_name='transactionresponse',
+            name='response_size',
+            field=models.PositiveIntegerField(blank=True, help_text='The size of the response body in bytes.', null=True, verbose_name='Response size'),
+        ),
+        migrations.AddField(
+            model_name='transactionresponse',
+            name='retry_count',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='The number of times the connection was retried.', null=True, verbose_name='Retry count'),
+        ),
+        migrations.AddField(
+            model_name='transactionresponse',
+            name='time_to_first_byte',
+            field=models.FloatField(blank=True, help_text='The time until the headers of the response were received in milliseconds.', null=True, verbose_name='Time to first byte'),
+        ),
+        migrations.AddIndex(
+            model_name='transactionresponse',
+            index=models.Index(fields=['created_at', 'step'], name='sagepaypi_response_created_idx'),
+        ),
+    ]
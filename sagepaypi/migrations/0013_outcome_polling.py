@@ -0,0 +1,27 @@
+# Generated by Django 3.2.25 on 2026-10-19 13:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sagepaypi', '0012_response_latency'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='next_outcome_poll_at',
+            field=models.DateTimeField(blank=True, help_text='When the outcome is next polled, empty once the transaction has a final status.', null=True, verbose_name='Next outcome poll at'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='outcome_polls',
+            field=models.PositiveIntegerField(default=0, help_text='The number of times the outcome has been looked up since the transaction was submitted.', verbose_name='Outcome polls'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('next_outcome_poll_at__isnull', False)), fields=['next_outcome_poll_at'], name='sagepaypi_tx_poll_idx'),
+        ),
+    ]
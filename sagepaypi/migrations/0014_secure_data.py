@@ -0,0 +1,28 @@
+# Generated by Django 3.2.25 on 2026-10-19 13:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sagepaypi', '0013_outcome_polling'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionSecureData',
+            fields=[
+                ('transaction', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='secure_data', serialize=False, to='sagepaypi.transaction', verbose_name='Transaction')),
+                ('pareq', models.TextField(blank=True, help_text='A Base64 encoded, encrypted message that contains the transaction details. This needs to be passed to the issuing bank as part of the 3-D Secure authentication.', null=True, verbose_name='Pareq')),
+                ('pares', models.TextField(blank=True, help_text='A Base64 encoded, encrypted message sent back by the issuing bank to your TermUrl at the end of the 3-D Secure authentication process.', null=True, verbose_name='Pares')),
+                ('creq', models.TextField(blank=True, help_text='A Base64 encoded challenge request that needs to be passed to the issuing bank as part of the 3-D Secure 2 authentication.', null=True, verbose_name='Creq')),
+                ('cres', models.TextField(blank=True, help_text='A Base64 encoded challenge response sent back by the issuing bank to the notification url at the end of the 3-D Secure 2 authentication.', null=True, verbose_name='Cres')),
+            ],
+            options={
+                'verbose_name': '3-D Secure data',
+                'verbose_name_plural': '3-D Secure data',
+            },
+        ),
+    ]
@@ -0,0 +1,71 @@
+from django.db import migrations, transaction
+
+
+FIELDS = ['pareq', 'pares', 'creq', 'cres']
+
+# transactions are moved in chunks, each in its own transaction so large tables are not locked throughout
+CHUNK_SIZE = 1000
+
+
+def chunks(queryset, fields):
+    """
+    The rows of the queryset in chunks ordered by the primary key, each chunk after the last
+    primary key of the previous one.
+    """
+
+    last_pk = None
+    while True:
+        chunk = queryset.order_by('pk')
+        if last_pk is not None:
+            chunk = chunk.filter(pk__gt=last_pk)
+        chunk = list(chunk.values_list('pk', *fields)[:CHUNK_SIZE])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1][0]
+
+
+def move_secure_data(apps, schema_editor):
+    Transaction = apps.get_model('sagepaypi', 'Transaction')
+    TransactionSecureData = apps.get_model('sagepaypi', 'TransactionSecureData')
+    db_alias = schema_editor.connection.alias
+
+    has_data = (
+        Transaction.objects.using(db_alias)
+        .exclude(pareq=None, pares=None, creq=None, cres=None)
+    )
+
+    for chunk in chunks(has_data, FIELDS):
+        with transaction.atomic(using=db_alias):
+            TransactionSecureData.objects.using(db_alias).bulk_create([
+                TransactionSecureData(transaction_id=pk, **dict(zip(FIELDS, values)))
+                for pk, *values in chunk
+            ], ignore_conflicts=True)
+            Transaction.objects.using(db_alias).filter(
+                pk__in=[row[0] for row in chunk]
+            ).update(**{field: None for field in FIELDS})
+
+
+def restore_secure_data(apps, schema_editor):
+    Transaction = apps.get_model('sagepaypi', 'Transaction')
+    TransactionSecureData = apps.get_model('sagepaypi', 'TransactionSecureData')
+    db_alias = schema_editor.connection.alias
+
+    for chunk in chunks(TransactionSecureData.objects.using(db_alias), FIELDS):
+        with transaction.atomic(using=db_alias):
+            for pk, *values in chunk:
+                Transaction.objects.using(db_alias).filter(pk=pk).update(**dict(zip(FIELDS, values)))
+            TransactionSecureData.objects.using(db_alias).filter(pk__in=[row[0] for row in chunk]).delete()
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('sagepaypi', '0014_secure_data'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_secure_data, restore_secure_data),
+    ]
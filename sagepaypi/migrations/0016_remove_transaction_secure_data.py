@@ -0,0 +1,27 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sagepaypi', '0015_move_secure_data'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='transaction',
+            name='creq',
+        ),
+        migrations.RemoveField(
+            model_name='transaction',
+            name='cres',
+        ),
+        migrations.RemoveField(
+            model_name='transaction',
+            name='pareq',
+        ),
+        migrations.RemoveField(
+            model_name='transaction',
+            name='pares',
+        ),
+    ]
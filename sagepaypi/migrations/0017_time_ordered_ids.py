@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-19 13:39
+
+from django.db import migrations, models
+import sagepaypi.ids
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sagepaypi', '0016_remove_transaction_secure_data'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cardidentifier',
+            name='id',
+            field=models.UUIDField(default=sagepaypi.ids.generate_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='id',
+            field=models.UUIDField(default=sagepaypi.ids.generate_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='vendor_tx_code',
+            field=models.CharField(default=sagepaypi.ids.generate_vendor_tx_code, help_text='The unique vendor tx code used for the transaction.', max_length=40, unique=True, verbose_name='Vendor tx code'),
+        ),
+    ]
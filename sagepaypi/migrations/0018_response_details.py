@@ -0,0 +1,53 @@
+# Generated by Django 3.2.25 on 2026-10-19 13:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sagepaypi', '0017_time_ordered_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='avs_cvc_status',
+            field=models.CharField(blank=True, help_text='The result of the address and security code checks, e.g "AllMatched".', max_length=30, null=True, verbose_name='AVS/CVC status'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='bank_response_code',
+            field=models.CharField(blank=True, help_text='The response code from the bank, e.g "00".', max_length=10, null=True, verbose_name='Bank response code'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='card_last_four',
+            field=models.CharField(blank=True, help_text='The last four digits of the card used for the transaction.', max_length=4, null=True, verbose_name='Card last four'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='card_type',
+            field=models.CharField(blank=True, help_text='The type of card used for the transaction, e.g "Visa".', max_length=30, null=True, verbose_name='Card type'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['avs_cvc_status', 'created_at'], name='sagepaypi_tx_avs_cvc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['secure_status', 'created_at'], name='sagepaypi_tx_secure_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['bank_response_code', 'created_at'], name='sagepaypi_tx_bank_code_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['card_type', 'created_at'], name='sagepaypi_tx_card_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['card_last_four'], name='sagepaypi_tx_last_four_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.25 on 2026-10-19 13:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sagepaypi', '0018_response_details'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='sagepaypi_tx_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='cardidentifier',
+            index=models.Index(fields=['created_at', 'id'], name='sagepaypi_card_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['created_at', 'id'], name='sagepaypi_tx_created_idx'),
+        ),
+    ]
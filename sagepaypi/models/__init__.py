@@ -1,2 +1,4 @@
+from .archive import ArchivedTransaction, ArchivedTransactionResponse
 from .card_identifier import CardIdentifier
-from .transaction import Transaction, TransactionResponse
+from .summary import DailySummary, SummaryCheckpoint
+from .transaction import Transaction, TransactionResponse, TransactionSecureData
@@ -0,0 +1,234 @@
+from datetime import datetime, time
+
+from django.core import serializers
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from sagepaypi.conf import get_setting
+from sagepaypi.constants import TRANSACTION_TYPE_CHOICES
+
+
+class ArchiveJSONEncoder(DjangoJSONEncoder):
+    """
+    JSON encoder that keeps the microseconds of dates, so archived transactions are rebuilt as they were.
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime, time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class ArchiveManager(models.Manager):
+    """ Manager of the archive database, set by ``SAGEPAYPI_ARCHIVE_DATABASE`` """
+
+    def get_queryset(self):
+        return super().get_queryset().using(get_setting('ARCHIVE_DATABASE'))
+
+
+class ArchivedTransactionQuerySet(models.QuerySet):
+    """ Custom queryset """
+
+    def archive(self, transactions, responses):
+        """
+        Copy transactions and their responses into the archive, anything already archived is left as is.
+        """
+
+        data = serializers.serialize('python', transactions)
+
+        archived = [
+            ArchivedTransaction(
+                id=obj.pk,
+                created_at=obj.created_at,
+                type=obj.type,
+                vendor_tx_code=obj.vendor_tx_code,
+                amount=obj.amount,
+                currency=obj.currency,
+                status_code=obj.status_code,
+                status=obj.status,
+                transaction_id=obj.transaction_id,
+                card_identifier_id=obj.card_identifier_id,
+                reference_transaction_id=obj.reference_transaction_id,
+                data=row['fields']
+            )
+            for obj, row in zip(transactions, data)
+        ]
+
+        archived_responses = [
+            ArchivedTransactionResponse(
+                id=obj.pk,
+                transaction_id=obj.transaction_id,
+                created_at=obj.created_at,
+                step=obj.step,
+                status_code=obj.status_code,
+                data=obj.data,
+                duration=obj.duration,
+                time_to_first_byte=obj.time_to_first_byte,
+                retry_count=obj.retry_count,
+                request_size=obj.request_size,
+                response_size=obj.response_size
+            )
+            for obj in responses
+        ]
+
+        self.bulk_create(archived, ignore_conflicts=True)
+        ArchivedTransactionResponse.objects.bulk_create(archived_responses, ignore_conflicts=True)
+
+    def get_transaction(self, pk):
+        """
+        The archived transaction as a ``Transaction``, or ``None`` when it has not been archived.
+        """
+
+        archived = self.filter(pk=pk).first()
+        return archived.to_transaction() if archived else None
+
+
+class ArchivedTransactionManager(ArchiveManager.from_queryset(ArchivedTransactionQuerySet)):
+    """ Custom manager """
+
+
+class ArchivedTransaction(models.Model):
+    """
+    A transaction moved out of the ``Transaction`` table by ``sagepaypi_archive``.
+
+    The fields used to find a transaction are columns, the whole transaction is kept in ``data``
+    so the archive does not need to change when fields are added to ``Transaction``.
+    """
+
+    id = models.UUIDField(
+        primary_key=True
+    )
+    created_at = models.DateTimeField(
+        _('Created at'),
+        db_index=True
+    )
+    archived_at = models.DateTimeField(
+        _('Archived at'),
+        auto_now_add=True
+    )
+    type = models.CharField(
+        _('Type'),
+        max_length=8,
+        choices=TRANSACTION_TYPE_CHOICES
+    )
+    vendor_tx_code = models.CharField(
+        _('Vendor tx code'),
+        max_length=40,
+        db_index=True
+    )
+    amount = models.IntegerField(
+        _('Amount')
+    )
+    currency = models.CharField(
+        _('Currency'),
+        max_length=3
+    )
+    status_code = models.CharField(
+        _('Status code'),
+        max_length=4,
+        null=True,
+        blank=True
+    )
+    status = models.CharField(
+        _('Status'),
+        max_length=50,
+        null=True,
+        blank=True
+    )
+    transaction_id = models.CharField(
+        _('Transaction id'),
+        max_length=36,
+        null=True,
+        blank=True,
+        db_index=True
+    )
+    card_identifier_id = models.UUIDField(
+        _('Card identifier id'),
+        db_index=True
+    )
+    reference_transaction_id = models.UUIDField(
+        _('Reference transaction id'),
+        null=True,
+        blank=True,
+        db_index=True
+    )
+    data = models.JSONField(
+        _('Data'),
+        encoder=ArchiveJSONEncoder,
+        help_text=_('The fields of the transaction when it was archived.')
+    )
+
+    objects = ArchivedTransactionManager()
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return str(self.pk)
+
+    def to_transaction(self):
+        """
+        Rebuild the ``Transaction``, fields that no longer exist are ignored.
+        """
+
+        row = {'model': 'sagepaypi.transaction', 'pk': str(self.pk), 'fields': self.data}
+        deserialized = next(serializers.deserialize('python', [row], ignorenonexistent=True))
+        return deserialized.object
+
+
+class ArchivedTransactionResponse(models.Model):
+    id = models.IntegerField(
+        primary_key=True
+    )
+    transaction = models.ForeignKey(
+        'sagepaypi.ArchivedTransaction',
+        verbose_name=_('Transaction'),
+        on_delete=models.CASCADE,
+        related_name='responses'
+    )
+    created_at = models.DateTimeField(
+        _('Created at')
+    )
+    step = models.CharField(
+        _('Step'),
+        max_length=100
+    )
+    status_code = models.IntegerField(
+        _('Status code'),
+        null=True
+    )
+    data = models.JSONField(
+        _('Data'),
+        default=dict
+    )
+    duration = models.FloatField(
+        _('Duration'),
+        null=True,
+        blank=True
+    )
+    time_to_first_byte = models.FloatField(
+        _('Time to first byte'),
+        null=True,
+        blank=True
+    )
+    retry_count = models.PositiveSmallIntegerField(
+        _('Retry count'),
+        null=True,
+        blank=True
+    )
+    request_size = models.PositiveIntegerField(
+        _('Request size'),
+        null=True,
+        blank=True
+    )
+    response_size = models.PositiveIntegerField(
+        _('Response size'),
+        null=True,
+        blank=True
+    )
+
+    objects = ArchiveManager()
+
+    class Meta:
+        ordering = ['-created_at']
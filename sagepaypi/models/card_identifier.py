@@ -1,13 +1,40 @@
-import uuid
-
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.manager import BaseManager
 from django.utils.translation import gettext_lazy as _
 
+from sagepaypi.ids import generate_id
+
+
+class CardIdentifierQuerySet(models.QuerySet):
+    """ Custom queryset """
+
+    def reusable(self):
+        """
+        Card identifiers that have been saved by Sage Pay and can be used again.
+        """
+        return self.filter(reusable=True)
+
+    def for_customer(self, customer_reference):
+        """
+        Card identifiers that belong to the given customer reference.
+        """
+        return self.filter(customer_reference=customer_reference)
+
+
+class CardIdentifierManager(BaseManager.from_queryset(CardIdentifierQuerySet)):
+    """ Custom manager """
+
+    def saved_cards(self, customer_reference):
+        """
+        The reusable card identifiers of a customer, most recent first.
+        """
+        return self.reusable().for_customer(customer_reference).order_by('-created_at')
+
 
 class CardIdentifier(models.Model):
     id = models.UUIDField(
-        default=uuid.uuid4,
+        default=generate_id,
         editable=False,
         primary_key=True
     )
@@ -89,6 +116,30 @@ class CardIdentifier(models.Model):
             'before the card identifier becomes invalid.'
         )
     )
+    reusable = models.BooleanField(
+        _('Reusable'),
+        default=False,
+        help_text=_(
+            'Designates whether Sage Pay has saved the card identifier so it can be used '
+            'for future transactions without entering the card details again.'
+        )
+    )
+    customer_reference = models.CharField(
+        _('Customer reference'),
+        max_length=255,
+        null=True,
+        blank=True,
+        help_text=_('A reference to the customer in your system, used to look up their saved cards.')
+    )
+
+    objects = CardIdentifierManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['customer_reference', 'reusable'], name='sagepaypi_card_customer_idx'),
+            # the pages of the json api
+            models.Index(fields=['created_at', 'id'], name='sagepaypi_card_created_idx')
+        ]
 
     def __str__(self):
         return str(self.pk)
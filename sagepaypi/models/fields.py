@@ -0,0 +1,28 @@
+from django.db import models
+from django.db.models.fields.json import KeyTransform
+from django.utils.encoding import force_str
+
+from sagepaypi.jsoncodec import get_codec, RawJSON
+
+
+class CodecJSONField(models.JSONField):
+    """
+    A ``JSONField`` encoded and decoded by the json codec, ``RawJSON`` is stored as it was received.
+    """
+
+    def get_prep_value(self, value):
+        if value is None:
+            return value
+        if isinstance(value, RawJSON):
+            return force_str(value.raw)
+        return get_codec().dumps(value).decode('utf-8')
+
+    def from_db_value(self, value, expression, connection):
+        if value is None or not isinstance(value, (str, bytes)):
+            return value
+        if isinstance(expression, KeyTransform):
+            return super().from_db_value(value, expression, connection)
+        try:
+            return get_codec().loads(value)
+        except ValueError:
+            return value
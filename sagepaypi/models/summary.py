@@ -0,0 +1,266 @@
+from datetime import datetime, time, timedelta
+
+from django.db import models, transaction as db_transaction
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.db.models.manager import BaseManager
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from sagepaypi.conf import get_setting
+from sagepaypi.constants import TRANSACTION_TYPE_CHOICES
+
+
+# the totals summed by the summary queries
+SUMMARY_TOTALS = [
+    'count',
+    'amount',
+    'successful_count',
+    'successful_amount',
+    'secure_count',
+    'secure_authenticated_count',
+]
+
+
+def day_range(day):
+    """
+    The start and end of a day in the current timezone.
+    """
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def summed():
+    """
+    The sums of the totals, prefixed as annotations cannot share the names of the fields.
+    """
+    return {'sum_%s' % name: Coalesce(Sum(name), 0) for name in SUMMARY_TOTALS}
+
+
+def with_rates(row):
+    """
+    Remove the prefix of the sums and add the success and 3-D Secure authentication rates.
+    """
+
+    for name in SUMMARY_TOTALS:
+        row[name] = row.pop('sum_%s' % name)
+
+    row['success_rate'] = row['successful_count'] / row['count'] if row['count'] else None
+    row['secure_rate'] = row['secure_authenticated_count'] / row['secure_count'] if row['secure_count'] else None
+    return row
+
+
+class DailySummaryQuerySet(models.QuerySet):
+    """ Custom queryset """
+
+    def between(self, start, end):
+        """
+        Summaries of the days from ``start`` up to and including ``end``.
+        """
+        return self.filter(date__gte=start, date__lte=end)
+
+    def totals_by(self, *fields):
+        """
+        The totals grouped by the given fields, ie ``'date'`` or ``'currency', 'type'``,
+        with the success and 3-D Secure authentication rates of each group.
+
+        :returns: list of dicts.
+        """
+
+        rows = (
+            self.order_by(*fields)
+            .values(*fields)
+            .annotate(**summed())
+        )
+        return [with_rates(row) for row in rows]
+
+    def totals(self):
+        """
+        The totals of the summaries with the success and 3-D Secure authentication rates.
+
+        :returns: dict.
+        """
+
+        return with_rates(self.aggregate(**summed()))
+
+
+class DailySummaryManager(BaseManager.from_queryset(DailySummaryQuerySet)):
+    """ Custom manager """
+
+    def rebuild(self, days):
+        """
+        Recalculate the summaries of the given days from the transactions.
+
+        The transactions of each day are grouped in the database using the created at
+        index and the summaries of the days are replaced in a single database transaction.
+        """
+
+        from sagepaypi.models import Transaction
+
+        days = sorted(set(days))
+        if not days:
+            return
+
+        in_days = Q()
+        for day in days:
+            start, end = day_range(day)
+            in_days |= Q(created_at__gte=start, created_at__lt=end)
+
+        rows = (
+            Transaction.objects
+            .filter(in_days)
+            .order_by()
+            .values(
+                'currency',
+                'type',
+                day=TruncDate('created_at'),
+                code=Coalesce('status_code', Value(''))
+            )
+            .annotate(
+                sum_count=Count('pk'),
+                sum_amount=Sum('amount'),
+                sum_successful_count=Count('pk', filter=Q(status_code='0000')),
+                sum_successful_amount=Coalesce(Sum('amount', filter=Q(status_code='0000')), 0),
+                sum_secure_count=Count('pk', filter=Q(secure_status__isnull=False)),
+                sum_secure_authenticated_count=Count('pk', filter=Q(secure_status='Authenticated')),
+            )
+        )
+
+        summaries = [
+            DailySummary(
+                date=row['day'],
+                currency=row['currency'],
+                type=row['type'],
+                status_code=row['code'],
+                **{name: row['sum_%s' % name] for name in SUMMARY_TOTALS}
+            )
+            for row in rows
+        ]
+
+        with db_transaction.atomic():
+            self.filter(date__in=days).delete()
+            self.bulk_create(summaries, batch_size=get_setting('BULK_BATCH_SIZE'))
+
+    def refresh(self, now=None):
+        """
+        Bring the summaries up to date with the transactions updated since the last refresh.
+
+        Only the days of the transactions updated after the high water mark are recalculated.
+        Transactions updated within ``SAGEPAYPI_SUMMARY_LAG`` seconds are left for the next
+        refresh, so changes that have not been committed yet are not missed.
+
+        :returns: the days recalculated.
+        """
+
+        from sagepaypi.models import Transaction
+
+        now = now or timezone.now()
+        high_water_mark = now - timedelta(seconds=get_setting('SUMMARY_LAG'))
+
+        with db_transaction.atomic():
+            checkpoint, created = SummaryCheckpoint.objects.select_for_update().get_or_create(
+                name=SummaryCheckpoint.DAILY_SUMMARY
+            )
+
+            updated = Transaction.objects.filter(updated_at__lte=high_water_mark)
+            if checkpoint.high_water_mark:
+                updated = updated.filter(updated_at__gt=checkpoint.high_water_mark)
+
+            days = list(
+                updated
+                .order_by()
+                .annotate(day=TruncDate('created_at'))
+                .values_list('day', flat=True)
+                .distinct()
+            )
+
+            self.rebuild(days)
+
+            checkpoint.high_water_mark = high_water_mark
+            checkpoint.save()
+
+        return sorted(days)
+
+
+class DailySummary(models.Model):
+    date = models.DateField(
+        _('Date')
+    )
+    currency = models.CharField(
+        _('Currency'),
+        max_length=3
+    )
+    type = models.CharField(
+        _('Type'),
+        max_length=8,
+        choices=TRANSACTION_TYPE_CHOICES
+    )
+    status_code = models.CharField(
+        _('Status code'),
+        max_length=4,
+        blank=True,
+        help_text=_('The status code of the transactions, blank when they have not been submitted.')
+    )
+    count = models.IntegerField(
+        _('Count'),
+        default=0
+    )
+    amount = models.BigIntegerField(
+        _('Amount'),
+        default=0
+    )
+    successful_count = models.IntegerField(
+        _('Successful count'),
+        default=0
+    )
+    successful_amount = models.BigIntegerField(
+        _('Successful amount'),
+        default=0
+    )
+    secure_count = models.IntegerField(
+        _('3-D Secure count'),
+        default=0,
+        help_text=_('The number of transactions with a 3-D Secure status.')
+    )
+    secure_authenticated_count = models.IntegerField(
+        _('3-D Secure authenticated count'),
+        default=0
+    )
+    updated_at = models.DateTimeField(
+        _('Updated at'),
+        auto_now=True
+    )
+
+    objects = DailySummaryManager()
+
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'currency', 'type', 'status_code'],
+                name='sagepaypi_daily_summary_unique'
+            )
+        ]
+        verbose_name_plural = _('Daily summaries')
+
+    def __str__(self):
+        return '%s %s %s %s' % (self.date, self.currency, self.type, self.status_code or '-')
+
+
+class SummaryCheckpoint(models.Model):
+    DAILY_SUMMARY = 'daily_summary'
+
+    name = models.CharField(
+        _('Name'),
+        max_length=50,
+        unique=True
+    )
+    high_water_mark = models.DateTimeField(
+        _('High water mark'),
+        null=True,
+        blank=True,
+        help_text=_('Transactions updated up to this date have been summarised.')
+    )
+
+    def __str__(self):
+        return self.name
@@ -1,36 +1,185 @@
-from datetime import datetime, timezone
-import dateutil
-import uuid
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
-from django.db import models
+from django.db import DEFAULT_DB_ALIAS, models, transaction as db_transaction
+from django.db.models import Avg, Count, Max, Sum
+from django.db.models.functions import Coalesce, TruncDate
 from django.db.models.manager import BaseManager
-from django.utils.encoding import force_bytes
+from django.utils.encoding import force_bytes, force_str
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.translation import gettext_lazy as _
 
 import pycountry
 
+from sagepaypi.conf import get_setting
 from sagepaypi.exceptions import InvalidTransactionStatus
 from sagepaypi.gateway import SagepayHttpResponse
-from sagepaypi.constants import TRANSACTION_TYPE_CHOICES
+from sagepaypi.ids import generate_id, generate_vendor_tx_code
+from sagepaypi.outcomes import cache_outcome, get_cached_outcome, is_terminal, poll_delay
+from sagepaypi.results import InstructionResult, TransactionResult
+from sagepaypi.routers import is_pinned_to_primary, pin_to_primary
+from sagepaypi.singleflight import SingleFlight
+from sagepaypi.constants import DEFERRED_DAYS_VALID, TRANSACTION_TYPE_CHOICES
 from sagepaypi.tokens import default_token_generator
+from sagepaypi.validation import validate
+from sagepaypi.models.fields import CodecJSONField
+
+
+# concurrent outcome lookups of a transaction share a single call to Sage Pay
+outcome_flight = SingleFlight(
+    'outcome',
+    dumps=lambda result: (result.status_code, dict(result.data)),
+    loads=lambda value: TransactionResult(*value)
+)
+
+
+@lru_cache(maxsize=None)
+def is_valid_currency(currency):
+    """
+    Whether the currency is a valid ISO 4217 code, cached as the pycountry lookup is slow.
+    """
+    return pycountry.currencies.get(alpha_3=currency) is not None
+
+
+def secure_data_property(name):
+    """
+    A property of the transaction for a field of its ``TransactionSecureData``.
+    """
+
+    def getter(self):
+        secure_data = self.get_secure_data()
+        return getattr(secure_data, name) if secure_data else None
+
+    def setter(self, value):
+        self.set_secure_data(**{name: value})
+
+    return property(getter, setter)
 
 
 class TransactionQuerySet(models.QuerySet):
     """ Custom queryset """
 
-    pass
+    def deferred_pending(self):
+        """
+        Successful deferred transactions that have not been released or aborted.
+        """
+        return self.filter(type='Deferred', status_code='0000', instruction__isnull=True)
+
+    def deferred_expiring(self, within_days, now=None):
+        """
+        Pending deferred transactions that can still be released or aborted but will be
+        auto aborted by Sage Pay within the given number of days.
+        """
+        now = now or Transaction.utc_now()
+        return self.deferred_pending().filter(
+            created_at__gt=now - timedelta(days=DEFERRED_DAYS_VALID + 1),
+            created_at__lte=now - timedelta(days=DEFERRED_DAYS_VALID + 1 - within_days)
+        )
+
+    def outcome_poll_due(self, now=None):
+        """
+        Transactions without a final status whose outcome is due to be polled, leaving out those
+        waiting on the customer to complete 3-D Secure.
+        """
+        return self.filter(next_outcome_poll_at__lte=now or Transaction.utc_now()).exclude(
+            status_code__in=['2007', '2021'],
+            secure_status__isnull=True
+        )
+
+    def refunds(self):
+        """
+        Successful refunds that have not been voided.
+        """
+        return self.filter(type='Refund', status_code='0000').exclude(instruction='void')
+
+    def pending_refunds(self):
+        """
+        Refunds without a response from Sage Pay yet, they may still succeed.
+        """
+        return self.filter(type='Refund', status_code__isnull=True)
+
+    def archivable(self, before):
+        """
+        Settled transactions created before the date that no transaction left unarchived refers to.
+        """
+        return self.filter(created_at__lt=before, status_code__isnull=False).exclude(
+            models.Exists(Transaction.objects.filter(reference_transaction=models.OuterRef('pk')))
+        )
+
+    def refunded_amounts(self, transactions):
+        """
+        The refunded amount of each transaction, grouped in a single query.
+
+        :param transactions: the transactions or primary keys of the refunded transactions.
+
+        :returns: dict of transaction pk to the refunded amount, transactions without refunds are excluded.
+        """
+        return self.refunds().amounts_by_reference(transactions)
+
+    def committed_refund_amounts(self, transactions):
+        """
+        The amount of each transaction refunded or being refunded, the successful refunds and
+        the refunds without a response yet, grouped in a single query.
+
+        :param transactions: the transactions or primary keys of the refunded transactions.
+
+        :returns: dict of transaction pk to the amount, transactions without refunds are excluded.
+        """
+        return (self.refunds() | self.pending_refunds()).amounts_by_reference(transactions)
+
+    def amounts_by_reference(self, transactions):
+        """
+        The sum of the amounts of the transactions referring to each transaction.
+        """
+        return dict(
+            self.filter(reference_transaction__in=transactions)
+            .order_by()
+            .values('reference_transaction')
+            .annotate(total=models.Sum('amount'))
+            .values_list('reference_transaction', 'total')
+        )
+
+    def lock_refundable_amounts(self, transactions):
+        """
+        Lock the transactions and get the amount of each that can still be refunded, refunds
+        without a response yet count against it as they may still succeed.
+
+        Must be called in an atomic block, the transactions stay locked until it ends so
+        concurrent refunds of a transaction are checked one at a time.
+
+        :param transactions: the transactions to refund.
+
+        :returns: dict of transaction pk to the refundable amount.
+        """
+
+        amounts = {obj.pk: obj.amount for obj in transactions}
+
+        # locked in the same order by every caller so concurrent refunds cannot deadlock
+        list(self.select_for_update().filter(pk__in=list(amounts)).order_by('pk').values_list('pk', flat=True))
+        committed = self.committed_refund_amounts(list(amounts))
+
+        return {pk: amount - committed.get(pk, 0) for pk, amount in amounts.items()}
 
 
 class TransactionManager(BaseManager.from_queryset(TransactionQuerySet)):
     """ Custom manager """
 
     def get_for_token(self, tidb64, token):
+        from sagepaypi.models import ArchivedTransaction
+
         transaction = None
         try:
             tid = urlsafe_base64_decode(tidb64).decode()
-            transaction = Transaction.objects.get(pk=tid)
+            transactions = Transaction.objects.all()
+            # read a transaction that has just changed from the primary rather than a replica
+            if is_pinned_to_primary(tid):
+                transactions = transactions.using(DEFAULT_DB_ALIAS)
+            try:
+                transaction = transactions.get(pk=tid)
+            except ObjectDoesNotExist:
+                # read through to the archive so old links still resolve
+                transaction = ArchivedTransaction.objects.get_transaction(tid)
             if not default_token_generator.check_token(transaction, token):
                 transaction = None
         except (TypeError, ValueError, OverflowError, ObjectDoesNotExist, ValidationError):
@@ -38,10 +187,52 @@ class TransactionManager(BaseManager.from_queryset(TransactionQuerySet)):
 
         return transaction
 
+    def get_for_3d_secure_session_data(self, session_data):
+        """
+        Get the transaction of the threeDSSessionData posted back after a 3-D Secure 2 challenge.
+        """
+
+        try:
+            tidb64, token = urlsafe_base64_decode(session_data).decode().split(':')
+        except (TypeError, ValueError):
+            return None
+
+        return self.get_for_token(tidb64, token)
+
+    def archive(self, **kwargs):
+        """
+        Archive old settled transactions, see ``sagepaypi.archive.archive_transactions``.
+
+        :returns: the number of transactions archived.
+        """
+        from sagepaypi.archive import archive_transactions
+
+        return archive_transactions(**kwargs)
+
+    def bulk_repeat(self, originals, **kwargs):
+        """
+        Repeat many transactions, see ``sagepaypi.bulk.bulk_repeat``.
+
+        :returns: a ``BulkResult`` of the repeat transactions.
+        """
+        from sagepaypi.bulk import bulk_repeat
+
+        return bulk_repeat(originals, **kwargs)
+
+    def bulk_refund(self, refunds, **kwargs):
+        """
+        Refund many transactions, see ``sagepaypi.bulk.bulk_refund``.
+
+        :returns: a ``BulkResult`` of the refund transactions.
+        """
+        from sagepaypi.bulk import bulk_refund
+
+        return bulk_refund(refunds, **kwargs)
+
 
 class Transaction(models.Model):
     id = models.UUIDField(
-        default=uuid.uuid4,
+        default=generate_id,
         editable=False,
         primary_key=True
     )
@@ -70,7 +261,7 @@ class Transaction(models.Model):
         _('Vendor tx code'),
         max_length=40,
         unique=True,
-        default=uuid.uuid4,
+        default=generate_vendor_tx_code,
         help_text=_('The unique vendor tx code used for the transaction.')
     )
     amount = models.IntegerField(
@@ -137,23 +328,16 @@ class Transaction(models.Model):
         blank=True,
         help_text=_('The url to redirect to for a transaction that requires 3-D authentication.')
     )
-    pareq = models.TextField(
-        _('Pareq'),
-        null=True,
-        blank=True,
-        help_text=_(
-            'A Base64 encoded, encrypted message that contains the transaction details. '
-            'This needs to be passed to the issuing bank as part of the 3-D Secure authentication.'
-        )
-    )
-    pares = models.TextField(
-        _('Pares'),
+    # the 3-D Secure messages are kept in TransactionSecureData, out of the transaction row
+    pareq = secure_data_property('pareq')
+    pares = secure_data_property('pares')
+    creq = secure_data_property('creq')
+    cres = secure_data_property('cres')
+    strong_customer_authentication = models.JSONField(
+        _('Strong customer authentication'),
         null=True,
         blank=True,
-        help_text=_(
-            'A Base64 encoded, encrypted message sent back by the issuing bank to your TermUrl '
-            'at the end of the 3-D Secure authentication process.'
-        )
+        help_text=_('The browser details and notification url sent to Sage Pay for 3-D Secure 2.')
     )
     secure_status = models.CharField(
         _('Secure status'),
@@ -162,6 +346,34 @@ class Transaction(models.Model):
         blank=True,
         help_text=_('The 3-D Secure status of the transaction, if applied.')
     )
+    avs_cvc_status = models.CharField(
+        _('AVS/CVC status'),
+        max_length=30,
+        null=True,
+        blank=True,
+        help_text=_('The result of the address and security code checks, e.g "AllMatched".')
+    )
+    bank_response_code = models.CharField(
+        _('Bank response code'),
+        max_length=10,
+        null=True,
+        blank=True,
+        help_text=_('The response code from the bank, e.g "00".')
+    )
+    card_type = models.CharField(
+        _('Card type'),
+        max_length=30,
+        null=True,
+        blank=True,
+        help_text=_('The type of card used for the transaction, e.g "Visa".')
+    )
+    card_last_four = models.CharField(
+        _('Card last four'),
+        max_length=4,
+        null=True,
+        blank=True,
+        help_text=_('The last four digits of the card used for the transaction.')
+    )
     instruction = models.CharField(
         _('Instruction'),
         max_length=10,
@@ -184,15 +396,123 @@ class Transaction(models.Model):
         blank=True,
         help_text=_('The referring transaction used for a "Repeat" or "Refund" transaction.')
     )
+    save_card = models.BooleanField(
+        _('Save card'),
+        default=False,
+        help_text=_(
+            'Request Sage Pay to save the card identifier so it can be reused '
+            'once the transaction is successful.'
+        )
+    )
+    outcome_polls = models.PositiveIntegerField(
+        _('Outcome polls'),
+        default=0,
+        help_text=_('The number of times the outcome has been looked up since the transaction was submitted.')
+    )
+    next_outcome_poll_at = models.DateTimeField(
+        _('Next outcome poll at'),
+        null=True,
+        blank=True,
+        help_text=_('When the outcome is next polled, empty once the transaction has a final status.')
+    )
 
     objects = TransactionManager()
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['created_at'],
+                name='sagepaypi_deferred_pending_idx',
+                condition=models.Q(type='Deferred', status_code='0000', instruction__isnull=True)
+            ),
+            # changelist ordering, date hierarchy, filters and search in the admin
+            models.Index(fields=['created_at', 'id'], name='sagepaypi_tx_created_idx'),
+            models.Index(fields=['status', 'created_at'], name='sagepaypi_tx_status_idx'),
+            models.Index(fields=['type', 'created_at'], name='sagepaypi_tx_type_idx'),
+            models.Index(fields=['transaction_id'], name='sagepaypi_tx_sagepay_id_idx'),
+            # high water mark of the daily summaries
+            models.Index(fields=['updated_at'], name='sagepaypi_tx_updated_idx'),
+            # filters on the checks and the card of the responses
+            models.Index(fields=['avs_cvc_status', 'created_at'], name='sagepaypi_tx_avs_cvc_idx'),
+            models.Index(fields=['secure_status', 'created_at'], name='sagepaypi_tx_secure_status_idx'),
+            models.Index(fields=['bank_response_code', 'created_at'], name='sagepaypi_tx_bank_code_idx'),
+            models.Index(fields=['card_type', 'created_at'], name='sagepaypi_tx_card_type_idx'),
+            models.Index(fields=['card_last_four'], name='sagepaypi_tx_last_four_idx'),
+            # transactions due to be polled, most have a final status and are left out
+            models.Index(
+                fields=['next_outcome_poll_at'],
+                name='sagepaypi_tx_poll_idx',
+                condition=models.Q(next_outcome_poll_at__isnull=False)
+            ),
+        ]
 
     def __str__(self):
         return str(self.pk)
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.save_secure_data()
+
+    def get_secure_data(self):
+        """
+        The ``TransactionSecureData`` of the transaction, ``None`` when it has none.
+        """
+
+        related = Transaction.secure_data.related
+        if related.is_cached(self):
+            return related.get_cached_value(self)
+
+        # a new transaction has nothing to look up
+        if self._state.adding:
+            return None
+
+        try:
+            return self.secure_data
+        except ObjectDoesNotExist:
+            return None
+
+    def set_secure_data(self, **values):
+        """
+        Set the 3-D Secure messages, they are saved with the transaction.
+        """
+
+        secure_data = self.get_secure_data()
+
+        if secure_data is None:
+            if not any(values.values()):
+                return
+            self.secure_data = secure_data = TransactionSecureData(transaction=self)
+
+        for name, value in values.items():
+            setattr(secure_data, name, value)
+        secure_data.changed = True
+
+    def save_secure_data(self):
+        """
+        Save the 3-D Secure messages when they have been set.
+        """
+
+        related = Transaction.secure_data.related
+        secure_data = related.get_cached_value(self) if related.is_cached(self) else None
+
+        if secure_data is not None and secure_data.changed:
+            secure_data.transaction = self
+            secure_data.save(using=self._state.db)
+            secure_data.changed = False
+
+    save_secure_data.alters_data = True
+
+    def purge_secure_data(self):
+        """
+        Delete the 3-D Secure messages, they are not needed once 3-D Secure has completed.
+        """
+
+        TransactionSecureData.objects.filter(transaction=self).delete()
+        Transaction.secure_data.related.set_cached_value(self, None)
+
+    purge_secure_data.alters_data = True
+
     def clean(self):
         """
         Includes additional validation to ensure:
@@ -203,7 +523,7 @@ class Transaction(models.Model):
 
         errors = {}
 
-        if not pycountry.currencies.get(alpha_3=self.currency):
+        if not is_valid_currency(self.currency):
             errors['currency'] = _('Requires a valid currency.')
 
         if self.type == 'Repeat' and not self.reference_transaction:
@@ -229,13 +549,85 @@ class Transaction(models.Model):
             will be valid for limited period for this transaction, similar to django's password reset token.
         """
 
-        tidb64 = urlsafe_base64_encode(force_bytes(self.pk))
-        token = default_token_generator.make_token(self)
-        return tidb64, token
+        # the tokens only change with the transaction or the day, so are made once for each
+        key = (self.pk, self.updated_at, default_token_generator.current_timestamp())
 
-    def submit_transaction(self):
+        if getattr(self, '_tokens_key', None) != key:
+            tidb64 = urlsafe_base64_encode(force_bytes(self.pk))
+            token = default_token_generator.make_token(self)
+            self._tokens_key, self._tokens = key, (tidb64, token)
+
+        return self._tokens
+
+    def get_3d_secure_session_data(self):
         """
-        Submit's the transaction to Sage Pay and saves the response.
+        Get the threeDSSessionData posted with the creq to the issuing bank and back to the
+        notification url, it carries the transaction tokens as the notification url is the same
+        for all transactions.
+
+        :returns: a Base64url encoded string of the transaction tokens.
+        """
+
+        tidb64, token = self.get_tokens()
+        return urlsafe_base64_encode(force_bytes('%s:%s' % (force_str(tidb64), token)))
+
+    def get_card_payment_method(self):
+        """
+        Get the card payment method for a "Payment" or "Deferred" transaction.
+
+        A reusable card identifier requires a new merchant session key as the one it
+        was created with will have expired, a new card identifier is only sent as is
+        with the option to save it for future transactions.
+
+        :raises InvalidTransactionStatus: if a merchant session key cannot be created.
+
+        :returns: The card payment method payload.
+        """
+
+        card_identifier = self.card_identifier
+
+        if card_identifier.reusable:
+            from sagepaypi.gateway import default_gateway
+
+            session_key = default_gateway.get_merchant_session_key()
+
+            if not session_key:
+                err = _('cannot create a merchant session key for the reusable card identifier')
+                raise InvalidTransactionStatus(err)
+
+            return {
+                'merchantSessionKey': session_key[0],
+                'cardIdentifier': card_identifier.card_identifier,
+                'reusable': True
+            }
+
+        card = {
+            'merchantSessionKey': card_identifier.merchant_session_key,
+            'cardIdentifier': card_identifier.card_identifier
+        }
+
+        if self.save_card:
+            card['save'] = True
+
+        return card
+
+    def save_reusable_card_identifier(self):
+        """
+        Mark the card identifier as reusable when a transaction that requested the card
+        to be saved has been successful.
+        """
+
+        if self.save_card and self.successful and not self.card_identifier.reusable:
+            self.card_identifier.reusable = True
+            self.card_identifier.save(update_fields=['reusable'])
+
+    save_reusable_card_identifier.alters_data = True
+
+    def get_submit_data(self):
+        """
+        Get the data to submit the transaction to Sage Pay with.
+
+        :returns: The new transaction payload.
         """
 
         new_transaction = {
@@ -249,49 +641,152 @@ class Transaction(models.Model):
         if self.type in ['Payment', 'Deferred']:
             new_transaction.update({
                 'paymentMethod': {
-                    'card': {
-                        'merchantSessionKey': self.card_identifier.merchant_session_key,
-                        'cardIdentifier': self.card_identifier.card_identifier
-                    }
+                    'card': self.get_card_payment_method()
                 },
                 'customerFirstName': self.card_identifier.first_name,
                 'customerLastName': self.card_identifier.last_name,
                 'billingAddress': self.card_identifier.billing_address
             })
 
+            if self.strong_customer_authentication:
+                new_transaction['strongCustomerAuthentication'] = self.strong_customer_authentication
+
+            if self.card_identifier.reusable:
+                new_transaction['credentialType'] = {
+                    'cofUsage': 'Subsequent',
+                    'initiatedType': 'CIT'
+                }
+            elif self.save_card:
+                new_transaction['credentialType'] = {
+                    'cofUsage': 'First',
+                    'initiatedType': 'CIT'
+                }
+
         else:
             new_transaction.update({
                 'referenceTransactionId': self.reference_transaction.transaction_id
             })
 
-        from sagepaypi.gateway import default_gateway
+        return new_transaction
+
+    def record_result(self, step, result):
+        """
+        Save the response of a call to Sage Pay against the transaction.
+
+        :param step: The step of the call, ie "submit_transaction".
+        :param result: The ``GatewayResult`` of the call.
+        """
 
-        response = default_gateway.submit_transaction(new_transaction)
+        TransactionResponse.from_result(self, step, result).save()
 
-        data = response.json()
+    record_result.alters_data = True
 
-        self.responses.create(step='submit_transaction', status_code=response.status_code, data=data)
+    def set_submit_response(self, status_code, data):
+        """
+        Set the transaction details from the Sage Pay response to a submitted transaction.
 
-        if response.status_code in [
+        Does not save the transaction.
+
+        :param status_code: The http status code of the response.
+        :param data: The json data of the response.
+        """
+
+        self.set_submit_result(TransactionResult(status_code, data))
+
+    def set_submit_result(self, result):
+        """
+        Set the transaction details from the ``TransactionResult`` of a submitted transaction.
+
+        Does not save the transaction.
+        """
+
+        if result.status_code in [
             SagepayHttpResponse.HTTP_200,
             SagepayHttpResponse.HTTP_201,
             SagepayHttpResponse.HTTP_202,
             SagepayHttpResponse.HTTP_204
         ]:
-            self.status_code = data.get('statusCode')
-            self.status = data.get('status')
-            self.status_detail = data.get('statusDetail')
-            self.transaction_id = data.get('transactionId')
-            self.retrieval_reference = data.get('retrievalReference')
-            self.bank_authorisation_code = data.get('bankAuthorisationCode')
-            self.pareq = data.get('paReq')
-            self.acs_url = data.get('acsUrl')
+            self.status_code = result.transaction_status_code
+            self.status = result.status
+            self.status_detail = result.status_detail
+            self.transaction_id = result.transaction_id
+            self.retrieval_reference = result.retrieval_reference
+            self.bank_authorisation_code = result.bank_authorisation_code
+            self.acs_url = result.acs_url
+            self.set_response_details(result)
+            # only a transaction that requires 3-D Secure has messages, others are not looked up
+            if result.pareq or result.creq:
+                self.set_secure_data(pareq=result.pareq, creq=result.creq)
 
         else:
-            self.status = data.get('status')
-            self.status_code = data.get('statusCode')
+            self.status = result.status
+            self.status_code = result.transaction_status_code
+
+        self.outcome_polls = 0
+        self.schedule_outcome_poll()
+
+    def schedule_outcome_poll(self, now=None):
+        """
+        Schedule the next outcome poll of a transaction without a final status, backing off with
+        the number of polls made. Transactions with a final status, or that have been polled
+        ``SAGEPAYPI_OUTCOME_POLL_MAX_POLLS`` times, are not polled again.
+
+        Transactions waiting on the customer to complete 3-D Secure are not polled, saving the
+        outcome would change the transaction and invalidate the tokens the customer returns with.
+        They are scheduled by the outcome fetched once 3-D Secure is completed.
+
+        Does not save the transaction.
+        """
+
+        if (
+            not self.transaction_id or
+            is_terminal(self.status) or
+            self.awaiting_3d_secure or
+            self.outcome_polls >= get_setting('OUTCOME_POLL_MAX_POLLS')
+        ):
+            self.next_outcome_poll_at = None
+        else:
+            self.next_outcome_poll_at = (now or self.utc_now()) + timedelta(seconds=poll_delay(self.outcome_polls))
+
+    def check_can_submit(self, data=None):
+        """
+        Check the transaction would not be rejected by Sage Pay before it is submitted.
+
+        :param data: The payload to check, defaults to the submit data of the transaction.
+
+        :raises InvalidTransactionStatus: if the card identifier has expired.
+        :raises PreflightError: if the payload would be rejected by Sage Pay.
+        """
+
+        if self.type in ['Payment', 'Deferred'] and not self.card_identifier.reusable:
+            if self.card_identifier.card_identifier_expiry <= self.utc_now():
+                err = _('the card identifier has expired')
+                raise InvalidTransactionStatus(err)
+
+        validate('transaction', data or self.get_submit_data())
+
+    def submit_transaction(self):
+        """
+        Submit's the transaction to Sage Pay and saves the response.
+
+        :raises InvalidTransactionStatus: if the transaction would be rejected by Sage Pay.
+        """
+
+        new_transaction = self.get_submit_data()
+
+        self.check_can_submit(new_transaction)
+
+        from sagepaypi.gateway import default_gateway
+
+        result = TransactionResult.from_response(default_gateway.submit_transaction(new_transaction))
+
+        self.record_result('submit_transaction', result)
+
+        self.set_submit_result(result)
 
         self.save()
+        self.save_reusable_card_identifier()
+        pin_to_primary(self)
 
     submit_transaction.alters_data = True
 
@@ -317,26 +812,76 @@ class Transaction(models.Model):
         from sagepaypi.gateway import default_gateway
 
         post_data = {'paRes': self.pares}
-        response = default_gateway.get_3d_secure_status(self.transaction_id, post_data)
+        validate('3d-secure', post_data)
 
-        data = response.json()
+        result = TransactionResult.from_response(default_gateway.get_3d_secure_status(self.transaction_id, post_data))
 
-        self.responses.create(step='get_3d_secure_status', status_code=response.status_code, data=data)
+        self.record_result('get_3d_secure_status', result)
 
-        if response.status_code == SagepayHttpResponse.HTTP_201:
-            self.secure_status = data.get('status')
+        if result.status_code == SagepayHttpResponse.HTTP_201:
+            self.secure_status = result.status
+            self.purge_secure_data()
 
         self.save()
-        self.get_transaction_outcome()
+        self.fetch_transaction_outcome()
+        pin_to_primary(self)
 
     get_3d_secure_status.alters_data = True
 
+    def complete_3d_secure_challenge(self, cres, session_data=None):
+        """
+        Complete the 3-D Secure 2 challenge with Sage Pay.
+
+        User must have already been redirected to the issuing bank with the creq and posted
+        back to the notification url with the cres.
+
+        :param cres: A Base64 encoded challenge response sent back by the issuing bank to the
+            notification url at the end of the 3-D Secure 2 authentication. See Sage Pay docs.
+        :param session_data: The threeDSSessionData posted back with the cres, defaults to
+            the session data of the transaction.
+
+        :raises InvalidTransactionStatus: if the transaction is not in a valid state to process.
+        """
+
+        if not self.transaction_id:
+            err = _('transaction is missing a transaction_id')
+            raise InvalidTransactionStatus(err)
+
+        self.cres = cres
+
+        from sagepaypi.gateway import default_gateway
+
+        post_data = {'cRes': self.cres, 'threeDSSessionData': session_data or self.get_3d_secure_session_data()}
+        validate('3d-secure-challenge', post_data)
+
+        result = TransactionResult.from_response(
+            default_gateway.complete_3d_secure_challenge(self.transaction_id, post_data)
+        )
+
+        self.record_result('complete_3d_secure_challenge', result)
+
+        if result.status_code == SagepayHttpResponse.HTTP_201:
+            self.secure_status = result.secure_status
+            self.purge_secure_data()
+
+        self.save()
+        self.fetch_transaction_outcome()
+        pin_to_primary(self)
+
+    complete_3d_secure_challenge.alters_data = True
+
     def get_transaction_outcome(self):
         """
         Get's the outcome of a transaction from Sage Pay.
 
         Must have a valid transaction_id to process.
 
+        Concurrent lookups of the same transaction share a single call to Sage Pay, within the
+        process and between processes when ``SAGEPAYPI_OUTCOME_LOCK_CACHE`` is set. The outcome
+        is saved by the lookup that made the call, the others only set it on their transaction.
+
+        A final outcome cached by ``SAGEPAYPI_OUTCOME_CACHE`` is set on the transaction without a call.
+
         :raises InvalidTransactionStatus: if the transaction is not in a valid state to process.
         """
 
@@ -344,36 +889,125 @@ class Transaction(models.Model):
             err = _('transaction is missing a transaction_id')
             raise InvalidTransactionStatus(err)
 
-        from sagepaypi.gateway import default_gateway
+        cached = get_cached_outcome(self.transaction_id)
+        if cached:
+            self.set_outcome_result(cached)
+            return
+
+        result, shared = outcome_flight.do(
+            self.transaction_id,
+            self.fetch_transaction_outcome,
+            cache_alias=get_setting('OUTCOME_LOCK_CACHE'),
+            timeout=get_setting('OUTCOME_LOCK_TIMEOUT')
+        )
+
+        if shared:
+            self.set_outcome_result(result)
+
+    get_transaction_outcome.alters_data = True
 
-        response = default_gateway.get_transaction_outcome(self.transaction_id)
+    def fetch_transaction_outcome(self):
+        """
+        Get the outcome of the transaction from Sage Pay and save it, use ``get_transaction_outcome``
+        so concurrent lookups are coalesced. Used directly once the transaction has changed on Sage Pay,
+        as a lookup in flight may have been made before the change.
+
+        :returns: the ``TransactionResult`` of the call.
+        """
+
+        from sagepaypi.gateway import default_gateway
 
-        data = response.json()
+        result = TransactionResult.from_response(default_gateway.get_transaction_outcome(self.transaction_id))
+        cache_outcome(self.transaction_id, result)
 
-        self.responses.create(step='get_transaction_outcome', status_code=response.status_code, data=data)
+        self.record_result('get_transaction_outcome', result)
 
-        if response.status_code == SagepayHttpResponse.HTTP_200:
-            self.status_code = data.get('statusCode')
-            self.status = data.get('status')
-            self.status_detail = data.get('statusDetail')
-            self.transaction_id = data.get('transactionId')
-            self.retrieval_reference = data.get('retrievalReference')
-            self.bank_authorisation_code = data.get('bankAuthorisationCode')
+        self.set_outcome_result(result)
 
         self.save()
+        self.save_reusable_card_identifier()
+        pin_to_primary(self)
 
-    get_transaction_outcome.alters_data = True
+        return result
 
-    def release(self, amount=None):
+    fetch_transaction_outcome.alters_data = True
+
+    def set_outcome_response(self, status_code, data):
         """
-        Release a deferred transaction.
+        Set the transaction details from the Sage Pay response to a transaction outcome.
 
-        This has to be completed within 30 days of the creation date.
-        You can only either request a release or abort of a deferred payment once.
-        After 30 days Sage Pay will auto abort the transaction and you will be required
-        to make another transaction with the card holder if you still require the funds.
+        Does not save the transaction.
 
-        :param amount: Specify the amount if you do not want to release the full amount.
+        :param status_code: The http status code of the response.
+        :param data: The json data of the response.
+        """
+
+        self.set_outcome_result(TransactionResult(status_code, data))
+
+    def set_outcome_result(self, result):
+        """
+        Set the transaction details from the ``TransactionResult`` of a transaction outcome.
+
+        Does not save the transaction.
+        """
+
+        if result.status_code == SagepayHttpResponse.HTTP_200:
+            self.status_code = result.transaction_status_code
+            self.status = result.status
+            self.status_detail = result.status_detail
+            self.transaction_id = result.transaction_id
+            self.retrieval_reference = result.retrieval_reference
+            self.bank_authorisation_code = result.bank_authorisation_code
+            self.set_response_details(result)
+
+        self.outcome_polls += 1
+        self.schedule_outcome_poll()
+
+    def set_response_details(self, result):
+        """
+        Set the checks and the card of the transaction from a ``TransactionResult``, they are columns
+        so transactions can be filtered on them without decoding the responses.
+
+        Does not save the transaction.
+        """
+
+        self.avs_cvc_status = result.avs_cvc_status
+        self.bank_response_code = result.bank_response_code
+        self.card_type = result.card_type
+        self.card_last_four = result.card_last_four
+
+        # the status set by the 3-D Secure steps is kept, the responses only fill it in
+        if result.secure_status and not self.secure_status:
+            self.secure_status = result.secure_status
+
+    def set_instruction_response(self, status_code, data):
+        """
+        Set the instruction from the Sage Pay response to a transaction instruction.
+
+        Does not save the transaction.
+
+        :param status_code: The http status code of the response.
+        :param data: The json data of the response.
+        """
+
+        self.set_instruction_result(InstructionResult(status_code, data))
+
+    def set_instruction_result(self, result):
+        """
+        Set the instruction from the ``InstructionResult`` of a transaction instruction.
+
+        Does not save the transaction.
+        """
+
+        if result.status_code == SagepayHttpResponse.HTTP_201:
+            self.instruction = result.instruction_type
+            self.instruction_created_at = result.date
+
+    def check_can_release(self, amount=None):
+        """
+        Check the transaction is in a valid state to be released.
+
+        :param amount: The amount to release.
 
         :raises InvalidTransactionStatus: if the transaction is not in a valid state to process.
         """
@@ -390,7 +1024,7 @@ class Transaction(models.Model):
             err = _('cannot release a transaction with an existing instruction')
             raise InvalidTransactionStatus(err)
 
-        if self.days_since_created > 30:
+        if self.days_since_created > DEFERRED_DAYS_VALID:
             err = _('can only release a transaction that was created within 30 days')
             raise InvalidTransactionStatus(err)
 
@@ -398,33 +1032,45 @@ class Transaction(models.Model):
             err = _('can only release up to the original amount and no more')
             raise InvalidTransactionStatus(err)
 
+    def release(self, amount=None):
+        """
+        Release a deferred transaction.
+
+        This has to be completed within 30 days of the creation date.
+        You can only either request a release or abort of a deferred payment once.
+        After 30 days Sage Pay will auto abort the transaction and you will be required
+        to make another transaction with the card holder if you still require the funds.
+
+        :param amount: Specify the amount if you do not want to release the full amount.
+
+        :raises InvalidTransactionStatus: if the transaction is not in a valid state to process.
+        """
+
+        self.check_can_release(amount)
+
         from sagepaypi.gateway import default_gateway
 
         post_data = {
             'instructionType': 'release',
             'amount': amount or self.amount
         }
-        response = default_gateway.submit_transaction_instruction(self.transaction_id, post_data)
+        validate('instruction', post_data)
 
-        data = response.json()
+        result = InstructionResult.from_response(
+            default_gateway.submit_transaction_instruction(self.transaction_id, post_data)
+        )
 
-        self.responses.create(step='release', status_code=response.status_code, data=data)
+        self.record_result('release', result)
 
-        if response.status_code == SagepayHttpResponse.HTTP_201:
-            self.instruction = data['instructionType']
-            self.instruction_created_at = dateutil.parser.parse(data['date'])
+        self.set_instruction_result(result)
 
         self.save()
 
     release.alters_data = True
 
-    def abort(self):
+    def check_can_abort(self):
         """
-        Abort a deferred transaction.
-
-        This has to be completed within 30 days of the creation date.
-        You can only either request a release or abort of a deferred payment once.
-        After 30 days Sage Pay will auto abort the transaction if no instruction has been made.
+        Check the transaction is in a valid state to be aborted.
 
         :raises InvalidTransactionStatus: if the transaction is not in a valid state to process.
         """
@@ -441,28 +1087,42 @@ class Transaction(models.Model):
             err = _('can only abort a deferred transaction')
             raise InvalidTransactionStatus(err)
 
-        if self.days_since_created > 30:
+        if self.days_since_created > DEFERRED_DAYS_VALID:
             err = _('can only abort a transaction that was created within 30 days')
             raise InvalidTransactionStatus(err)
 
+    def abort(self):
+        """
+        Abort a deferred transaction.
+
+        This has to be completed within 30 days of the creation date.
+        You can only either request a release or abort of a deferred payment once.
+        After 30 days Sage Pay will auto abort the transaction if no instruction has been made.
+
+        :raises InvalidTransactionStatus: if the transaction is not in a valid state to process.
+        """
+
+        self.check_can_abort()
+
         from sagepaypi.gateway import default_gateway
 
         post_data = {
             'instructionType': 'abort',
             'amount': self.amount
         }
-        response = default_gateway.submit_transaction_instruction(self.transaction_id, post_data)
+        validate('instruction', post_data)
 
-        data = response.json()
+        result = InstructionResult.from_response(
+            default_gateway.submit_transaction_instruction(self.transaction_id, post_data)
+        )
 
-        self.responses.create(step='abort', status_code=response.status_code, data=data)
+        self.record_result('abort', result)
 
-        if response.status_code == SagepayHttpResponse.HTTP_201:
-            self.instruction = data['instructionType']
-            self.instruction_created_at = dateutil.parser.parse(data['date'])
+        if result.status_code == SagepayHttpResponse.HTTP_201:
+            self.set_instruction_result(result)
 
             self.save()
-            self.get_transaction_outcome()
+            self.fetch_transaction_outcome()
 
     abort.alters_data = True
 
@@ -495,34 +1155,27 @@ class Transaction(models.Model):
         from sagepaypi.gateway import default_gateway
 
         post_data = {'instructionType': 'void'}
-        response = default_gateway.submit_transaction_instruction(self.transaction_id, post_data)
+        validate('instruction', post_data)
 
-        data = response.json()
+        result = InstructionResult.from_response(
+            default_gateway.submit_transaction_instruction(self.transaction_id, post_data)
+        )
 
-        self.responses.create(step='void', status_code=response.status_code, data=data)
+        self.record_result('void', result)
 
-        if response.status_code == SagepayHttpResponse.HTTP_201:
-            self.instruction = data['instructionType']
-            self.instruction_created_at = dateutil.parser.parse(data['date'])
+        if result.status_code == SagepayHttpResponse.HTTP_201:
+            self.set_instruction_result(result)
 
             self.save()
-            self.get_transaction_outcome()
+            self.fetch_transaction_outcome()
 
     void.alters_data = True
 
-    def repeat(self, **kwargs):
+    def check_can_repeat(self):
         """
-        Repeat a transaction
-
-        To repeat a transaction it must have been a successful
-        Payment, Repeat or a released Deferred transaction and not void.
-
-        :param kwargs: Pass any defaults for the repeat transaction,
-            ie {'amount': 1, 'description': 'Repeat of payment'}
+        Check the transaction is in a valid state to be repeated.
 
         :raises InvalidTransactionStatus: if the transaction is not in a valid state to process.
-
-        :returns: the new transaction instance.
         """
 
         if not self.transaction_id:
@@ -545,11 +1198,21 @@ class Transaction(models.Model):
             err = _('cannot repeat a void transaction')
             raise InvalidTransactionStatus(err)
 
+    def build_repeat(self, **kwargs):
+        """
+        Build an unsaved repeat of the transaction.
+
+        :param kwargs: Pass any defaults for the repeat transaction,
+            ie {'amount': 1, 'description': 'Repeat of payment'}
+
+        :returns: the new unsaved transaction instance.
+        """
+
         repeat = Transaction(**kwargs)
 
         # must be set to original transaction details
         repeat.type = 'Repeat'
-        repeat.card_identifier = self.card_identifier
+        repeat.card_identifier_id = self.card_identifier_id
         repeat.reference_transaction = self
 
         # can be changeable
@@ -557,8 +1220,30 @@ class Transaction(models.Model):
         repeat.amount = repeat.amount or self.amount
         repeat.description = repeat.description or self.description
 
-        # clean, save and submit the transaction
+        return repeat
+
+    def repeat(self, **kwargs):
+        """
+        Repeat a transaction
+
+        To repeat a transaction it must have been a successful
+        Payment, Repeat or a released Deferred transaction and not void.
+
+        :param kwargs: Pass any defaults for the repeat transaction,
+            ie {'amount': 1, 'description': 'Repeat of payment'}
+
+        :raises InvalidTransactionStatus: if the transaction is not in a valid state to process.
+
+        :returns: the new transaction instance.
+        """
+
+        self.check_can_repeat()
+
+        repeat = self.build_repeat(**kwargs)
+
+        # clean, check, save and submit the transaction
         repeat.full_clean()
+        repeat.check_can_submit()
         repeat.save()
         repeat.submit_transaction()
 
@@ -566,19 +1251,11 @@ class Transaction(models.Model):
 
     repeat.alters_data = True
 
-    def refund(self, **kwargs):
+    def check_can_refund(self):
         """
-        Refund a transaction
-
-        You can perform multiple refunds on a single transaction as long
-        as the sum of the amounts does not exceed the original transaction.
-
-        :param kwargs: Pass any defaults for the refund transaction,
-            ie {'amount': 1, 'description': 'Refund of payment'}
+        Check the transaction is in a valid state to be refunded.
 
         :raises InvalidTransactionStatus: if the transaction is not in a valid state to process.
-
-        :returns: the new transaction instance.
         """
 
         if not self.transaction_id:
@@ -597,34 +1274,103 @@ class Transaction(models.Model):
             err = _('cannot refund a deferred transaction that is not released')
             raise InvalidTransactionStatus(err)
 
+    def build_refund(self, **kwargs):
+        """
+        Build an unsaved refund of the transaction.
+
+        :param kwargs: Pass any defaults for the refund transaction,
+            ie {'amount': 1, 'description': 'Refund of payment'}
+
+        :returns: the new unsaved transaction instance.
+        """
+
         refund = Transaction(**kwargs)
 
         # must be set to original transaction details
         refund.type = 'Refund'
-        refund.card_identifier = self.card_identifier
+        refund.card_identifier_id = self.card_identifier_id
         refund.reference_transaction = self
         refund.currency = self.currency
 
         # can be changeable
-        refund.amount = refund.amount or self.amount
         refund.description = refund.description or self.description
 
-        # clean, save and submit the transaction
-        refund.full_clean()
-        refund.save()
+        return refund
+
+    def refund(self, **kwargs):
+        """
+        Refund a transaction
+
+        You can perform multiple refunds on a single transaction as long
+        as the sum of the amounts does not exceed the original transaction.
+
+        :param kwargs: Pass any defaults for the refund transaction,
+            ie {'amount': 1, 'description': 'Refund of payment'},
+            the amount defaults to the amount that has not been refunded yet.
+
+        :raises InvalidTransactionStatus: if the transaction is not in a valid state to process.
+
+        :returns: the new transaction instance.
+        """
+
+        self.check_can_refund()
+
+        with db_transaction.atomic():
+            refundable_amount = Transaction.objects.lock_refundable_amounts([self])[self.pk]
+            refund = self.build_refund(**kwargs)
+            refund.amount = refund.amount or refundable_amount
+
+            if refund.amount <= 0:
+                err = _('nothing left to refund')
+                raise InvalidTransactionStatus(err)
+
+            if refund.amount > refundable_amount:
+                err = _('can only refund up to the original amount and no more')
+                raise InvalidTransactionStatus(err)
+
+            # clean, check and save the transaction
+            refund.full_clean()
+            refund.check_can_submit()
+            refund.save()
+
         refund.submit_transaction()
 
         return refund
 
     refund.alters_data = True
 
+    @property
+    def refunded_amount(self):
+        """
+        The sum of the successful refunds of the transaction.
+        """
+        return Transaction.objects.refunded_amounts([self.pk]).get(self.pk, 0)
+
+    @property
+    def refundable_amount(self):
+        """
+        The amount of the transaction that has not been refunded yet.
+        """
+        return self.amount - self.refunded_amount
+
     @property
     def days_since_created(self):
         return (self.utc_now() - self.created_at).days
 
     @property
     def requires_3d_secure(self):
-        return self.status_code == '2007'
+        return self.status_code in ['2007', '2021']
+
+    @property
+    def requires_3d_secure_challenge(self):
+        return self.status_code == '2021'
+
+    @property
+    def awaiting_3d_secure(self):
+        """
+        The customer has been sent to complete 3-D Secure and has not returned yet.
+        """
+        return self.requires_3d_secure and not self.secure_status
 
     @property
     def successful(self):
@@ -635,6 +1381,101 @@ class Transaction(models.Model):
         return datetime.now(timezone.utc)
 
 
+class TransactionSecureData(models.Model):
+    """
+    The 3-D Secure messages of a transaction, kept out of the transaction row as they are large
+    and only needed until 3-D Secure has completed, when they are deleted.
+    """
+
+    transaction = models.OneToOneField(
+        'sagepaypi.Transaction',
+        verbose_name=_('Transaction'),
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='secure_data'
+    )
+    pareq = models.TextField(
+        _('Pareq'),
+        null=True,
+        blank=True,
+        help_text=_(
+            'A Base64 encoded, encrypted message that contains the transaction details. '
+            'This needs to be passed to the issuing bank as part of the 3-D Secure authentication.'
+        )
+    )
+    pares = models.TextField(
+        _('Pares'),
+        null=True,
+        blank=True,
+        help_text=_(
+            'A Base64 encoded, encrypted message sent back by the issuing bank to your TermUrl '
+            'at the end of the 3-D Secure authentication process.'
+        )
+    )
+    creq = models.TextField(
+        _('Creq'),
+        null=True,
+        blank=True,
+        help_text=_(
+            'A Base64 encoded challenge request that needs to be passed to the issuing bank '
+            'as part of the 3-D Secure 2 authentication.'
+        )
+    )
+    cres = models.TextField(
+        _('Cres'),
+        null=True,
+        blank=True,
+        help_text=_(
+            'A Base64 encoded challenge response sent back by the issuing bank to the notification url '
+            'at the end of the 3-D Secure 2 authentication.'
+        )
+    )
+
+    # whether the messages have been set since they were saved
+    changed = False
+
+    class Meta:
+        verbose_name = _('3-D Secure data')
+        verbose_name_plural = _('3-D Secure data')
+
+    def __str__(self):
+        return str(self.pk)
+
+
+class TransactionResponseQuerySet(models.QuerySet):
+    """ Custom queryset """
+
+    def latency_by(self, *fields):
+        """
+        The latency of the calls grouped by the given fields, ie ``'step'`` or ``'day', 'step'``,
+        ``'day'`` being the date the response was created. Responses that were not measured are left out.
+
+        :returns: list of dicts with the ``count``, ``avg_duration``, ``max_duration``,
+            ``avg_time_to_first_byte``, ``retry_count``, ``avg_request_size`` and ``avg_response_size``.
+        """
+
+        rows = (
+            self.filter(duration__isnull=False)
+            .annotate(day=TruncDate('created_at'))
+            .order_by(*fields)
+            .values(*fields)
+            .annotate(
+                count=Count('pk'),
+                avg_duration=Avg('duration'),
+                max_duration=Max('duration'),
+                avg_time_to_first_byte=Avg('time_to_first_byte'),
+                retry_count=Coalesce(Sum('retry_count'), 0),
+                avg_request_size=Avg('request_size'),
+                avg_response_size=Avg('response_size'),
+            )
+        )
+        return list(rows)
+
+
+class TransactionResponseManager(BaseManager.from_queryset(TransactionResponseQuerySet)):
+    """ Custom manager """
+
+
 class TransactionResponse(models.Model):
     transaction = models.ForeignKey(
         'sagepaypi.Transaction',
@@ -654,10 +1495,55 @@ class TransactionResponse(models.Model):
         _('Status code'),
         null=True
     )
-    data = models.JSONField(
+    data = CodecJSONField(
         _('Data'),
         default=dict
     )
+    duration = models.FloatField(
+        _('Duration'),
+        null=True,
+        blank=True,
+        help_text=_('The time taken by the call in milliseconds.')
+    )
+    time_to_first_byte = models.FloatField(
+        _('Time to first byte'),
+        null=True,
+        blank=True,
+        help_text=_('The time until the headers of the response were received in milliseconds.')
+    )
+    retry_count = models.PositiveSmallIntegerField(
+        _('Retry count'),
+        null=True,
+        blank=True,
+        help_text=_('The number of times the connection was retried.')
+    )
+    request_size = models.PositiveIntegerField(
+        _('Request size'),
+        null=True,
+        blank=True,
+        help_text=_('The size of the request body in bytes.')
+    )
+    response_size = models.PositiveIntegerField(
+        _('Response size'),
+        null=True,
+        blank=True,
+        help_text=_('The size of the response body in bytes.')
+    )
+
+    objects = TransactionResponseManager()
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['transaction', 'created_at'], name='sagepaypi_response_tx_idx'),
+            models.Index(fields=['created_at', 'step'], name='sagepaypi_response_created_idx')
+        ]
+
+    @classmethod
+    def from_result(cls, transaction, step, result):
+        """
+        An unsaved response of a ``GatewayResult``, with the metrics of the call when it was measured.
+        """
+
+        metrics = result.metrics.as_dict() if result.metrics else {}
+        return cls(transaction=transaction, step=step, status_code=result.status_code, data=result.data, **metrics)
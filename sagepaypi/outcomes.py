@@ -0,0 +1,64 @@
+import random
+
+from django.core.cache import caches
+
+from sagepaypi.conf import get_setting
+from sagepaypi.gateway import SagepayHttpResponse
+from sagepaypi.results import TransactionResult
+
+
+# statuses the outcome of a transaction does not change from, unless it is released, aborted or voided
+TERMINAL_STATUSES = ['Ok', 'NotAuthed', 'Rejected', 'Malformed', 'Invalid']
+
+
+def is_terminal(status):
+    return status in TERMINAL_STATUSES
+
+
+def outcome_cache_key(transaction_id):
+    return 'sagepaypi:outcome:%s' % transaction_id
+
+
+def get_cached_outcome(transaction_id):
+    """
+    The terminal outcome of a transaction from the cache set by ``SAGEPAYPI_OUTCOME_CACHE``, or ``None``.
+    """
+
+    alias = get_setting('OUTCOME_CACHE')
+    if not alias:
+        return None
+
+    cached = caches[alias].get(outcome_cache_key(transaction_id))
+    return TransactionResult(*cached) if cached else None
+
+
+def cache_outcome(transaction_id, result):
+    """
+    Cache the outcome of a transaction once it has a terminal status, any other outcome
+    removes the cached outcome so it is looked up again.
+    """
+
+    alias = get_setting('OUTCOME_CACHE')
+    if not alias:
+        return
+
+    key = outcome_cache_key(transaction_id)
+
+    if result.status_code == SagepayHttpResponse.HTTP_200 and is_terminal(result.status):
+        caches[alias].set(key, (result.status_code, dict(result.data)), get_setting('OUTCOME_CACHE_TIMEOUT'))
+    else:
+        caches[alias].delete(key)
+
+
+def poll_delay(polls, random=random.random):
+    """
+    The seconds until the next outcome poll of a transaction that has been polled ``polls`` times.
+
+    The delay doubles from ``SAGEPAYPI_OUTCOME_POLL_INTERVAL`` with each poll up to
+    ``SAGEPAYPI_OUTCOME_POLL_MAX_INTERVAL``, half of it is random so transactions submitted
+    together are not all polled together.
+    """
+
+    interval = get_setting('OUTCOME_POLL_INTERVAL')
+    delay = min(get_setting('OUTCOME_POLL_MAX_INTERVAL'), interval * 2 ** min(polls, 32))
+    return delay / 2 + random() * delay / 2
@@ -0,0 +1,214 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+import time
+
+from django.core.cache import caches
+
+from sagepaypi.conf import get_setting
+
+
+# priority lanes, batch calls give way to interactive calls
+INTERACTIVE = 'interactive'
+BATCH = 'batch'
+
+_priority = ContextVar('sagepaypi_priority', default=INTERACTIVE)
+
+# tolerance for floating point errors when comparing tokens
+EPSILON = 1e-9
+
+
+def current_priority():
+    """
+    The priority lane of calls made in the current context.
+    """
+    return _priority.get()
+
+
+@contextmanager
+def priority(lane):
+    """
+    Make calls to Sage Pay within the block in the given priority lane, ie::
+
+        with priority(BATCH):
+            transaction.get_transaction_outcome()
+    """
+
+    token = _priority.set(lane)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """
+    Thread safe token bucket used to limit the rate of calls made to Sage Pay.
+
+    Tokens are added at ``rate`` per second up to ``capacity``, each call takes a token
+    and waits until one would have been available when the bucket is empty.
+
+    Batch calls leave ``reserve`` tokens in the bucket for interactive calls, so interactive
+    calls are served first when the bucket is running low. The reserve always leaves a token
+    for batch calls, a bucket of a single token has none.
+    """
+
+    def __init__(self, rate, capacity=None, reserve=0, name=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(rate, 1))
+        # batch calls could never be served if the reserve left less than a token
+        self.reserve = max(0.0, min(float(reserve), self.capacity - 1))
+        self.name = name
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated_at = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def try_acquire(self, tokens=1, priority=INTERACTIVE):
+        """
+        Take tokens from the bucket without waiting.
+
+        :returns: 0 when the tokens were taken, otherwise the seconds to wait before trying again.
+        """
+
+        required = tokens + (self.reserve if priority == BATCH else 0)
+
+        with self.lock:
+            self._refill()
+            if self.tokens + EPSILON >= required:
+                self.tokens -= tokens
+                return 0
+            return (required - self.tokens) / self.rate
+
+    def acquire(self, tokens=1, priority=INTERACTIVE):
+        """
+        Take tokens from the bucket, waiting until they are available.
+
+        Interactive calls reserve their tokens straight away so they are served in the order
+        they arrive, batch calls wait until there are tokens to spare above the reserve.
+        """
+
+        if priority == BATCH:
+            while True:
+                wait = self.try_acquire(tokens, priority)
+                if not wait:
+                    return
+                self.sleep(wait)
+
+        with self.lock:
+            self._refill()
+            self.tokens -= tokens
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+
+        if wait:
+            self.sleep(wait)
+
+    def drain(self):
+        """
+        Empty the bucket, used when Sage Pay reports that calls are being throttled.
+        """
+
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.tokens, 0)
+
+
+class CacheRateLimiter:
+    """
+    Rate limiter shared between processes through the Django cache, ie Redis or Memcached.
+
+    Calls are counted in fixed windows with atomic increments, batch calls can only use
+    the window up to the limit less the ``reserve`` kept for interactive calls. The reserve
+    always leaves room for a batch call in each window.
+    """
+
+    def __init__(self, rate, capacity=None, reserve=0, name=None, cache_alias=None,
+                 clock=time.time, sleep=time.sleep):
+        self.rate = float(rate)
+        self.window = max(1.0, 1.0 / self.rate)
+        self.limit = capacity or self.rate * self.window
+        # batch calls could never be served if the reserve left less than a call a window
+        self.reserve = max(0.0, min(float(reserve), self.limit - 1))
+        self.name = name or 'default'
+        self.cache = caches[cache_alias or get_setting('RATE_LIMIT_CACHE')]
+        self.clock = clock
+        self.sleep = sleep
+
+    def _key(self, window):
+        return 'sagepaypi:ratelimit:%s:%s' % (self.name, window)
+
+    def try_acquire(self, tokens=1, priority=INTERACTIVE):
+        """
+        Count the call against the current window without waiting.
+
+        :returns: 0 when the call is allowed, otherwise the seconds until the next window.
+        """
+
+        now = self.clock()
+        window = int(now // self.window)
+        key = self._key(window)
+        limit = self.limit - (self.reserve if priority == BATCH else 0)
+
+        self.cache.add(key, 0, timeout=int(self.window) + 1)
+        try:
+            count = self.cache.incr(key, tokens)
+        except ValueError:
+            # the window expired between add and incr
+            self.cache.set(key, tokens, timeout=int(self.window) + 1)
+            count = tokens
+
+        if count <= limit + EPSILON:
+            return 0
+
+        self.cache.decr(key, tokens)
+        return (window + 1) * self.window - now
+
+    def acquire(self, tokens=1, priority=INTERACTIVE):
+        """
+        Count the call against the current window, waiting for a window with room for it.
+        """
+
+        while True:
+            wait = self.try_acquire(tokens, priority)
+            if not wait:
+                return
+            self.sleep(wait)
+
+    def drain(self):
+        """
+        Use up the current window, used when Sage Pay reports that calls are being throttled.
+        """
+
+        window = int(self.clock() // self.window)
+        self.cache.set(self._key(window), self.limit, timeout=int(self.window) + 1)
+
+
+class NoRateLimit:
+    """
+    Rate limiter that never waits.
+    """
+
+    def try_acquire(self, tokens=1, priority=INTERACTIVE):
+        return 0
+
+    def acquire(self, tokens=1, priority=INTERACTIVE):
+        pass
+
+    def drain(self):
+        pass
+
+
+def get_rate_limiter(rate):
+    """
+    Get a rate limiter for the number of calls per second, a falsy rate is not limited.
+    """
+
+    if not rate:
+        return NoRateLimit()
+    return TokenBucket(rate)
@@ -0,0 +1,149 @@
+from datetime import datetime
+import dateutil.parser
+
+
+def parse_datetime(value):
+    """
+    Parse an ISO 8601 date from Sage Pay, falling back to dateutil for anything
+    ``datetime.fromisoformat`` cannot parse.
+    """
+
+    if not value:
+        return None
+
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return dateutil.parser.parse(value)
+
+
+class GatewayResult:
+    """
+    The result of a call to Sage Pay, the response is parsed once when the result is created.
+
+    ``status_code`` is the http status code, ``data`` the decoded json, ``raw`` the bytes
+    received and ``metrics`` the ``CallMetrics`` of the call when the transport measured it.
+    ``json()`` returns ``data`` so a result can be used as a response.
+    """
+
+    __slots__ = ('status_code', 'data', 'raw', 'metrics')
+
+    def __init__(self, status_code, data, raw=None, metrics=None):
+        self.status_code = status_code
+        self.data = data if data is not None else {}
+        self.raw = raw
+        self.metrics = metrics
+
+    @classmethod
+    def from_response(cls, response):
+        """
+        The result of a response, a result of this class is returned as it is.
+        """
+
+        if isinstance(response, cls):
+            return response
+
+        try:
+            data = response.json()
+        except ValueError:
+            data = {}
+
+        return cls(
+            response.status_code,
+            data,
+            getattr(response, 'content', None),
+            metrics=getattr(response, 'metrics', None)
+        )
+
+    def __repr__(self):
+        return '<%s: %s>' % (self.__class__.__name__, self.status_code)
+
+    def json(self):
+        return self.data
+
+    @property
+    def errors(self):
+        """
+        The errors of a 422 response, a list of dicts with the ``property`` and ``clientMessage``.
+        """
+
+        errors = self.data.get('errors')
+        return errors if isinstance(errors, list) else []
+
+
+class TransactionResult(GatewayResult):
+    """
+    The result of submitting a transaction, getting its outcome or its 3-D Secure status.
+
+    ``transaction_status_code`` is the status code of the transaction on Sage Pay, ie "0000".
+    """
+
+    __slots__ = (
+        'transaction_id',
+        'transaction_type',
+        'status',
+        'transaction_status_code',
+        'status_detail',
+        'retrieval_reference',
+        'bank_authorisation_code',
+        'acs_url',
+        'pareq',
+        'creq',
+        'secure_status',
+        'avs_cvc_status',
+        'bank_response_code',
+        'card_type',
+        'card_last_four',
+    )
+
+    def __init__(self, status_code, data, raw=None, metrics=None):
+        super().__init__(status_code, data, raw, metrics)
+        data = self.data
+        secure = data.get('3DSecure')
+        avs_cvc = data.get('avsCvcCheck')
+        payment_method = data.get('paymentMethod')
+        card = payment_method.get('card') if isinstance(payment_method, dict) else None
+
+        self.transaction_id = data.get('transactionId')
+        self.transaction_type = data.get('transactionType')
+        self.status = data.get('status')
+        self.transaction_status_code = data.get('statusCode')
+        self.status_detail = data.get('statusDetail')
+        self.retrieval_reference = data.get('retrievalReference')
+        self.bank_authorisation_code = data.get('bankAuthorisationCode')
+        self.acs_url = data.get('acsUrl')
+        self.pareq = data.get('paReq')
+        self.creq = data.get('cReq')
+        self.secure_status = secure.get('status') if isinstance(secure, dict) else None
+        self.avs_cvc_status = avs_cvc.get('status') if isinstance(avs_cvc, dict) else None
+        self.bank_response_code = data.get('bankResponseCode')
+        self.card_type = card.get('cardType') if isinstance(card, dict) else None
+        self.card_last_four = card.get('lastFourDigits') if isinstance(card, dict) else None
+
+
+class InstructionResult(GatewayResult):
+    """
+    The result of a transaction instruction.
+    """
+
+    __slots__ = ('instruction_type', 'date')
+
+    def __init__(self, status_code, data, raw=None, metrics=None):
+        super().__init__(status_code, data, raw, metrics)
+        self.instruction_type = self.data.get('instructionType')
+        self.date = parse_datetime(self.data.get('date'))
+
+
+class CardIdentifierResult(GatewayResult):
+    """
+    The result of creating a card identifier, with the merchant session key it was created with.
+    """
+
+    __slots__ = ('merchant_session_key', 'card_identifier', 'expiry', 'card_type')
+
+    def __init__(self, status_code, data, raw=None, merchant_session_key=None, metrics=None):
+        super().__init__(status_code, data, raw, metrics)
+        self.merchant_session_key = merchant_session_key
+        self.card_identifier = self.data.get('cardIdentifier')
+        self.expiry = parse_datetime(self.data.get('expiry'))
+        self.card_type = self.data.get('cardType')
@@ -0,0 +1,186 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+import random
+
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+from sagepaypi.conf import get_setting
+
+
+# the models kept in the archive database
+ARCHIVE_MODELS = [
+    'archivedtransaction',
+    'archivedtransactionresponse',
+]
+
+# the models always read from a replica, they are only written by scheduled commands
+REPLICA_MODELS = [
+    'dailysummary',
+]
+
+_use_replica = ContextVar('sagepaypi_use_replica', default=False)
+_written = ContextVar('sagepaypi_written', default=False)
+
+
+@contextmanager
+def read_replica():
+    """
+    Read the Sage Pay models from a replica within the block, ie::
+
+        with read_replica():
+            transactions = list(Transaction.objects.filter(status='Ok'))
+
+    Once a model is written within the block the rest of the block reads from the
+    primary, so the changes are read back.
+    """
+
+    use_replica = _use_replica.set(True)
+    written = _written.set(False)
+    try:
+        yield
+    finally:
+        _written.reset(written)
+        _use_replica.reset(use_replica)
+
+
+def use_read_replica(view):
+    """
+    Decorate a read only view to read the Sage Pay models from a replica, template
+    responses are rendered within the view so their queries are made on the replica.
+    """
+
+    @wraps(view)
+    def wrapped_view(*args, **kwargs):
+        with read_replica():
+            response = view(*args, **kwargs)
+            if hasattr(response, 'render') and callable(response.render):
+                response.render()
+            return response
+
+    return wrapped_view
+
+
+def get_replica():
+    """
+    A replica from ``SAGEPAYPI_READ_REPLICAS``, or the default database when there are none.
+    """
+
+    replicas = get_setting('READ_REPLICAS')
+    return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+
+def _sticky_key(pk):
+    return 'sagepaypi:primary:%s' % pk
+
+
+def pin_to_primary(transaction):
+    """
+    Read the transaction from the primary for ``SAGEPAYPI_READ_REPLICA_STICKY_SECONDS``,
+    until the replicas have caught up with a change made to it.
+    """
+
+    if get_setting('READ_REPLICAS'):
+        caches[get_setting('READ_REPLICA_CACHE')].set(
+            _sticky_key(transaction.pk), True, get_setting('READ_REPLICA_STICKY_SECONDS')
+        )
+
+
+def is_pinned_to_primary(pk):
+    """
+    Whether the transaction was changed too recently to be read from a replica.
+    """
+
+    if not get_setting('READ_REPLICAS'):
+        return False
+    return bool(caches[get_setting('READ_REPLICA_CACHE')].get(_sticky_key(pk)))
+
+
+class ReplicaRouter:
+    """
+    Database router that sends reads of the Sage Pay models made within ``read_replica``
+    to one of ``SAGEPAYPI_READ_REPLICAS``, writes always go to the default database, ie::
+
+        DATABASE_ROUTERS = ['sagepaypi.routers.ReplicaRouter']
+    """
+
+    def is_routed_model(self, model):
+        return model._meta.app_label == 'sagepaypi' and model._meta.model_name not in ARCHIVE_MODELS
+
+    def db_for_read(self, model, **hints):
+        if not self.is_routed_model(model) or not get_setting('READ_REPLICAS'):
+            return None
+
+        if model._meta.model_name in REPLICA_MODELS:
+            return get_replica()
+
+        if not _use_replica.get() or _written.get():
+            return DEFAULT_DB_ALIAS
+
+        instance = hints.get('instance')
+        if instance is not None and is_pinned_to_primary(instance.pk):
+            return DEFAULT_DB_ALIAS
+
+        return get_replica()
+
+    def db_for_write(self, model, **hints):
+        if not self.is_routed_model(model) or not get_setting('READ_REPLICAS'):
+            return None
+
+        if _use_replica.get():
+            _written.set(True)
+
+        # objects read from a replica are saved to the primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if not get_setting('READ_REPLICAS'):
+            return None
+
+        databases = [DEFAULT_DB_ALIAS] + list(get_setting('READ_REPLICAS'))
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replicas are copies of the default database
+        if db in get_setting('READ_REPLICAS'):
+            return False
+        return None
+
+
+class ArchiveRouter:
+    """
+    Database router that keeps the archive tables in ``SAGEPAYPI_ARCHIVE_DATABASE``,
+    only needed when the archive is a separate database, ie::
+
+        DATABASE_ROUTERS = ['sagepaypi.routers.ArchiveRouter']
+    """
+
+    def is_archive_model(self, model):
+        return model._meta.app_label == 'sagepaypi' and model._meta.model_name in ARCHIVE_MODELS
+
+    def db_for_read(self, model, **hints):
+        if self.is_archive_model(model):
+            return get_setting('ARCHIVE_DATABASE')
+
+    def db_for_write(self, model, **hints):
+        if self.is_archive_model(model):
+            return get_setting('ARCHIVE_DATABASE')
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if self.is_archive_model(type(obj1)) and self.is_archive_model(type(obj2)):
+            return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label != 'sagepaypi' or model_name is None:
+            return None
+
+        archive_database = get_setting('ARCHIVE_DATABASE')
+
+        if model_name in ARCHIVE_MODELS:
+            return db == archive_database
+        if db == archive_database and archive_database != 'default':
+            return False
+        return None
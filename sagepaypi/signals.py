@@ -0,0 +1,8 @@
+from django.dispatch import Signal
+
+
+# sent when the connections to Sage Pay have been warmed up, with the arguments
+# ``duration`` in seconds, ``hosts`` the addresses resolved of each host,
+# ``connections`` the number of connections opened and ``merchant_session_key``
+# whether a merchant session key was prefetched
+warmed_up = Signal()
@@ -0,0 +1,124 @@
+import threading
+import time
+import uuid
+
+from django.core.cache import caches
+
+
+class Flight:
+    """
+    A call in flight, the calls waiting for it share its result or error.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key, the first call is made and the calls made
+    while it is in flight wait for it and share its result.
+
+    Calls are coalesced within the process and, when a cache is given, between processes through
+    a lock in the cache. Results shared between processes are stored in the cache with ``dumps``
+    and rebuilt with ``loads``.
+    """
+
+    def __init__(self, name, dumps=None, loads=None, poll_interval=0.05, sleep=time.sleep):
+        self.name = name
+        self.dumps = dumps or (lambda result: result)
+        self.loads = loads or (lambda value: value)
+        self.poll_interval = poll_interval
+        self.sleep = sleep
+        self.flights = {}
+        self.lock = threading.Lock()
+
+    def do(self, key, func, cache_alias=None, timeout=10):
+        """
+        Call ``func`` unless a call with the same key is in flight, in which case wait for its result.
+
+        :param key: the key of the call, ie the id of a transaction.
+        :param func: the call, taking no arguments.
+        :param cache_alias: the cache to coalesce the calls of other processes through, ``None`` to only
+            coalesce the calls of this process.
+        :param timeout: the seconds to wait for a call in another process before making the call.
+
+        :returns: ``(result, shared)``, ``shared`` being ``True`` when the result is of another call.
+        """
+
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = Flight()
+            else:
+                flight.waiters += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result[0], True
+
+        try:
+            if cache_alias:
+                flight.result = self.do_in_cache(key, func, caches[cache_alias], timeout)
+            else:
+                flight.result = func(), False
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+
+    def lock_key(self, key):
+        return 'sagepaypi:flight:%s:%s' % (self.name, key)
+
+    def result_key(self, key, token):
+        return 'sagepaypi:flight:%s:%s:%s' % (self.name, key, token)
+
+    def do_in_cache(self, key, func, cache, timeout):
+        """
+        Call ``func`` holding the lock of the key in the cache, or wait for the result of the
+        process holding it. The call is made anyway when that process does not store a result
+        within ``timeout`` seconds, ie when its call failed.
+        """
+
+        lock_key = self.lock_key(key)
+        token = uuid.uuid4().hex
+
+        if cache.add(lock_key, token, timeout):
+            try:
+                result = func()
+                cache.set(self.result_key(key, token), self.dumps(result), timeout)
+                return result, False
+            finally:
+                if cache.get(lock_key) == token:
+                    cache.delete(lock_key)
+
+        deadline = time.monotonic() + timeout
+        leader = cache.get(lock_key)
+
+        while leader and time.monotonic() < deadline:
+            value = cache.get(self.result_key(key, leader))
+            if value is not None:
+                return self.loads(value), True
+
+            current = cache.get(lock_key)
+            if current is None:
+                # the lock is released once the result is stored, check for it once more
+                value = cache.get(self.result_key(key, leader))
+                if value is not None:
+                    return self.loads(value), True
+                break
+
+            leader = current
+            self.sleep(self.poll_interval)
+
+        return func(), False
@@ -1,4 +1,7 @@
 from django.template import Library
+from django.utils.encoding import force_str
+
+from sagepaypi.http import get_term_url
 
 register = Library()
 
@@ -9,12 +12,21 @@ def sagepay_secure_redirect_form(context, transaction, **kwargs):
     request = context['request']
     host = request.META.get('HTTP_HOST')
     protocol = request.is_secure() and "https" or "http"
-    return {
+    context = {
         'domain': host,
         'protocol': protocol,
         'acsurl': transaction.acs_url,
         'pareq': transaction.pareq,
-        'tidb64': tidb64.decode('utf-8'),
+        'creq': transaction.creq,
+        'tidb64': force_str(tidb64),
         'token': token,
         'transaction_id': transaction.transaction_id
     }
+
+    # a 3-D Secure 2 challenge posts the creq, otherwise the pareq is posted with the TermUrl
+    if transaction.creq:
+        context['session_data'] = transaction.get_3d_secure_session_data()
+    else:
+        context['term_url'] = get_term_url(request, transaction)
+
+    return context
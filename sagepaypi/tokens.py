@@ -17,7 +17,13 @@ class TransactionTokenGenerator:
         """
         Return a token that can be used once to do a transaction update.
         """
-        return self._make_token_with_timestamp(transaction, self._num_days(self._today()))
+        return self._make_token_with_timestamp(transaction, self.current_timestamp())
+
+    def current_timestamp(self):
+        """
+        The timestamp of tokens made today, the number of days since 2001-1-1.
+        """
+        return self._num_days(self._today())
 
     def check_token(self, transaction, token):
         """
@@ -45,7 +51,7 @@ class TransactionTokenGenerator:
         # link is generated 5 minutes before midnight and used 6 minutes later,
         # that counts as 1 day. Therefore, SAGEPAYPI_TOKEN_URL_DAYS_VALID = 1 means
         # "at least 1 day, could be up to 2."
-        if (self._num_days(self._today()) - ts) > get_setting('TOKEN_URL_DAYS_VALID'):
+        if (self.current_timestamp() - ts) > get_setting('TOKEN_URL_DAYS_VALID'):
             return False
 
         return True
@@ -0,0 +1,210 @@
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from django.core.exceptions import ImproperlyConfigured
+
+from sagepaypi.conf import get_setting
+from sagepaypi.jsoncodec import get_codec, loads_raw
+
+
+class CallMetrics:
+    """
+    How long a call to Sage Pay took and how much was sent, times are in milliseconds and sizes in bytes.
+
+    ``time_to_first_byte`` is the time until the headers of the response were received and
+    ``retry_count`` the number of times the connection was retried, ``None`` when they are not known.
+    """
+
+    __slots__ = ('duration', 'time_to_first_byte', 'retry_count', 'request_size', 'response_size')
+
+    def __init__(self, duration=None, time_to_first_byte=None, retry_count=None, request_size=None,
+                 response_size=None):
+        self.duration = duration
+        self.time_to_first_byte = time_to_first_byte
+        self.retry_count = retry_count
+        self.request_size = request_size
+        self.response_size = response_size
+
+    def __repr__(self):
+        return '<CallMetrics: %sms>' % self.duration
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def body_size(body):
+    if body is None:
+        return 0
+    if isinstance(body, str):
+        return len(body.encode())
+    return len(body)
+
+
+class TransportResponse:
+    """
+    The response of a transport, ``json()`` is decoded by the json codec and keeps the raw content.
+
+    ``metrics`` are the ``CallMetrics`` of the call.
+    """
+
+    def __init__(self, response, metrics=None):
+        self.response = response
+        self.status_code = response.status_code
+        self.content = response.content
+        self.metrics = metrics
+        self._json = None
+
+    def __getattr__(self, name):
+        return getattr(self.response, name)
+
+    def json(self):
+        if self._json is None:
+            self._json = loads_raw(self.content)
+        return self._json
+
+
+class BaseTransport:
+    """
+    Sends the http requests of a gateway.
+
+    ``get``, ``post`` and ``head`` take the arguments of ``requests`` and return a response
+    with ``status_code`` and ``json()``, and ``metrics`` when the transport measures its calls.
+    A transport is shared by the threads of a process.
+    """
+
+    def encode(self, kwargs):
+        """
+        Encode the ``json`` argument with the json codec rather than leaving it to the http client.
+        """
+
+        if kwargs.get('json') is not None:
+            kwargs['data'] = get_codec().dumps(kwargs.pop('json'))
+            kwargs['headers'] = dict(kwargs.get('headers') or {}, **{'Content-Type': 'application/json'})
+        return kwargs
+
+    def get(self, url, **kwargs):
+        raise NotImplementedError
+
+    def post(self, url, **kwargs):
+        raise NotImplementedError
+
+    def head(self, url, **kwargs):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class RequestsTransport(BaseTransport):
+    """
+    HTTP/1.1 with a ``requests.Session``, keeping up to ``pool_size`` connections alive.
+
+    Connections that fail are retried up to ``SAGEPAYPI_CONNECT_RETRIES`` times, only before
+    anything has been sent so a payment is never submitted twice.
+    """
+
+    def __init__(self, pool_size=None):
+        self.pool_size = pool_size or get_setting('CONNECTION_POOL_SIZE')
+        retries = Retry(total=None, connect=get_setting('CONNECT_RETRIES'), read=0, redirect=0, status=0, other=0)
+        self.session = requests.Session()
+        for prefix in ['https://', 'http://']:
+            self.session.mount(
+                prefix,
+                HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retries)
+            )
+
+    def send(self, method, url, kwargs):
+        start = time.perf_counter()
+        response = getattr(self.session, method)(url, **self.encode(kwargs))
+        duration = time.perf_counter() - start
+
+        # elapsed is the time until the headers of the response were parsed
+        retries = getattr(response.raw, 'retries', None)
+        return TransportResponse(response, CallMetrics(
+            duration=duration * 1000,
+            time_to_first_byte=response.elapsed.total_seconds() * 1000,
+            retry_count=len(retries.history) if retries is not None else 0,
+            request_size=body_size(response.request.body),
+            response_size=len(response.content)
+        ))
+
+    def get(self, url, **kwargs):
+        return self.send('get', url, kwargs)
+
+    def post(self, url, **kwargs):
+        return self.send('post', url, kwargs)
+
+    def head(self, url, **kwargs):
+        return self.session.head(url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+class HTTP2Transport(BaseTransport):
+    """
+    HTTP/2 with an ``httpx.Client``, concurrent calls are multiplexed over a connection
+    rather than each using a connection of their own.
+
+    Requires ``pip install django-sagepaypi[http2]``.
+    """
+
+    def __init__(self, pool_size=None):
+        try:
+            import httpx
+        except ImportError:
+            raise ImproperlyConfigured('HTTP2Transport requires httpx, pip install django-sagepaypi[http2]')
+
+        self.pool_size = pool_size or get_setting('CONNECTION_POOL_SIZE')
+        self.client = httpx.Client(
+            transport=httpx.HTTPTransport(
+                http2=True,
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+                retries=get_setting('CONNECT_RETRIES')
+            ),
+            event_hooks={'response': [self.headers_received]}
+        )
+
+    @staticmethod
+    def headers_received(response):
+        # called before the body is read
+        response.headers_received_at = time.perf_counter()
+
+    def request_kwargs(self, kwargs):
+        # httpx takes basic auth as a tuple and the encoded body as content
+        auth = kwargs.get('auth')
+        if isinstance(auth, requests.auth.HTTPBasicAuth):
+            kwargs['auth'] = (auth.username, auth.password)
+        kwargs = self.encode(kwargs)
+        if 'data' in kwargs:
+            kwargs['content'] = kwargs.pop('data')
+        return kwargs
+
+    def send(self, method, url, kwargs):
+        start = time.perf_counter()
+        response = getattr(self.client, method)(url, **self.request_kwargs(kwargs))
+        duration = time.perf_counter() - start
+        headers_received_at = getattr(response, 'headers_received_at', None)
+
+        # httpx does not report the connections it retried
+        return TransportResponse(response, CallMetrics(
+            duration=duration * 1000,
+            time_to_first_byte=(headers_received_at - start) * 1000 if headers_received_at else None,
+            request_size=body_size(response.request.content),
+            response_size=len(response.content)
+        ))
+
+    def get(self, url, **kwargs):
+        return self.send('get', url, kwargs)
+
+    def post(self, url, **kwargs):
+        return self.send('post', url, kwargs)
+
+    def head(self, url, **kwargs):
+        return self.client.head(url, **self.request_kwargs(kwargs))
+
+    def close(self):
+        self.client.close()
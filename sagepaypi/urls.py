@@ -10,5 +10,10 @@ urlpatterns = [
         'transactions/<tidb64>/<token>/3d-secure/complete/',
         views.Complete3DSecureView.as_view(),
         name='complete_3d_secure'
+    ),
+    path(
+        'transactions/3d-secure/challenge/complete/',
+        views.Complete3DSecureChallengeView.as_view(),
+        name='complete_3d_secure_challenge'
     )
 ]
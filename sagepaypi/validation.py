@@ -0,0 +1,224 @@
+import re
+
+from django.utils.translation import gettext as _
+
+from sagepaypi.exceptions import InvalidTransactionStatus
+
+
+# postal code formats checked by country, countries not listed are only checked for length.
+# GB is left out as the Sage Pay sandbox uses postcodes such as "412" for its test cards.
+POSTAL_CODE_FORMATS = {
+    'US': r'^\d{5}(-\d{4})?$',
+    'CA': r'^[A-Za-z]\d[A-Za-z] ?\d[A-Za-z]\d$',
+}
+
+# the constraints Sage Pay checks on each payload, each property has:
+#   required: always required, or a dict of ``{property: values}`` it is required when
+#   not_required: a dict of ``{property: values}`` it is not required when
+#   type, choices, max_length, min, pattern: constraints checked when present
+#   formats: ``(property, formats)`` patterns chosen by the value of another property
+SCHEMAS = {
+    'transaction': {
+        'transactionType': {'required': True, 'choices': ['Payment', 'Deferred', 'Refund', 'Repeat']},
+        'vendorTxCode': {'required': True, 'type': str, 'max_length': 40},
+        'amount': {'required': True, 'type': int, 'min': 1},
+        'currency': {'required': True, 'type': str, 'pattern': r'^[A-Z]{3}$'},
+        'description': {'required': True, 'type': str, 'max_length': 100},
+        'paymentMethod.card.merchantSessionKey': {
+            'required': {'transactionType': ['Payment', 'Deferred']},
+            'type': str
+        },
+        'paymentMethod.card.cardIdentifier': {
+            'required': {'transactionType': ['Payment', 'Deferred']},
+            'type': str
+        },
+        'customerFirstName': {
+            'required': {'transactionType': ['Payment', 'Deferred']},
+            'type': str,
+            'max_length': 20
+        },
+        'customerLastName': {
+            'required': {'transactionType': ['Payment', 'Deferred']},
+            'type': str,
+            'max_length': 20
+        },
+        'billingAddress.address1': {
+            'required': {'transactionType': ['Payment', 'Deferred']},
+            'type': str,
+            'max_length': 50
+        },
+        'billingAddress.address2': {'type': str, 'max_length': 50},
+        'billingAddress.city': {
+            'required': {'transactionType': ['Payment', 'Deferred']},
+            'type': str,
+            'max_length': 40
+        },
+        'billingAddress.postalCode': {
+            'required': {'transactionType': ['Payment', 'Deferred']},
+            'not_required': {'billingAddress.country': ['IE']},
+            'type': str,
+            'max_length': 10,
+            'formats': ('billingAddress.country', POSTAL_CODE_FORMATS)
+        },
+        'billingAddress.country': {
+            'required': {'transactionType': ['Payment', 'Deferred']},
+            'type': str,
+            'pattern': r'^[A-Z]{2}$'
+        },
+        'billingAddress.state': {
+            'required': {'billingAddress.country': ['US']},
+            'type': str,
+            'max_length': 2
+        },
+        'referenceTransactionId': {
+            'required': {'transactionType': ['Refund', 'Repeat']},
+            'type': str,
+            'max_length': 36
+        },
+    },
+    'instruction': {
+        'instructionType': {'required': True, 'choices': ['release', 'abort', 'void']},
+        'amount': {
+            'required': {'instructionType': ['release', 'abort']},
+            'type': int,
+            'min': 1
+        },
+    },
+    '3d-secure': {
+        'paRes': {'required': True, 'type': str},
+    },
+    '3d-secure-challenge': {
+        'cRes': {'required': True, 'type': str},
+        'threeDSSessionData': {'required': True, 'type': str},
+    },
+}
+
+
+class PreflightError(InvalidTransactionStatus):
+    """
+    Raised when a payload would be rejected by Sage Pay, before it is sent.
+
+    ``errors`` are in the format of the errors of a Sage Pay 422 response,
+    a list of dicts with the ``property`` and ``clientMessage``.
+    """
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('; '.join('%s: %s' % (e['property'], e['clientMessage']) for e in errors))
+
+
+MISSING = object()
+
+
+def lookup(data, path):
+    for key in path:
+        if not isinstance(data, dict) or key not in data:
+            return MISSING
+        data = data[key]
+    return data
+
+
+def compile_condition(condition):
+    """
+    Compile ``{property: values}`` into a function of the payload.
+    """
+
+    if condition is True:
+        return lambda data: True
+
+    checks = [(tuple(name.split('.')), tuple(values)) for name, values in condition.items()]
+    return lambda data: all(lookup(data, path) in values for path, values in checks)
+
+
+def compile_property(name, rules):
+    """
+    Compile the rules of a property into a function of the payload that returns an error message or ``None``.
+    """
+
+    path = tuple(name.split('.'))
+    required = compile_condition(rules['required']) if 'required' in rules else None
+    not_required = compile_condition(rules['not_required']) if 'not_required' in rules else None
+    value_type = rules.get('type')
+    choices = tuple(rules['choices']) if 'choices' in rules else None
+    max_length = rules.get('max_length')
+    minimum = rules.get('min')
+    pattern = re.compile(rules['pattern']) if 'pattern' in rules else None
+
+    formats = None
+    if 'formats' in rules:
+        other, patterns = rules['formats']
+        formats = tuple(other.split('.')), {key: re.compile(value) for key, value in patterns.items()}
+
+    def check(data):
+        value = lookup(data, path)
+
+        if value is MISSING or value is None or value == '':
+            if required and required(data) and not (not_required and not_required(data)):
+                return _('is required')
+            return None
+
+        # bool is an int but never a valid amount
+        if value_type and (not isinstance(value, value_type) or isinstance(value, bool)):
+            return _('must be a %s') % ('number' if value_type is int else 'string')
+
+        if choices is not None and value not in choices:
+            return _('must be one of %s') % ', '.join(sorted(choices))
+
+        if max_length is not None and len(value) > max_length:
+            return _('must be at most %s characters') % max_length
+
+        if minimum is not None and value < minimum:
+            return _('must be at least %s') % minimum
+
+        if pattern and not pattern.match(value):
+            return _('is not in a valid format')
+
+        if formats:
+            value_format = formats[1].get(lookup(data, formats[0]))
+            if value_format and not value_format.match(value):
+                return _('is not in a valid format')
+
+        return None
+
+    return check
+
+
+def compile_schema(schema):
+    return [(name, compile_property(name, rules)) for name, rules in schema.items()]
+
+
+# the schemas are compiled once, validating a payload is then only calling the checks
+COMPILED_SCHEMAS = {name: compile_schema(schema) for name, schema in SCHEMAS.items()}
+
+
+def get_errors(schema, data):
+    """
+    The errors of a payload in the format of a Sage Pay 422 response.
+
+    :param schema: the name of the schema, ie "transaction".
+    :param data: the payload.
+    """
+
+    errors = []
+
+    for name, check in COMPILED_SCHEMAS[schema]:
+        message = check(data)
+        if message:
+            errors.append({'property': name, 'clientMessage': message})
+
+    return errors
+
+
+def validate(schema, data):
+    """
+    Check a payload before it is sent to Sage Pay.
+
+    :param schema: the name of the schema, ie "transaction".
+    :param data: the payload.
+
+    :raises PreflightError: if Sage Pay would reject the payload.
+    """
+
+    errors = get_errors(schema, data)
+    if errors:
+        raise PreflightError(errors)
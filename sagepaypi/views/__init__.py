@@ -1 +1 @@
-from .transaction import Complete3DSecureView
+from .transaction import Complete3DSecureChallengeView, Complete3DSecureView
@@ -0,0 +1,256 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.utils.encoding import force_bytes, force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+from django.views.decorators.cache import never_cache
+from django.views.generic import View
+
+from sagepaypi.conf import get_setting
+from sagepaypi.export import TRANSACTION_FIELDS
+from sagepaypi.jsoncodec import get_codec
+from sagepaypi.models import CardIdentifier, Transaction, TransactionResponse
+from sagepaypi.routers import use_read_replica
+
+
+def encode_cursor(created_at, pk):
+    return force_str(urlsafe_base64_encode(force_bytes(json.dumps([created_at.isoformat(), str(pk)]))))
+
+
+def decode_cursor(model, cursor):
+    """
+    The ``(created_at, pk)`` of the row a page starts after.
+    """
+
+    try:
+        created_at, pk = json.loads(urlsafe_base64_decode(cursor))
+        created_at = model._meta.get_field('created_at').to_python(created_at)
+        pk = model._meta.pk.to_python(pk)
+    except (TypeError, ValueError, ValidationError):
+        raise ValidationError('Invalid cursor.')
+
+    if created_at is None or pk is None:
+        raise ValidationError('Invalid cursor.')
+
+    return created_at, pk
+
+
+class ModelListView(View):
+    """
+    A read only json list of a Sage Pay model for back office and reporting tools.
+
+    Rows are ordered by ``created_at`` and ``id``, newest first or oldest first with ``?order=asc``,
+    and paginated by a cursor of the last row of the page so each page is a range of the index
+    however deep into the table it is. The response is::
+
+        {"results": [...], "next": "https://.../?cursor=..."}
+
+    ``?fields=id,status`` selects the fields fetched, ``?limit=`` the rows per page up to
+    ``SAGEPAYPI_API_MAX_PAGE_SIZE``, any of ``filters`` filter the rows. Only staff with the view
+    permission of the model can use it, it is read from a replica when they are set up.
+    """
+
+    model = None
+    # the fields that can be selected, and those fetched when none are
+    fields = []
+    default_fields = None
+    # query parameters and the indexed lookups they filter on
+    filters = {}
+
+    @method_decorator(never_cache)
+    @method_decorator(use_read_replica)
+    def dispatch(self, request, *args, **kwargs):
+        opts = self.model._meta
+        user = request.user
+
+        if not (user.is_active and user.is_staff and user.has_perm('%s.view_%s' % (opts.app_label, opts.model_name))):
+            return self.error(403, 'You do not have permission to view %s.' % opts.verbose_name_plural)
+
+        return super().dispatch(request, *args, **kwargs)
+
+    def error(self, status, message):
+        return self.json_response({'error': message}, status=status)
+
+    def json_response(self, data, status=200):
+        return HttpResponse(get_codec().dumps(data), status=status, content_type='application/json')
+
+    def get_fields(self):
+        value = self.request.GET.get('fields')
+        if not value:
+            return list(self.default_fields or self.fields)
+
+        fields = [field for field in value.split(',') if field]
+        unknown = [field for field in fields if field not in self.fields]
+        if unknown:
+            raise ValidationError('Unknown fields: %s.' % ', '.join(unknown))
+        return fields
+
+    def get_filters(self):
+        filters = {}
+
+        for param, lookup in self.filters.items():
+            value = self.request.GET.get(param)
+            if value is None:
+                continue
+
+            field = self.model._meta.get_field(lookup.split('__')[0])
+            try:
+                value = field.to_python(value)
+            except ValidationError:
+                raise ValidationError('Invalid %s.' % param)
+
+            if field.get_internal_type() == 'DateTimeField' and timezone.is_naive(value):
+                value = timezone.make_aware(value)
+
+            filters[lookup] = value
+
+        return filters
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.GET.get('limit', get_setting('API_PAGE_SIZE')))
+        except ValueError:
+            raise ValidationError('Invalid limit.')
+
+        if limit < 1:
+            raise ValidationError('Invalid limit.')
+        return min(limit, get_setting('API_MAX_PAGE_SIZE'))
+
+    def get_descending(self):
+        order = self.request.GET.get('order', 'desc')
+        if order not in ['asc', 'desc']:
+            raise ValidationError('Invalid order, either asc or desc.')
+        return order == 'desc'
+
+    def get_queryset(self, filters, cursor, descending):
+        queryset = self.model._default_manager.filter(**filters)
+
+        if cursor:
+            created_at, pk = cursor
+            # bounded on created_at so the index range is used, the rows created at the same time
+            # as the last row of the previous page are split on the id
+            if descending:
+                queryset = queryset.filter(created_at__lte=created_at).exclude(created_at=created_at, pk__gte=pk)
+            else:
+                queryset = queryset.filter(created_at__gte=created_at).exclude(created_at=created_at, pk__lte=pk)
+
+        if descending:
+            return queryset.order_by('-created_at', '-pk')
+        return queryset.order_by('created_at', 'pk')
+
+    def get(self, request, *args, **kwargs):
+        try:
+            fields = self.get_fields()
+            filters = self.get_filters()
+            limit = self.get_limit()
+            descending = self.get_descending()
+            cursor = request.GET.get('cursor')
+            cursor = decode_cursor(self.model, cursor) if cursor else None
+        except ValidationError as e:
+            return self.error(400, ' '.join(e.messages))
+
+        queryset = self.get_queryset(filters, cursor, descending)
+        fetched = list(dict.fromkeys(fields + ['created_at', 'id']))
+        rows = list(queryset.values(*fetched)[:limit + 1])
+
+        next_url = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            params = request.GET.copy()
+            params['cursor'] = encode_cursor(rows[-1]['created_at'], rows[-1]['id'])
+            next_url = request.build_absolute_uri('?' + params.urlencode())
+
+        return self.json_response({
+            'results': [{field: row[field] for field in fields} for row in rows],
+            'next': next_url
+        })
+
+
+class TransactionListView(ModelListView):
+    model = Transaction
+    fields = TRANSACTION_FIELDS
+    filters = {
+        'id': 'id',
+        'transaction_id': 'transaction_id',
+        'vendor_tx_code': 'vendor_tx_code',
+        'card_identifier': 'card_identifier',
+        'status': 'status',
+        'type': 'type',
+        'instruction': 'instruction',
+        'avs_cvc_status': 'avs_cvc_status',
+        'secure_status': 'secure_status',
+        'bank_response_code': 'bank_response_code',
+        'card_type': 'card_type',
+        'card_last_four': 'card_last_four',
+        'created_after': 'created_at__gte',
+        'created_before': 'created_at__lt',
+    }
+
+
+class TransactionResponseListView(ModelListView):
+    model = TransactionResponse
+    fields = [
+        'id',
+        'transaction_id',
+        'created_at',
+        'step',
+        'status_code',
+        'duration',
+        'data',
+    ]
+    # the data of the responses is only fetched when it is selected
+    default_fields = [
+        'id',
+        'transaction_id',
+        'created_at',
+        'step',
+        'status_code',
+        'duration',
+    ]
+    filters = {
+        'transaction': 'transaction',
+        'step': 'step',
+        'created_after': 'created_at__gte',
+        'created_before': 'created_at__lt',
+    }
+
+
+class CardIdentifierListView(ModelListView):
+    model = CardIdentifier
+    # the card identifier and merchant session key can be used to make payments and are left out
+    fields = [
+        'id',
+        'created_at',
+        'first_name',
+        'last_name',
+        'billing_address_1',
+        'billing_address_2',
+        'billing_city',
+        'billing_country',
+        'billing_postal_code',
+        'billing_state',
+        'card_type',
+        'last_four_digits',
+        'expiry_date',
+        'card_identifier_expiry',
+        'reusable',
+        'customer_reference',
+    ]
+    default_fields = [
+        'id',
+        'created_at',
+        'card_type',
+        'last_four_digits',
+        'expiry_date',
+        'reusable',
+        'customer_reference',
+    ]
+    filters = {
+        'id': 'id',
+        'customer_reference': 'customer_reference',
+        'created_after': 'created_at__gte',
+        'created_before': 'created_at__lt',
+    }
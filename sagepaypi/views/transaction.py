@@ -1,6 +1,7 @@
 from django.http import HttpResponseRedirect, Http404
 from django.urls import reverse
 from django.utils.decorators import method_decorator
+from django.utils.encoding import force_str
 from django.views.decorators.cache import never_cache
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.debug import sensitive_post_parameters
@@ -8,7 +9,7 @@ from django.views.decorators.http import require_POST
 from django.views.generic import FormView
 
 from sagepaypi.conf import get_setting
-from sagepaypi.forms import Complete3DSecureForm
+from sagepaypi.forms import Complete3DSecureChallengeForm, Complete3DSecureForm
 from sagepaypi.models import Transaction
 
 
@@ -21,7 +22,7 @@ class Complete3DSecureView(FormView):
     @method_decorator(require_POST)
     @method_decorator(sensitive_post_parameters())
     def dispatch(self, *args, **kwargs):
-        self.transaction = Transaction.objects.get_for_token(kwargs['tidb64'], kwargs['token'])
+        self.transaction = self.get_transaction()
 
         if not self.transaction:
             raise Http404()
@@ -33,6 +34,9 @@ class Complete3DSecureView(FormView):
         else:
             return self.form_invalid(form)
 
+    def get_transaction(self):
+        return Transaction.objects.get_for_token(self.kwargs['tidb64'], self.kwargs['token'])
+
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
         kwargs.update({
@@ -49,5 +53,20 @@ class Complete3DSecureView(FormView):
 
     def get_success_url(self):
         tidb64, token = self.transaction.get_tokens()
-        kwargs = {'tidb64': tidb64.decode('utf-8'), 'token': token}
+        kwargs = {'tidb64': force_str(tidb64), 'token': token}
         return reverse(get_setting('POST_3D_SECURE_REDIRECT_URL'), kwargs=kwargs)
+
+
+class Complete3DSecureChallengeView(Complete3DSecureView):
+    """
+    The notification url the issuing bank posts the cres back to after a 3-D Secure 2 challenge,
+    the transaction is found from the tokens in the threeDSSessionData.
+    """
+
+    form_class = Complete3DSecureChallengeForm
+
+    def get_transaction(self):
+        session_data = self.request.POST.get('threeDSSessionData')
+        if not session_data:
+            return None
+        return Transaction.objects.get_for_3d_secure_session_data(session_data)
@@ -0,0 +1,153 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+import socket
+import threading
+import time
+from urllib.parse import urlparse
+
+from sagepaypi.conf import get_setting
+from sagepaypi.signals import warmed_up
+
+
+logger = logging.getLogger('sagepaypi')
+
+# seconds to wait for each connection opened by the warm up
+WARM_UP_TIMEOUT = 5
+
+_fork_hook_registered = False
+
+
+def resolve_hosts(urls):
+    """
+    Resolve the hosts of the urls so the first call does not wait on DNS.
+
+    :returns: dict of the addresses of each host, hosts that cannot be resolved are left out.
+    """
+
+    hosts = {}
+
+    for url in urls:
+        parsed = urlparse(url)
+        port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+        try:
+            info = socket.getaddrinfo(parsed.hostname, port, type=socket.SOCK_STREAM)
+        except OSError as e:
+            logger.warning('Sage Pay warm up cannot resolve %s: %s', parsed.hostname, e)
+            continue
+        hosts[parsed.hostname] = sorted({address[4][0] for address in info})
+
+    return hosts
+
+
+def open_connections(gateway, count):
+    """
+    Open connections to Sage Pay at the same time so they are kept in the pool of the gateway transport.
+
+    :returns: the number of connections opened.
+    """
+
+    transport = gateway.transport
+    url = gateway.api_url()
+
+    def connect(i):
+        try:
+            transport.head(url, timeout=WARM_UP_TIMEOUT).close()
+        except OSError as e:
+            logger.warning('Sage Pay warm up cannot connect to %s: %s', url, e)
+            return False
+        return True
+
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        return sum(executor.map(connect, range(count)))
+
+
+def warm_up(gateway=None):
+    """
+    Resolve the Sage Pay hosts, open ``SAGEPAYPI_WARM_UP_CONNECTIONS`` connections and,
+    when ``SAGEPAYPI_WARM_UP_MERCHANT_SESSION_KEY`` is set, prefetch a merchant session key.
+
+    The ``warmed_up`` signal is sent with the time taken.
+
+    :returns: the time taken in seconds.
+    """
+
+    if gateway is None:
+        from sagepaypi.gateway import default_gateway
+        gateway = default_gateway
+
+    start = time.monotonic()
+
+    hosts = resolve_hosts([gateway.api_url()])
+    connections = 0
+    if hosts:
+        connections = open_connections(gateway, get_setting('WARM_UP_CONNECTIONS'))
+
+    merchant_session_key = False
+    if connections and get_setting('WARM_UP_MERCHANT_SESSION_KEY'):
+        merchant_session_key = bool(gateway.prefetch_merchant_session_key())
+
+    duration = time.monotonic() - start
+
+    logger.info(
+        'Sage Pay warm up took %.3fs, hosts: %s, connections: %s, merchant session key: %s',
+        duration, ', '.join(hosts), connections, merchant_session_key
+    )
+    warmed_up.send(
+        sender=gateway.__class__,
+        duration=duration,
+        hosts=hosts,
+        connections=connections,
+        merchant_session_key=merchant_session_key
+    )
+
+    return duration
+
+
+def start_warm_up():
+    """
+    Warm up in a background thread so starting the worker is not held up, any error is logged.
+    """
+
+    def run():
+        try:
+            warm_up()
+        except Exception:
+            logger.exception('Sage Pay warm up failed')
+
+    thread = threading.Thread(target=run, name='sagepaypi-warm-up', daemon=True)
+    thread.start()
+    return thread
+
+
+def warm_up_after_fork():
+    """
+    Warm up a process forked after the app was loaded, ie a worker of ``gunicorn --preload``.
+
+    The pooled connections and the merchant session key inherited from the parent process are
+    dropped without closing them, they would be shared with the parent and the other workers,
+    and the locks are replaced as the warm up thread of the parent may have held them.
+    """
+
+    from sagepaypi.gateway import SagepayGateway
+
+    SagepayGateway._transports = {}
+    SagepayGateway._transports_lock = threading.Lock()
+    SagepayGateway._rate_limiters = {}
+    SagepayGateway._rate_limiters_lock = threading.Lock()
+    SagepayGateway._merchant_session_key = None
+    SagepayGateway._merchant_session_key_lock = threading.Lock()
+
+    return start_warm_up()
+
+
+def register_fork_hook():
+    """
+    Warm up each process forked from this one with ``warm_up_after_fork``, registered once.
+    """
+
+    global _fork_hook_registered
+
+    if not _fork_hook_registered:
+        os.register_at_fork(after_in_child=warm_up_after_fork)
+        _fork_hook_registered = True
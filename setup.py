@@ -16,9 +16,18 @@ install_requires = [
 
 tests_require = [
     'mock',
+    'orjson',
     'pyyaml',
 ]
 
+http2_extras = [
+    'httpx[http2]',
+]
+
+orjson_extras = [
+    'orjson',
+]
+
 documentation_extras = [
     'sphinxcontrib-spelling>=2.3.0',
     'Sphinx>=1.5.2',
@@ -48,6 +57,8 @@ setup(
     tests_require=tests_require,
     extras_require={
         'docs': documentation_extras,
+        'http2': http2_extras,
+        'orjson': orjson_extras,
         'tests': tests_require
     },
     include_package_data=True,
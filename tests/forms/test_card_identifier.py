@@ -1,31 +1,39 @@
-from datetime import date
+from datetime import date, datetime, timedelta, timezone
 
 import dateutil
 import mock
+from django.core.cache import cache
+from django.test import override_settings
 
 from sagepaypi.forms import CardIdentifierForm
+from sagepaypi.forms.card_identifier import card_digest, card_identifier_cache_key
+from sagepaypi.results import CardIdentifierResult
 from tests.mocks import card_identifier_response, card_identifier_failed_response
 from tests.test_case import AppTestCase
 
 
+def form_data():
+    return {
+        'first_name': 'Andy',
+        'last_name': 'Other',
+        'billing_address_1': '88 The Road',
+        'billing_address_2': 'Some Estate',
+        'billing_city': 'City',
+        'billing_country': 'US',
+        'billing_postal_code': '412',
+        'billing_state': 'AL',
+        'card_holder_name': 'A N OTHER',
+        'card_number': '4929000005559',
+        'card_expiry_date_0': date.today().month,
+        'card_expiry_date_1': date.today().year,
+        'card_security_code': '123'
+    }
+
+
 class TestForm(AppTestCase):
 
     def setUp(self):
-        self.data = {
-            'first_name': 'Andy',
-            'last_name': 'Other',
-            'billing_address_1': '88 The Road',
-            'billing_address_2': 'Some Estate',
-            'billing_city': 'City',
-            'billing_country': 'US',
-            'billing_postal_code': '412',
-            'billing_state': 'AL',
-            'card_holder_name': 'A N OTHER',
-            'card_number': '4929000005559',
-            'card_expiry_date_0': date.today().month,
-            'card_expiry_date_1': date.today().year,
-            'card_security_code': '123'
-        }
+        self.data = form_data()
 
     @mock.patch('sagepaypi.gateway.default_gateway')
     def test_is_valid(self, mock_gateway):
@@ -40,8 +48,8 @@ class TestForm(AppTestCase):
 
         form = CardIdentifierForm(self.data)
 
-        json = card_identifier_response()[0].json()
-        merchant_session_key = card_identifier_response()[1]
+        json = card_identifier_response().json()
+        merchant_session_key = card_identifier_response().merchant_session_key
 
         assert form.is_valid()
 
@@ -56,8 +64,8 @@ class TestForm(AppTestCase):
 
         form = CardIdentifierForm(self.data)
 
-        json = card_identifier_response()[0].json()
-        merchant_session_key = card_identifier_response()[1]
+        json = card_identifier_response().json()
+        merchant_session_key = card_identifier_response().merchant_session_key
 
         assert form.is_valid()
 
@@ -107,3 +115,119 @@ class TestForm(AppTestCase):
             'card_expiry_date': ['Error expiryDate'],
             'card_security_code': ['Error securityCode']
         })
+
+
+def valid_card_identifier_response():
+    expiry = datetime.now(timezone.utc) + timedelta(seconds=400)
+    return CardIdentifierResult(201, {
+        'cardIdentifier': 'C6F92981-8C2D-457A-AA1E-16EBCD6D3AC6',
+        'expiry': expiry.isoformat(),
+        'cardType': 'Visa'
+    }, merchant_session_key='merchant-session-key')
+
+
+class TestFormCardIdentifierReuse(AppTestCase):
+
+    def setUp(self):
+        self.data = form_data()
+        cache.clear()
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_validated_again__reuses_card_identifier(self, mock_gateway):
+        mock_gateway.create_card_identifier.return_value = card_identifier_response()
+
+        form = CardIdentifierForm(self.data)
+        self.assertTrue(form.is_valid())
+
+        form.full_clean()
+        self.assertTrue(form.is_valid())
+
+        self.assertEqual(mock_gateway.create_card_identifier.call_count, 1)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_validated_again__errors_reused(self, mock_gateway):
+        mock_gateway.create_card_identifier.return_value = card_identifier_failed_response()
+
+        form = CardIdentifierForm(self.data)
+        self.assertFalse(form.is_valid())
+
+        form.full_clean()
+
+        self.assertIn('card_number', form.errors)
+        self.assertEqual(mock_gateway.create_card_identifier.call_count, 1)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_changed_card_details__new_card_identifier(self, mock_gateway):
+        mock_gateway.create_card_identifier.return_value = card_identifier_response()
+
+        form = CardIdentifierForm(self.data)
+        self.assertTrue(form.is_valid())
+
+        form.data = dict(self.data, card_security_code='456')
+        form.full_clean()
+
+        self.assertEqual(mock_gateway.create_card_identifier.call_count, 2)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_not_cached_by_default(self, mock_gateway):
+        mock_gateway.create_card_identifier.return_value = valid_card_identifier_response()
+
+        self.assertTrue(CardIdentifierForm(self.data).is_valid())
+        self.assertTrue(CardIdentifierForm(self.data).is_valid())
+
+        self.assertEqual(mock_gateway.create_card_identifier.call_count, 2)
+
+    @override_settings(SAGEPAYPI_CARD_IDENTIFIER_CACHE='default')
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_cached__reused_by_another_form(self, mock_gateway):
+        mock_gateway.create_card_identifier.return_value = valid_card_identifier_response()
+
+        self.assertTrue(CardIdentifierForm(self.data).is_valid())
+
+        form = CardIdentifierForm(self.data)
+        self.assertTrue(form.is_valid())
+
+        self.assertEqual(mock_gateway.create_card_identifier.call_count, 1)
+        self.assertEqual(form.instance.card_identifier, 'C6F92981-8C2D-457A-AA1E-16EBCD6D3AC6')
+        self.assertEqual(form.instance.merchant_session_key, 'merchant-session-key')
+
+    @override_settings(SAGEPAYPI_CARD_IDENTIFIER_CACHE='default')
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_cached__keeps_no_card_details(self, mock_gateway):
+        mock_gateway.create_card_identifier.return_value = valid_card_identifier_response()
+
+        form = CardIdentifierForm(self.data)
+        self.assertTrue(form.is_valid())
+
+        cached = cache.get(card_identifier_cache_key(card_digest({
+            'cardholderName': 'A N OTHER',
+            'cardNumber': '4929000005559',
+            'expiryDate': date.today().strftime('%m%y'),
+            'securityCode': '123'
+        })))
+
+        self.assertIsNotNone(cached)
+        self.assertNotIn('4929000005559', str(cached))
+
+    @override_settings(SAGEPAYPI_CARD_IDENTIFIER_CACHE='default')
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_cached__not_when_about_to_expire(self, mock_gateway):
+        mock_gateway.create_card_identifier.return_value = card_identifier_response()
+
+        self.assertTrue(CardIdentifierForm(self.data).is_valid())
+        self.assertTrue(CardIdentifierForm(self.data).is_valid())
+
+        self.assertEqual(mock_gateway.create_card_identifier.call_count, 2)
+
+    @override_settings(SAGEPAYPI_CARD_IDENTIFIER_CACHE='default')
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_cached__removed_on_save(self, mock_gateway):
+        mock_gateway.create_card_identifier.return_value = valid_card_identifier_response()
+
+        form = CardIdentifierForm(self.data)
+        self.assertTrue(form.is_valid())
+        form.save()
+
+        self.assertTrue(CardIdentifierForm(self.data).is_valid())
+
+        self.assertEqual(mock_gateway.create_card_identifier.call_count, 2)
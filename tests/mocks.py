@@ -1,3 +1,6 @@
+from sagepaypi.results import CardIdentifierResult
+
+
 class MockResponse:
     def __init__(self, json_data, status_code):
         self.json_data = json_data
@@ -53,6 +56,25 @@ def auth_required_response():
     }, 202)
 
 
+def challenge_required_response():
+    return MockResponse({
+        'cReq': 'random-sagepay-challenge-request',
+        'acsUrl': 'https://test.sagepay.com/3ds-simulator/html_challenge',
+        'status': '3DAuth',
+        'statusCode': '2021',
+        'statusDetail': 'Please redirect your customer to the ACSURL to complete the 3DS Transaction',
+        'transactionId': 'C105B177-C8D2-0EDF-50A3-16EEBD6D4FFB'
+    }, 202)
+
+
+def challenge_success_response():
+    return MockResponse(dict(TRANSACTION_DATA, **{
+        '3DSecure': {
+            'status': 'Authenticated'
+        }
+    }), 201)
+
+
 def auth_success_response():
     return MockResponse({
         'status': 'Authenticated'
@@ -60,15 +82,15 @@ def auth_success_response():
 
 
 def card_identifier_response():
-    return MockResponse({
+    return CardIdentifierResult(201, {
         'cardIdentifier': 'C6F92981-8C2D-457A-AA1E-16EBCD6D3AC6',
         'expiry': '2015-06-16T10:46:23.693+01:00',
         'cardType': 'Visa'
-    }, 201), 'merchant-session-key'
+    }, merchant_session_key='merchant-session-key')
 
 
 def card_identifier_failed_response():
-    return MockResponse({
+    return CardIdentifierResult(422, {
         'errors': [
             {'property': 'cardDetails.cardholderName', 'clientMessage': 'Error cardholderName', 'code': 1},
             {'property': 'cardDetails.cardNumber', 'clientMessage': 'Error cardNumber', 'code': 1},
@@ -76,7 +98,7 @@ def card_identifier_failed_response():
             {'property': 'cardDetails.securityCode', 'clientMessage': 'Error securityCode', 'code': 1},
             {'property': 'unknown.property', 'clientMessage': 'Unknown property error', 'code': 1}
         ]
-    }, 422), 'merchant-session-key'
+    }, merchant_session_key='merchant-session-key')
 
 
 def created_payment_response():
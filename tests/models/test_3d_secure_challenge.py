@@ -0,0 +1,79 @@
+import mock
+
+from sagepaypi.exceptions import InvalidTransactionStatus
+from sagepaypi.models import Transaction
+from tests.mocks import (
+    challenge_required_response,
+    challenge_success_response,
+    gone_response,
+    outcome_live_response
+)
+from tests.test_case import AppTestCase
+
+
+class TestSecureChallenge(AppTestCase):
+    fixtures = ['tests/fixtures/test']
+
+    def setUp(self):
+        self.transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+
+    def test_error__no_transaction_id(self):
+        with self.assertRaises(InvalidTransactionStatus) as e:
+            self.transaction.complete_3d_secure_challenge('cres-data')
+
+        self.assertEqual(
+            e.exception.args[0],
+            'transaction is missing a transaction_id'
+        )
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_error__500_response(self, mock_gateway):
+        mock_gateway.complete_3d_secure_challenge.return_value = gone_response()
+        mock_gateway.get_transaction_outcome.return_value = gone_response()
+
+        self.transaction.transaction_id = 'dummy-transaction-id'
+        self.transaction.complete_3d_secure_challenge('cres-data')
+
+        self.assertIsNone(self.transaction.secure_status)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_success(self, mock_gateway):
+        mock_gateway.complete_3d_secure_challenge.return_value = challenge_success_response()
+        mock_gateway.get_transaction_outcome.return_value = outcome_live_response()
+
+        self.transaction.transaction_id = 'dummy-transaction-id'
+        self.transaction.complete_3d_secure_challenge('cres-data', 'session-data')
+
+        mock_gateway.complete_3d_secure_challenge.assert_called_with(
+            'dummy-transaction-id',
+            {'cRes': 'cres-data', 'threeDSSessionData': 'session-data'}
+        )
+
+        # the 3-D Secure messages are purged once 3-D Secure has completed
+        self.assertIsNone(self.transaction.cres)
+        self.assertIsNone(self.transaction.creq)
+        self.assertEqual(self.transaction.secure_status, 'Authenticated')
+        self.assertEqual(self.transaction.status_code, outcome_live_response().json()['statusCode'])
+        self.assertEqual(
+            list(self.transaction.responses.values_list('step', flat=True)),
+            ['get_transaction_outcome', 'complete_3d_secure_challenge']
+        )
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_submit__challenge_required(self, mock_gateway):
+        mock_gateway.get_merchant_session_key.return_value = ('merchant-session-key', None)
+        mock_gateway.submit_transaction.return_value = challenge_required_response()
+
+        self.transaction.strong_customer_authentication = {'browserJavascriptEnabled': False}
+        self.transaction.submit_transaction()
+
+        submitted = mock_gateway.submit_transaction.call_args[0][0]
+        self.assertEqual(submitted['strongCustomerAuthentication'], {'browserJavascriptEnabled': False})
+
+        self.assertTrue(self.transaction.requires_3d_secure_challenge)
+        self.assertEqual(self.transaction.creq, 'random-sagepay-challenge-request')
+        self.assertEqual(self.transaction.acs_url, 'https://test.sagepay.com/3ds-simulator/html_challenge')
+        self.assertIsNone(self.transaction.pareq)
+
+    def test_submit_data__without_strong_customer_authentication(self):
+        self.assertNotIn('strongCustomerAuthentication', self.transaction.get_submit_data())
@@ -2,7 +2,7 @@ import mock
 
 from sagepaypi.exceptions import InvalidTransactionStatus
 
-from sagepaypi.models import Transaction
+from sagepaypi.models import Transaction, TransactionSecureData
 from tests.mocks import gone_response, auth_success_response, outcome_live_response
 from tests.test_case import AppTestCase
 
@@ -44,6 +44,7 @@ class TestTransactionOutcome(AppTestCase):
 
         json = auth_success_response().json()
 
-        # expected
-        self.assertEqual(transaction.pares, 'pares-data')
+        # expected, the 3-D Secure messages are purged once 3-D Secure has completed
+        self.assertIsNone(transaction.pares)
+        self.assertFalse(TransactionSecureData.objects.filter(transaction=transaction).exists())
         self.assertEqual(transaction.secure_status, json['status'])
@@ -0,0 +1,158 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import RequestFactory
+
+from sagepaypi.admin import TransactionAdmin
+from sagepaypi.archive import archive_cutoff
+from sagepaypi.models import ArchivedTransaction, ArchivedTransactionResponse, Transaction, TransactionResponse
+from sagepaypi.routers import ArchiveRouter
+from tests.test_case import AppTestCase
+
+
+class TestArchive(AppTestCase):
+    fixtures = ['tests/fixtures/test']
+
+    def setUp(self):
+        self.card_identifier = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6').card_identifier
+        self.before = Transaction.utc_now() - timedelta(days=365)
+
+        self.old = self.create_transaction(days_old=400)
+        self.old.responses.create(step='submit_transaction', status_code=201, data={'status': 'Ok'}, duration=120.5)
+        self.refund = self.create_transaction(days_old=390, type='Refund', reference_transaction=self.old)
+        self.unsubmitted = self.create_transaction(days_old=400, status_code=None)
+        self.recent = self.create_transaction(days_old=10)
+        self.referenced = self.create_transaction(days_old=400)
+        self.create_transaction(days_old=10, type='Refund', reference_transaction=self.referenced)
+
+    def create_transaction(self, days_old, type='Payment', status_code='0000', reference_transaction=None):
+        transaction = Transaction.objects.create(
+            type=type,
+            card_identifier=self.card_identifier,
+            amount=100,
+            currency='GBP',
+            description='Payment',
+            transaction_id='transaction-id',
+            status='Ok',
+            status_code=status_code,
+            reference_transaction=reference_transaction
+        )
+        Transaction.objects.filter(pk=transaction.pk).update(
+            created_at=Transaction.utc_now() - timedelta(days=days_old)
+        )
+        transaction.refresh_from_db()
+        return transaction
+
+    def test_archivable(self):
+        # the old transaction is referred to by the refund until the refund is archived
+        self.assertEqual(list(Transaction.objects.archivable(self.before)), [self.refund])
+
+    def test_archive(self):
+        self.assertEqual(Transaction.objects.archive(before=self.before), 2)
+
+        self.assertFalse(Transaction.objects.filter(pk__in=[self.old.pk, self.refund.pk]).exists())
+        self.assertFalse(TransactionResponse.objects.filter(transaction_id=self.old.pk).exists())
+        self.assertTrue(Transaction.objects.filter(pk=self.unsubmitted.pk).exists())
+        self.assertTrue(Transaction.objects.filter(pk=self.recent.pk).exists())
+        self.assertTrue(Transaction.objects.filter(pk=self.referenced.pk).exists())
+
+        archived = ArchivedTransaction.objects.get(pk=self.old.pk)
+        self.assertEqual(archived.vendor_tx_code, self.old.vendor_tx_code)
+        self.assertEqual(archived.transaction_id, 'transaction-id')
+        self.assertEqual(archived.responses.get().data, {'status': 'Ok'})
+        self.assertEqual(archived.responses.get().duration, 120.5)
+        self.assertEqual(ArchivedTransaction.objects.get(pk=self.refund.pk).reference_transaction_id, self.old.pk)
+
+    def test_archive__batches(self):
+        self.assertEqual(Transaction.objects.archive(before=self.before, batch_size=1, max_batches=1), 1)
+        self.assertTrue(ArchivedTransaction.objects.filter(pk=self.refund.pk).exists())
+        self.assertTrue(Transaction.objects.filter(pk=self.old.pk).exists())
+
+        # running again resumes
+        self.assertEqual(Transaction.objects.archive(before=self.before, batch_size=1), 1)
+        self.assertFalse(Transaction.objects.filter(pk=self.old.pk).exists())
+
+    def test_archive__already_copied(self):
+        # a batch copied to the archive but not deleted is archived again
+        ArchivedTransaction.objects.archive([self.refund], [])
+
+        self.assertEqual(Transaction.objects.archive(before=self.before), 2)
+        self.assertEqual(ArchivedTransaction.objects.count(), 2)
+
+    def test_to_transaction(self):
+        Transaction.objects.archive(before=self.before)
+
+        transaction = ArchivedTransaction.objects.get(pk=self.old.pk).to_transaction()
+
+        self.assertIsInstance(transaction, Transaction)
+        self.assertEqual(transaction.pk, self.old.pk)
+        self.assertEqual(transaction.created_at, self.old.created_at)
+        self.assertEqual(transaction.updated_at, self.old.updated_at)
+        self.assertEqual(transaction.card_identifier_id, self.card_identifier.pk)
+        self.assertEqual(transaction.amount, 100)
+
+    def test_get_for_token(self):
+        tidb64, token = self.old.get_tokens()
+
+        Transaction.objects.archive(before=self.before)
+
+        transaction = Transaction.objects.get_for_token(tidb64, token)
+        self.assertEqual(transaction.pk, self.old.pk)
+        self.assertIsNone(Transaction.objects.get_for_token(tidb64, 'invalid'))
+
+    def test_archive_cutoff(self):
+        with self.assertRaises(ValueError):
+            archive_cutoff(30)
+
+        now = Transaction.utc_now()
+        self.assertEqual(archive_cutoff(60, now=now), now - timedelta(days=60))
+
+    def test_command(self):
+        out = StringIO()
+        call_command('sagepaypi_archive', days=365, dry_run=True, stdout=out)
+
+        self.assertIn('Transactions to archive: 1', out.getvalue())
+        self.assertFalse(ArchivedTransaction.objects.exists())
+
+        out = StringIO()
+        call_command('sagepaypi_archive', days=365, stdout=out)
+
+        self.assertIn('Transactions archived: 2', out.getvalue())
+
+        with self.assertRaises(CommandError):
+            call_command('sagepaypi_archive', days=10, stdout=StringIO())
+
+    def test_admin_read_through(self):
+        Transaction.objects.archive(before=self.before)
+
+        request = RequestFactory().get('/')
+        request.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        model_admin = TransactionAdmin(Transaction, admin.site)
+
+        response = model_admin._get_obj_does_not_exist_redirect(request, Transaction._meta, str(self.old.pk))
+
+        self.assertEqual(response.url, '/admin/sagepaypi/archivedtransaction/%s/change/' % self.old.pk)
+
+
+class TestArchiveRouter(AppTestCase):
+
+    def setUp(self):
+        self.router = ArchiveRouter()
+
+    def test_db_for_read(self):
+        with self.settings(SAGEPAYPI_ARCHIVE_DATABASE='archive'):
+            self.assertEqual(self.router.db_for_read(ArchivedTransaction), 'archive')
+            self.assertEqual(self.router.db_for_write(ArchivedTransactionResponse), 'archive')
+            self.assertIsNone(self.router.db_for_read(Transaction))
+
+    def test_allow_migrate(self):
+        with self.settings(SAGEPAYPI_ARCHIVE_DATABASE='archive'):
+            self.assertTrue(self.router.allow_migrate('archive', 'sagepaypi', 'archivedtransaction'))
+            self.assertFalse(self.router.allow_migrate('default', 'sagepaypi', 'archivedtransaction'))
+            self.assertFalse(self.router.allow_migrate('archive', 'sagepaypi', 'transaction'))
+            self.assertIsNone(self.router.allow_migrate('default', 'sagepaypi', 'transaction'))
+            self.assertIsNone(self.router.allow_migrate('archive', 'auth', 'user'))
@@ -0,0 +1,212 @@
+import mock
+
+from sagepaypi.bulk import refund_vendor_tx_code
+from sagepaypi.models import Transaction
+from tests.mocks import created_refund_response, MockResponse
+from tests.test_case import AppTestCase
+
+
+class TestBulkRefund(AppTestCase):
+    fixtures = ['tests/fixtures/test']
+
+    def setUp(self):
+        self.transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+        self.transaction.transaction_id = 'dummy-transaction-id'
+        self.transaction.status_code = '0000'
+        self.transaction.amount = 100
+        self.transaction.save()
+
+        self.second = Transaction.objects.create(
+            type='Payment',
+            card_identifier=self.transaction.card_identifier,
+            amount=200,
+            currency='GBP',
+            description='Another payment',
+            transaction_id='another-transaction-id',
+            status_code='0000'
+        )
+
+    def create_refund(self, original, amount, status_code='0000'):
+        return Transaction.objects.create(
+            type='Refund',
+            card_identifier=original.card_identifier,
+            reference_transaction=original,
+            amount=amount,
+            currency='GBP',
+            description='Refund',
+            status_code=status_code
+        )
+
+    def test_refunded_amounts(self):
+        self.create_refund(self.transaction, 10)
+        self.create_refund(self.transaction, 20)
+        self.create_refund(self.second, 30)
+        self.create_refund(self.second, 40, status_code='9999')
+
+        with self.assertNumQueries(1):
+            amounts = Transaction.objects.refunded_amounts([self.transaction.pk, self.second.pk])
+
+        self.assertEqual(amounts, {self.transaction.pk: 30, self.second.pk: 30})
+
+    def test_committed_refund_amounts(self):
+        self.create_refund(self.transaction, 10)
+        self.create_refund(self.transaction, 20, status_code=None)
+        self.create_refund(self.second, 40, status_code='9999')
+
+        with self.assertNumQueries(1):
+            amounts = Transaction.objects.committed_refund_amounts([self.transaction.pk, self.second.pk])
+
+        # refunds without a response may still succeed
+        self.assertEqual(amounts, {self.transaction.pk: 30})
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_bulk_refund(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = created_refund_response()
+
+        self.create_refund(self.second, 150)
+
+        result = Transaction.objects.bulk_refund(
+            [(self.transaction, 40), (self.second, None)],
+            rate=0,
+            description='Event cancelled'
+        )
+
+        self.assertEqual(result.errors, [])
+        self.assertEqual(len(result.successful), 2)
+        self.assertEqual(mock_gateway.submit_transaction.call_count, 2)
+        self.assertEqual(
+            sorted((r.reference_transaction_id, r.amount, r.description) for r in result.transactions),
+            sorted([
+                (self.transaction.pk, 40, 'Event cancelled'),
+                (self.second.pk, 50, 'Event cancelled')
+            ])
+        )
+        self.assertEqual(self.transaction.refunded_amount, 40)
+        self.assertEqual(self.second.refunded_amount, 200)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_bulk_refund__rejects_over_refunds(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = created_refund_response()
+
+        self.create_refund(self.second, 150)
+
+        result = Transaction.objects.bulk_refund(
+            [(self.transaction, 60), (self.transaction, 60), (self.second, 100)],
+            rate=0
+        )
+
+        self.assertEqual(len(result.transactions), 1)
+        self.assertEqual(
+            result.errors,
+            [
+                (self.transaction, 'can only refund up to the original amount and no more'),
+                (self.second, 'can only refund up to the original amount and no more')
+            ]
+        )
+        self.assertEqual(mock_gateway.submit_transaction.call_count, 1)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_bulk_refund__invalid_transaction(self, mock_gateway):
+        self.second.instruction = 'void'
+
+        result = Transaction.objects.bulk_refund([(self.second, 10)], rate=0)
+
+        self.assertEqual(result.transactions, [])
+        self.assertEqual(result.errors, [(self.second, 'cannot refund a void transaction')])
+        self.assertFalse(mock_gateway.submit_transaction.called)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_bulk_refund__rejects_payloads_sage_pay_would_reject(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = created_refund_response()
+
+        result = Transaction.objects.bulk_refund([(self.transaction, 40)], rate=0, description='x' * 101)
+
+        self.assertEqual(result.transactions, [])
+        self.assertEqual(result.errors, [(self.transaction, 'description: must be at most 100 characters')])
+        self.assertEqual(Transaction.objects.filter(type='Refund').count(), 0)
+        mock_gateway.submit_transaction.assert_not_called()
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_bulk_refund__pending_refunds_counted(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = created_refund_response()
+
+        self.create_refund(self.transaction, 60, status_code=None)
+
+        result = Transaction.objects.bulk_refund([(self.transaction, 50)], rate=0)
+
+        self.assertEqual(result.errors, [(self.transaction, 'can only refund up to the original amount and no more')])
+        mock_gateway.submit_transaction.assert_not_called()
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_bulk_refund__resumes_run(self, mock_gateway):
+        def submit(data):
+            if data['referenceTransactionId'] == 'another-transaction-id':
+                raise ConnectionError('connection reset')
+            return created_refund_response()
+
+        mock_gateway.submit_transaction.side_effect = submit
+        refunds = [(self.transaction, 40), (self.second, None)]
+
+        result = Transaction.objects.bulk_refund(refunds, run_key='run-1', rate=0)
+
+        self.assertEqual(result.errors, [(result.transactions[1], 'connection reset')])
+        self.assertIsNone(result.transactions[1].status_code)
+
+        mock_gateway.submit_transaction.reset_mock()
+        mock_gateway.submit_transaction.side_effect = None
+        mock_gateway.submit_transaction.return_value = created_refund_response()
+
+        result = Transaction.objects.bulk_refund(refunds, run_key='run-1', rate=0)
+
+        # no new refunds and only the unsubmitted refund is sent again
+        self.assertEqual(result.errors, [])
+        self.assertEqual(Transaction.objects.filter(type='Refund').count(), 2)
+        self.assertEqual(mock_gateway.submit_transaction.call_count, 1)
+        self.assertEqual(
+            mock_gateway.submit_transaction.call_args[0][0]['referenceTransactionId'],
+            'another-transaction-id'
+        )
+        self.assertEqual(
+            [refund.vendor_tx_code for refund in result.transactions],
+            [refund_vendor_tx_code(self.transaction, 'run-1'), refund_vendor_tx_code(self.second, 'run-1')]
+        )
+        self.assertEqual(self.transaction.refunded_amount, 40)
+        self.assertEqual(self.second.refunded_amount, 200)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_bulk_refund__resumed_refund_not_accepted(self, mock_gateway):
+        mock_gateway.submit_transaction.side_effect = ConnectionError('connection reset')
+
+        Transaction.objects.bulk_refund([(self.transaction, 40)], run_key='run-1', rate=0)
+
+        # the interrupted run may have refunded the transaction
+        mock_gateway.submit_transaction.side_effect = None
+        mock_gateway.submit_transaction.return_value = MockResponse({
+            'status': 'Invalid',
+            'statusCode': '4020',
+            'statusDetail': 'The VendorTxCode has been used before.'
+        }, 400)
+
+        result = Transaction.objects.bulk_refund([(self.transaction, 40)], run_key='run-1', rate=0)
+
+        refund = Transaction.objects.get(type='Refund')
+        self.assertEqual(result.unknown, [(refund, 'The VendorTxCode has been used before.')])
+        self.assertIsNone(refund.status_code)
+        # still counted against the transaction
+        self.assertEqual(Transaction.objects.committed_refund_amounts([self.transaction.pk]), {self.transaction.pk: 40})
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_bulk_refund__new_run_after_failure(self, mock_gateway):
+        mock_gateway.submit_transaction.side_effect = ConnectionError('connection reset')
+
+        Transaction.objects.bulk_refund([(self.transaction, None)], rate=0)
+
+        # another run cannot refund the amount of the refund left without a response
+        mock_gateway.submit_transaction.reset_mock()
+        mock_gateway.submit_transaction.side_effect = None
+        mock_gateway.submit_transaction.return_value = created_refund_response()
+
+        result = Transaction.objects.bulk_refund([(self.transaction, None)], rate=0)
+
+        self.assertEqual(result.errors, [(self.transaction, 'can only refund up to the original amount and no more')])
+        mock_gateway.submit_transaction.assert_not_called()
@@ -0,0 +1,155 @@
+from io import StringIO
+
+import mock
+from django.core.management import call_command
+
+from sagepaypi.bulk import repeat_vendor_tx_code
+from sagepaypi.models import Transaction, TransactionResponse
+from tests.mocks import created_repeat_response, gone_response, malformed_response, MockResponse
+from tests.test_case import AppTestCase
+
+
+class TestBulkRepeat(AppTestCase):
+    fixtures = ['tests/fixtures/test']
+
+    def setUp(self):
+        self.transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+        self.transaction.transaction_id = 'dummy-transaction-id'
+        self.transaction.status_code = '0000'
+        self.transaction.save()
+
+        self.second = Transaction.objects.create(
+            type='Payment',
+            card_identifier=self.transaction.card_identifier,
+            amount=200,
+            currency='GBP',
+            description='Another payment',
+            transaction_id='another-transaction-id',
+            status_code='0000'
+        )
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_bulk_repeat(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = created_repeat_response()
+
+        result = Transaction.objects.bulk_repeat([self.transaction, self.second], run_key='run-1', rate=0)
+
+        self.assertEqual(result.run_key, 'run-1')
+        self.assertEqual(result.errors, [])
+        self.assertEqual(len(result.successful), 2)
+        self.assertEqual(mock_gateway.submit_transaction.call_count, 2)
+
+        repeats = Transaction.objects.filter(type='Repeat').order_by('amount')
+        self.assertEqual([r.reference_transaction for r in repeats], [self.transaction, self.second])
+        self.assertEqual([r.amount for r in repeats], [1, 200])
+        self.assertEqual([r.status_code for r in repeats], ['0000', '0000'])
+        self.assertEqual(
+            TransactionResponse.objects.filter(transaction__in=repeats, step='submit_transaction').count(),
+            2
+        )
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_bulk_repeat__with_kwargs(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = created_repeat_response()
+
+        result = Transaction.objects.bulk_repeat([self.transaction], rate=0, amount=50, description='Monthly')
+
+        repeat = result.transactions[0]
+        repeat.refresh_from_db()
+
+        self.assertEqual(repeat.amount, 50)
+        self.assertEqual(repeat.description, 'Monthly')
+        self.assertEqual(repeat.vendor_tx_code, repeat_vendor_tx_code(self.transaction, result.run_key))
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_bulk_repeat__invalid_originals(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = created_repeat_response()
+
+        self.second.status_code = '9999'
+
+        result = Transaction.objects.bulk_repeat([self.transaction, self.second], rate=0)
+
+        self.assertEqual(len(result.transactions), 1)
+        self.assertEqual(result.errors, [(self.second, 'cannot repeat an unsuccessful transaction')])
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_bulk_repeat__resumes_run(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = gone_response()
+
+        Transaction.objects.bulk_repeat([self.transaction, self.second], run_key='run-1', rate=0)
+
+        repeats = Transaction.objects.filter(type='Repeat')
+        repeats.filter(reference_transaction=self.transaction).update(status_code='0000')
+
+        mock_gateway.submit_transaction.reset_mock()
+        mock_gateway.submit_transaction.return_value = created_repeat_response()
+
+        result = Transaction.objects.bulk_repeat([self.transaction, self.second], run_key='run-1', rate=0)
+
+        # no new repeats and only the unsubmitted repeat is sent again
+        self.assertEqual(repeats.count(), 2)
+        self.assertEqual(len(result.transactions), 2)
+        self.assertEqual(mock_gateway.submit_transaction.call_count, 1)
+        self.assertEqual(
+            mock_gateway.submit_transaction.call_args[0][0]['referenceTransactionId'],
+            'another-transaction-id'
+        )
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_bulk_repeat__resumed_repeat_not_accepted(self, mock_gateway):
+        mock_gateway.submit_transaction.side_effect = ConnectionError('connection reset')
+
+        Transaction.objects.bulk_repeat([self.transaction], run_key='run-1', rate=0)
+
+        # the interrupted run may have been accepted, the duplicate vendor tx code is rejected
+        mock_gateway.submit_transaction.side_effect = None
+        mock_gateway.submit_transaction.return_value = MockResponse({
+            'status': 'Invalid',
+            'statusCode': '4020',
+            'statusDetail': 'The VendorTxCode has been used before.'
+        }, 400)
+
+        result = Transaction.objects.bulk_repeat([self.transaction], run_key='run-1', rate=0)
+
+        repeat = Transaction.objects.get(type='Repeat')
+        self.assertEqual(result.unknown, [(repeat, 'The VendorTxCode has been used before.')])
+        self.assertEqual(result.errors, [])
+        # left pending rather than failed, with the response recorded
+        self.assertIsNone(repeat.status_code)
+        self.assertEqual(repeat.responses.get().status_code, 400)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_bulk_repeat__new_repeat_not_accepted(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = malformed_response()
+
+        result = Transaction.objects.bulk_repeat([self.transaction], run_key='run-1', rate=0)
+
+        self.assertEqual(result.unknown, [])
+        self.assertEqual(Transaction.objects.get(type='Repeat').status_code, '9999')
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_bulk_repeat__submit_error(self, mock_gateway):
+        mock_gateway.submit_transaction.side_effect = ConnectionError('connection refused')
+
+        result = Transaction.objects.bulk_repeat([self.transaction], rate=0)
+
+        self.assertEqual(len(result.errors), 1)
+        self.assertEqual(result.errors[0][1], 'connection refused')
+        self.assertIsNone(result.transactions[0].status_code)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_command(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = created_repeat_response()
+
+        out = StringIO()
+        call_command(
+            'sagepaypi_bulk_repeat',
+            str(self.transaction.pk),
+            str(self.second.pk),
+            run_key='run-1',
+            rate=0,
+            stdout=out
+        )
+
+        self.assertIn('Run key: run-1', out.getvalue())
+        self.assertIn('Repeats: 2, successful: 2, unsuccessful: 0, errors: 0', out.getvalue())
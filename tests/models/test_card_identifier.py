@@ -9,6 +9,23 @@ from sagepaypi.models import CardIdentifier
 from tests.test_case import AppTestCase
 
 
+class TestManager(AppTestCase):
+    fixtures = ['tests/fixtures/test']
+
+    def test_saved_cards(self):
+        card = CardIdentifier.objects.get(pk='67c8ce90-c178-4f78-8176-b87f3ccd52a1')
+        card.customer_reference = 'customer-1'
+        card.save()
+
+        self.assertEqual(list(CardIdentifier.objects.saved_cards('customer-1')), [])
+
+        card.reusable = True
+        card.save()
+
+        self.assertEqual(list(CardIdentifier.objects.saved_cards('customer-1')), [card])
+        self.assertEqual(list(CardIdentifier.objects.saved_cards('customer-2')), [])
+
+
 class TestModel(AppTestCase):
 
     # fields
@@ -88,6 +105,16 @@ class TestModel(AppTestCase):
         self.assertModelField(field, models.CharField)
         self.assertEqual(field.max_length, 100)
 
+    def test_reusable(self):
+        field = self.get_field(CardIdentifier, 'reusable')
+        self.assertModelField(field, models.BooleanField)
+        self.assertFalse(field.default)
+
+    def test_customer_reference(self):
+        field = self.get_field(CardIdentifier, 'customer_reference')
+        self.assertModelField(field, models.CharField, True, True)
+        self.assertEqual(field.max_length, 255)
+
     # properties
 
     def test_str(self):
@@ -0,0 +1,137 @@
+from datetime import date, datetime, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from sagepaypi.models import DailySummary, SummaryCheckpoint, Transaction
+from tests.test_case import AppTestCase
+
+
+@override_settings(SAGEPAYPI_SUMMARY_LAG=0)
+class TestDailySummary(AppTestCase):
+    fixtures = ['tests/fixtures/test']
+
+    def setUp(self):
+        self.card_identifier = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6').card_identifier
+        # the fixture transaction is outside the days summarised
+        Transaction.objects.update(created_at=timezone.make_aware(datetime(2018, 1, 1)))
+
+    def create_transaction(self, day, amount=100, currency='GBP', type='Payment', status_code='0000',
+                           secure_status=None):
+        transaction = Transaction.objects.create(
+            type=type,
+            card_identifier=self.card_identifier,
+            amount=amount,
+            currency=currency,
+            description='Payment',
+            status_code=status_code,
+            secure_status=secure_status
+        )
+        Transaction.objects.filter(pk=transaction.pk).update(
+            created_at=timezone.make_aware(datetime.combine(day, datetime.min.time())) + timedelta(hours=12)
+        )
+        return transaction
+
+    def test_rebuild(self):
+        self.create_transaction(date(2019, 1, 1), secure_status='Authenticated')
+        self.create_transaction(date(2019, 1, 1), amount=50, secure_status='NotAuthenticated', status_code='2000')
+        self.create_transaction(date(2019, 1, 1), amount=25)
+        self.create_transaction(date(2019, 1, 1), currency='EUR')
+        self.create_transaction(date(2019, 1, 2), type='Refund', amount=10)
+
+        DailySummary.objects.rebuild([date(2019, 1, 1), date(2019, 1, 2)])
+
+        self.assertEqual(DailySummary.objects.count(), 4)
+
+        summary = DailySummary.objects.get(date=date(2019, 1, 1), currency='GBP', status_code='0000')
+        self.assertEqual(summary.count, 2)
+        self.assertEqual(summary.amount, 125)
+        self.assertEqual(summary.successful_count, 2)
+        self.assertEqual(summary.secure_count, 1)
+        self.assertEqual(summary.secure_authenticated_count, 1)
+
+        # rebuilding replaces the summaries of the day
+        self.create_transaction(date(2019, 1, 1), status_code=None)
+        DailySummary.objects.rebuild([date(2019, 1, 1)])
+
+        self.assertEqual(DailySummary.objects.count(), 5)
+        self.assertEqual(DailySummary.objects.get(status_code='').count, 1)
+
+    def test_refresh(self):
+        self.create_transaction(date(2019, 1, 1))
+
+        self.assertEqual(DailySummary.objects.refresh(), [date(2018, 1, 1), date(2019, 1, 1)])
+        self.assertIsNotNone(SummaryCheckpoint.objects.get(name='daily_summary').high_water_mark)
+
+        # nothing has been updated since
+        self.assertEqual(DailySummary.objects.refresh(), [])
+
+        transaction = self.create_transaction(date(2019, 1, 2))
+        self.assertEqual(DailySummary.objects.refresh(), [date(2019, 1, 2)])
+
+        # a state transition updates the summary of the day the transaction was created
+        transaction.refresh_from_db()
+        transaction.status_code = '2000'
+        transaction.save()
+
+        self.assertEqual(DailySummary.objects.refresh(), [date(2019, 1, 2)])
+        self.assertEqual(DailySummary.objects.get(date=date(2019, 1, 2)).status_code, '2000')
+
+    @override_settings(SAGEPAYPI_SUMMARY_LAG=60)
+    def test_refresh__lag(self):
+        self.assertEqual(DailySummary.objects.refresh(), [date(2018, 1, 1)])
+
+        # the transaction was updated within the lag so it is left for the next refresh
+        self.create_transaction(date(2019, 1, 1))
+
+        self.assertEqual(DailySummary.objects.refresh(), [])
+        self.assertEqual(DailySummary.objects.refresh(now=timezone.now() + timedelta(minutes=2)), [date(2019, 1, 1)])
+
+    def test_totals(self):
+        self.create_transaction(date(2019, 1, 1), secure_status='Authenticated')
+        self.create_transaction(date(2019, 1, 1), amount=50, secure_status='NotAuthenticated', status_code='2000')
+        self.create_transaction(date(2019, 1, 2), currency='EUR')
+        DailySummary.objects.rebuild([date(2019, 1, 1), date(2019, 1, 2)])
+
+        totals = DailySummary.objects.between(date(2019, 1, 1), date(2019, 1, 2)).totals()
+
+        self.assertEqual(totals['count'], 3)
+        self.assertEqual(totals['amount'], 250)
+        self.assertEqual(totals['successful_amount'], 200)
+        self.assertEqual(totals['success_rate'], 2 / 3)
+        self.assertEqual(totals['secure_rate'], 0.5)
+
+        by_day = DailySummary.objects.between(date(2019, 1, 1), date(2019, 1, 2)).totals_by('date')
+
+        self.assertEqual([row['date'] for row in by_day], [date(2019, 1, 1), date(2019, 1, 2)])
+        self.assertEqual(by_day[0]['success_rate'], 0.5)
+        self.assertIsNone(by_day[1]['secure_rate'])
+
+        by_currency = DailySummary.objects.all().totals_by('currency', 'type')
+
+        self.assertEqual(
+            [(row['currency'], row['type'], row['count']) for row in by_currency],
+            [('EUR', 'Payment', 1), ('GBP', 'Payment', 2)]
+        )
+
+    def test_totals__empty(self):
+        totals = DailySummary.objects.totals()
+
+        self.assertEqual(totals['count'], 0)
+        self.assertIsNone(totals['success_rate'])
+
+    def test_command(self):
+        self.create_transaction(date(2019, 1, 1))
+
+        out = StringIO()
+        call_command('sagepaypi_summarise', since='2019-01-01', until='2019-01-03', stdout=out)
+
+        self.assertIn('Days summarised: 3', out.getvalue())
+        self.assertEqual(DailySummary.objects.get().date, date(2019, 1, 1))
+
+        out = StringIO()
+        call_command('sagepaypi_summarise', stdout=out)
+
+        self.assertIn('Days summarised: 2', out.getvalue())
@@ -0,0 +1,115 @@
+from datetime import timedelta
+from io import StringIO
+
+import mock
+from django.core.management import call_command
+from django.test import override_settings
+
+from sagepaypi.bulk import bulk_instruct
+from sagepaypi.models import Transaction
+from tests.mocks import instruction_abort_response, instruction_release_response, outcome_aborted_response
+from tests.test_case import AppTestCase
+
+
+class TestDeferredExpiry(AppTestCase):
+    fixtures = ['tests/fixtures/test']
+
+    def setUp(self):
+        self.card_identifier = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6').card_identifier
+        self.expiring = self.create_deferred(days_old=28)
+        self.expired = self.create_deferred(days_old=31)
+        self.recent = self.create_deferred(days_old=2)
+        self.released = self.create_deferred(days_old=28, instruction='release')
+        self.failed = self.create_deferred(days_old=28, status_code='2000')
+
+    def create_deferred(self, days_old, status_code='0000', instruction=None):
+        transaction = Transaction.objects.create(
+            type='Deferred',
+            card_identifier=self.card_identifier,
+            amount=100,
+            currency='GBP',
+            description='Deferred payment',
+            transaction_id='deferred-transaction-id',
+            status_code=status_code,
+            instruction=instruction
+        )
+        Transaction.objects.filter(pk=transaction.pk).update(
+            created_at=Transaction.utc_now() - timedelta(days=days_old, hours=1)
+        )
+        transaction.refresh_from_db()
+        return transaction
+
+    def test_deferred_pending(self):
+        self.assertEqual(
+            set(Transaction.objects.deferred_pending()),
+            {self.expiring, self.expired, self.recent}
+        )
+
+    def test_deferred_expiring(self):
+        self.assertEqual(list(Transaction.objects.deferred_expiring(5)), [self.expiring])
+        self.assertEqual(list(Transaction.objects.deferred_expiring(1)), [])
+        self.assertEqual(set(Transaction.objects.deferred_expiring(30)), {self.expiring, self.recent})
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_bulk_instruct__release(self, mock_gateway):
+        mock_gateway.submit_transaction_instruction.return_value = instruction_release_response()
+
+        result = bulk_instruct([self.expiring, self.expired], 'release', rate=0)
+
+        self.assertEqual(result.transactions, [self.expiring])
+        self.assertEqual(
+            result.errors,
+            [(self.expired, 'can only release a transaction that was created within 30 days')]
+        )
+
+        self.expiring.refresh_from_db()
+        self.assertEqual(self.expiring.instruction, 'release')
+        self.assertEqual(list(self.expiring.responses.values_list('step', flat=True)), ['release'])
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_bulk_instruct__abort(self, mock_gateway):
+        mock_gateway.submit_transaction_instruction.return_value = instruction_abort_response()
+        mock_gateway.get_transaction_outcome.return_value = outcome_aborted_response()
+
+        bulk_instruct([self.expiring], 'abort', rate=0)
+
+        self.expiring.refresh_from_db()
+        self.assertEqual(self.expiring.instruction, 'abort')
+        self.assertEqual(self.expiring.status_code, '2006')
+        self.assertEqual(
+            set(self.expiring.responses.values_list('step', flat=True)),
+            {'abort', 'get_transaction_outcome'}
+        )
+
+    def test_bulk_instruct__invalid_instruction(self):
+        with self.assertRaises(ValueError):
+            bulk_instruct([self.expiring], 'void')
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_command__report_only(self, mock_gateway):
+        out = StringIO()
+        call_command('sagepaypi_deferred_expiry', stdout=out)
+
+        self.assertIn('Deferred transactions expiring within 5 days: 1', out.getvalue())
+        self.assertFalse(mock_gateway.submit_transaction_instruction.called)
+
+    @override_settings(SAGEPAYPI_DEFERRED_EXPIRY_POLICY='release')
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_command__policy(self, mock_gateway):
+        mock_gateway.submit_transaction_instruction.return_value = instruction_release_response()
+
+        out = StringIO()
+        call_command('sagepaypi_deferred_expiry', rate=0, stdout=out)
+
+        self.assertIn('Policy: release, instructed: 1, failed: 0, errors: 0', out.getvalue())
+
+        self.expiring.refresh_from_db()
+        self.assertEqual(self.expiring.instruction, 'release')
+
+    @override_settings(SAGEPAYPI_DEFERRED_EXPIRY_POLICY='release')
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_command__dry_run(self, mock_gateway):
+        out = StringIO()
+        call_command('sagepaypi_deferred_expiry', dry_run=True, stdout=out)
+
+        self.assertFalse(mock_gateway.submit_transaction_instruction.called)
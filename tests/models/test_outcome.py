@@ -1,10 +1,16 @@
+import threading
+
 import mock
+from django.core.cache import caches
+from django.test import override_settings
 
 from sagepaypi.exceptions import InvalidTransactionStatus
 
 from sagepaypi.models import Transaction
+from sagepaypi.models.transaction import outcome_flight
 from tests.mocks import gone_response, outcome_live_response
 from tests.test_case import AppTestCase
+from tests.test_singleflight import wait_for_waiters
 
 
 class TestTransactionOutcome(AppTestCase):
@@ -55,3 +61,60 @@ class TestTransactionOutcome(AppTestCase):
         self.assertEqual(transaction.transaction_id, json['transactionId'])
         self.assertEqual(transaction.retrieval_reference, json['retrievalReference'])
         self.assertEqual(transaction.bank_authorisation_code, json['bankAuthorisationCode'])
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_outcome__concurrent_lookups_coalesced(self, mock_gateway):
+        transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+        transaction.transaction_id = 'dummy-transaction-id'
+        other = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+        other.transaction_id = 'dummy-transaction-id'
+        follower = threading.Thread(target=other.get_transaction_outcome)
+
+        def get_transaction_outcome(transaction_id):
+            follower.start()
+            wait_for_waiters(outcome_flight, transaction_id, 1)
+            return outcome_live_response()
+
+        mock_gateway.get_transaction_outcome.side_effect = get_transaction_outcome
+
+        transaction.get_transaction_outcome()
+        follower.join()
+
+        self.assertEqual(mock_gateway.get_transaction_outcome.call_count, 1)
+        self.assertEqual(transaction.responses.filter(step='get_transaction_outcome').count(), 1)
+        self.assertEqual(other.status_code, outcome_live_response().json()['statusCode'])
+
+    @override_settings(SAGEPAYPI_OUTCOME_LOCK_CACHE='default')
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_outcome__shared_between_processes(self, mock_gateway):
+        cache = caches['default']
+        cache.set(outcome_flight.lock_key('dummy-transaction-id'), 'token')
+        cache.set(
+            outcome_flight.result_key('dummy-transaction-id', 'token'),
+            (200, outcome_live_response().json())
+        )
+
+        transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+        transaction.transaction_id = 'dummy-transaction-id'
+        transaction.get_transaction_outcome()
+
+        # the other process saved the outcome
+        mock_gateway.get_transaction_outcome.assert_not_called()
+        self.assertFalse(transaction.responses.exists())
+        self.assertEqual(transaction.status_code, outcome_live_response().json()['statusCode'])
+        cache.clear()
+
+    @override_settings(SAGEPAYPI_OUTCOME_LOCK_CACHE='default')
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_outcome__stored_for_other_processes(self, mock_gateway):
+        mock_gateway.get_transaction_outcome.return_value = outcome_live_response()
+
+        transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+        transaction.transaction_id = 'dummy-transaction-id'
+
+        with mock.patch.object(caches['default'], 'set') as mock_set:
+            transaction.get_transaction_outcome()
+
+        key, value, timeout = mock_set.call_args[0]
+        self.assertEqual(value, (200, outcome_live_response().json()))
+        self.assertEqual(timeout, 10)
@@ -0,0 +1,271 @@
+from datetime import timedelta
+from io import StringIO
+
+import mock
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import override_settings
+
+from sagepaypi.bulk import poll_outcomes
+from sagepaypi.models import Transaction
+from sagepaypi.outcomes import cache_outcome, get_cached_outcome, poll_delay
+from sagepaypi.results import TransactionResult
+from tests.mocks import (
+    auth_required_response,
+    challenge_required_response,
+    gone_response,
+    MockResponse,
+    outcome_live_response
+)
+from tests.test_case import AppTestCase
+
+
+def pending_outcome_response():
+    return MockResponse({
+        'status': '3DAuth',
+        'statusCode': '2007',
+        'statusDetail': 'Please redirect your customer to the ACSURL to complete the 3DS Transaction',
+        'transactionId': 'C105B177-C8D2-0EDF-50A3-16EEBD6D4FFB'
+    }, 200)
+
+
+class TestPollDelay(AppTestCase):
+
+    def test_backoff(self):
+        self.assertEqual([poll_delay(polls, random=lambda: 1) for polls in range(4)], [60, 120, 240, 480])
+
+    def test_jitter(self):
+        self.assertEqual(poll_delay(2, random=lambda: 0), 120)
+        self.assertEqual(poll_delay(2, random=lambda: 0.5), 180)
+
+    def test_capped(self):
+        self.assertEqual(poll_delay(10, random=lambda: 1), 3600)
+        self.assertEqual(poll_delay(1000, random=lambda: 1), 3600)
+
+    @override_settings(SAGEPAYPI_OUTCOME_POLL_INTERVAL=10, SAGEPAYPI_OUTCOME_POLL_MAX_INTERVAL=30)
+    def test_settings(self):
+        self.assertEqual([poll_delay(polls, random=lambda: 1) for polls in range(4)], [10, 20, 30, 30])
+
+
+class TestOutcomePolling(AppTestCase):
+    fixtures = ['tests/fixtures/test']
+
+    def setUp(self):
+        self.transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+
+    def make_due(self, transaction, polls=0):
+        transaction.transaction_id = 'C105B177-C8D2-0EDF-50A3-16EEBD6D4FFB'
+        transaction.status = '3DAuth'
+        # the customer has completed 3-D Secure
+        transaction.secure_status = 'Authenticated'
+        transaction.outcome_polls = polls
+        transaction.next_outcome_poll_at = Transaction.utc_now() - timedelta(seconds=1)
+        transaction.save()
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_submit__3d_secure_not_scheduled(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = auth_required_response()
+
+        self.transaction.submit_transaction()
+
+        self.assertEqual(self.transaction.outcome_polls, 0)
+        self.assertIsNone(self.transaction.next_outcome_poll_at)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_3d_secure_completed__pending_scheduled(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = auth_required_response()
+        mock_gateway.get_3d_secure_status.return_value = MockResponse({'status': 'Authenticated'}, 201)
+        mock_gateway.get_transaction_outcome.return_value = pending_outcome_response()
+
+        self.transaction.submit_transaction()
+        self.transaction.get_3d_secure_status('random-pares')
+
+        self.assertEqual(self.transaction.outcome_polls, 1)
+        self.assertGreater(self.transaction.next_outcome_poll_at, Transaction.utc_now() + timedelta(seconds=59))
+        self.assertLess(self.transaction.next_outcome_poll_at, Transaction.utc_now() + timedelta(seconds=121))
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_submit__final_not_scheduled(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = TransactionResult(201, outcome_live_response().json())
+
+        self.transaction.submit_transaction()
+
+        self.assertIsNone(self.transaction.next_outcome_poll_at)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_outcome__backs_off(self, mock_gateway):
+        mock_gateway.get_transaction_outcome.return_value = pending_outcome_response()
+        self.make_due(self.transaction, polls=3)
+
+        self.transaction.get_transaction_outcome()
+
+        # 60 * 2 ** 4 with up to half of it random
+        self.assertEqual(self.transaction.outcome_polls, 4)
+        self.assertGreater(self.transaction.next_outcome_poll_at, Transaction.utc_now() + timedelta(seconds=479))
+
+    @override_settings(SAGEPAYPI_OUTCOME_POLL_MAX_POLLS=4)
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_outcome__max_polls(self, mock_gateway):
+        mock_gateway.get_transaction_outcome.return_value = pending_outcome_response()
+        self.make_due(self.transaction, polls=3)
+
+        self.transaction.get_transaction_outcome()
+
+        self.assertIsNone(self.transaction.next_outcome_poll_at)
+
+    def test_outcome_poll_due(self):
+        self.assertFalse(Transaction.objects.outcome_poll_due().exists())
+
+        self.make_due(self.transaction)
+
+        self.assertTrue(Transaction.objects.outcome_poll_due().exists())
+        self.assertFalse(Transaction.objects.outcome_poll_due(Transaction.utc_now() - timedelta(minutes=1)).exists())
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_poll_outcomes(self, mock_gateway):
+        mock_gateway.get_transaction_outcome.return_value = outcome_live_response()
+        self.make_due(self.transaction)
+
+        result = poll_outcomes(rate=0)
+
+        self.assertEqual(result.transactions, [self.transaction])
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.status, 'Ok')
+        self.assertEqual(self.transaction.outcome_polls, 1)
+        self.assertIsNone(self.transaction.next_outcome_poll_at)
+        self.assertEqual(self.transaction.responses.filter(step='get_transaction_outcome').count(), 1)
+
+        # nothing left to poll
+        self.assertEqual(poll_outcomes(rate=0).transactions, [])
+        self.assertEqual(mock_gateway.get_transaction_outcome.call_count, 1)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_poll_outcomes__pending(self, mock_gateway):
+        mock_gateway.get_transaction_outcome.return_value = pending_outcome_response()
+        self.make_due(self.transaction)
+
+        poll_outcomes(rate=0)
+
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.outcome_polls, 1)
+        self.assertGreater(self.transaction.next_outcome_poll_at, Transaction.utc_now() + timedelta(seconds=59))
+
+    def assert_tokens_kept_by_poll(self, mock_gateway, submit_response):
+        mock_gateway.submit_transaction.return_value = submit_response
+        mock_gateway.get_transaction_outcome.return_value = pending_outcome_response()
+
+        self.transaction.submit_transaction()
+        tidb64, token = self.transaction.get_tokens()
+        session_data = self.transaction.get_3d_secure_session_data()
+
+        # as scheduled before the polls waited on 3-D Secure
+        Transaction.objects.filter(pk=self.transaction.pk).update(
+            next_outcome_poll_at=Transaction.utc_now() - timedelta(seconds=1)
+        )
+
+        self.assertEqual(poll_outcomes(rate=0).transactions, [])
+        mock_gateway.get_transaction_outcome.assert_not_called()
+
+        # the customer can still return from the issuing bank
+        self.assertEqual(Transaction.objects.get_for_token(tidb64, token), self.transaction)
+        self.assertEqual(Transaction.objects.get_for_3d_secure_session_data(session_data), self.transaction)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_poll_outcomes__awaiting_3d_secure(self, mock_gateway):
+        self.assert_tokens_kept_by_poll(mock_gateway, auth_required_response())
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_poll_outcomes__awaiting_3d_secure_challenge(self, mock_gateway):
+        self.assert_tokens_kept_by_poll(mock_gateway, challenge_required_response())
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_poll_outcomes__error_backs_off(self, mock_gateway):
+        mock_gateway.get_transaction_outcome.side_effect = ConnectionError('unreachable')
+        self.make_due(self.transaction)
+
+        result = poll_outcomes(rate=0)
+
+        self.assertEqual(result.errors, [(self.transaction, 'unreachable')])
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.outcome_polls, 1)
+        self.assertGreater(self.transaction.next_outcome_poll_at, Transaction.utc_now())
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_poll_outcomes__limit(self, mock_gateway):
+        mock_gateway.get_transaction_outcome.return_value = pending_outcome_response()
+        self.make_due(self.transaction)
+        other = Transaction.objects.get(pk=self.transaction.pk)
+        other.pk = None
+        other.vendor_tx_code = 'other'
+        other.save()
+        Transaction.objects.filter(pk=other.pk).update(next_outcome_poll_at=Transaction.utc_now() - timedelta(hours=1))
+
+        result = poll_outcomes(limit=1, rate=0)
+
+        # the longest due first
+        self.assertEqual([obj.pk for obj in result.transactions], [other.pk])
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_command(self, mock_gateway):
+        mock_gateway.get_transaction_outcome.return_value = outcome_live_response()
+        self.make_due(self.transaction)
+        out = StringIO()
+
+        call_command('sagepaypi_poll_outcomes', rate=0, stdout=out)
+
+        self.assertIn('Transactions polled: 1, final: 1, errors: 0', out.getvalue())
+
+
+@override_settings(SAGEPAYPI_OUTCOME_CACHE='default')
+class TestOutcomeCache(AppTestCase):
+    fixtures = ['tests/fixtures/test']
+
+    def setUp(self):
+        caches['default'].clear()
+        self.transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+        self.transaction.transaction_id = 'C105B177-C8D2-0EDF-50A3-16EEBD6D4FFB'
+
+    def tearDown(self):
+        caches['default'].clear()
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_final_outcome_cached(self, mock_gateway):
+        mock_gateway.get_transaction_outcome.return_value = outcome_live_response()
+
+        self.transaction.get_transaction_outcome()
+
+        other = Transaction.objects.get(pk=self.transaction.pk)
+        other.status = None
+        other.get_transaction_outcome()
+
+        self.assertEqual(mock_gateway.get_transaction_outcome.call_count, 1)
+        self.assertEqual(other.status, 'Ok')
+        self.assertEqual(other.responses.filter(step='get_transaction_outcome').count(), 1)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_pending_outcome_not_cached(self, mock_gateway):
+        mock_gateway.get_transaction_outcome.return_value = pending_outcome_response()
+
+        self.transaction.get_transaction_outcome()
+        self.transaction.get_transaction_outcome()
+
+        self.assertEqual(mock_gateway.get_transaction_outcome.call_count, 2)
+        self.assertIsNone(get_cached_outcome(self.transaction.transaction_id))
+
+    def test_cache_outcome__replaced(self):
+        cache_outcome('transaction-id', TransactionResult(200, outcome_live_response().json()))
+        self.assertEqual(get_cached_outcome('transaction-id').status, 'Ok')
+
+        cache_outcome('transaction-id', TransactionResult(200, pending_outcome_response().json()))
+        self.assertIsNone(get_cached_outcome('transaction-id'))
+
+    def test_cache_outcome__error_not_cached(self):
+        cache_outcome('transaction-id', TransactionResult.from_response(gone_response()))
+
+        self.assertIsNone(get_cached_outcome('transaction-id'))
+
+    @override_settings(SAGEPAYPI_OUTCOME_CACHE=None)
+    def test_not_cached_by_default(self):
+        cache_outcome('transaction-id', TransactionResult(200, outcome_live_response().json()))
+
+        self.assertIsNone(get_cached_outcome('transaction-id'))
@@ -0,0 +1,82 @@
+from datetime import datetime, timezone
+
+import mock
+
+from sagepaypi.exceptions import InvalidTransactionStatus
+from sagepaypi.models import Transaction
+from sagepaypi.validation import PreflightError
+from tests.test_case import AppTestCase
+
+
+class TestPreflight(AppTestCase):
+    fixtures = ['tests/fixtures/test']
+
+    def setUp(self):
+        self.transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_submit_transaction__not_sent_when_invalid(self, mock_gateway):
+        self.transaction.description = 'x' * 101
+
+        with self.assertRaises(PreflightError) as e:
+            self.transaction.submit_transaction()
+
+        self.assertEqual(e.exception.errors[0]['property'], 'description')
+        mock_gateway.submit_transaction.assert_not_called()
+        self.assertEqual(self.transaction.responses.count(), 0)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_submit_transaction__not_sent_when_card_identifier_expired(self, mock_gateway):
+        card_identifier = self.transaction.card_identifier
+        card_identifier.card_identifier_expiry = datetime(2019, 1, 1, 0, 10, tzinfo=timezone.utc)
+
+        with self.assertRaises(InvalidTransactionStatus) as e:
+            self.transaction.submit_transaction()
+
+        self.assertEqual(e.exception.args[0], 'the card identifier has expired')
+        mock_gateway.submit_transaction.assert_not_called()
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_submit_transaction__reusable_card_identifier_not_expired(self, mock_gateway):
+        card_identifier = self.transaction.card_identifier
+        card_identifier.card_identifier_expiry = datetime(2019, 1, 1, 0, 10, tzinfo=timezone.utc)
+        card_identifier.reusable = True
+
+        self.transaction.check_can_submit({
+            **self.transaction.get_submit_data(),
+            'paymentMethod': {'card': {'merchantSessionKey': 'key', 'cardIdentifier': 'card', 'reusable': True}}
+        })
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_refund__not_saved_when_invalid(self, mock_gateway):
+        self.transaction.transaction_id = 'dummy-transaction-id'
+        self.transaction.status_code = '0000'
+
+        with self.assertRaises(PreflightError):
+            self.transaction.refund(amount=1, description='x' * 101)
+
+        self.assertEqual(Transaction.objects.count(), 1)
+        mock_gateway.submit_transaction.assert_not_called()
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_release__not_sent_when_invalid(self, mock_gateway):
+        self.transaction.transaction_id = 'dummy-transaction-id'
+        self.transaction.type = 'Deferred'
+        self.transaction.status_code = '0000'
+        self.transaction.created_at = datetime.now(timezone.utc)
+        self.transaction.amount = 0
+
+        with self.assertRaises(PreflightError) as e:
+            self.transaction.release()
+
+        self.assertEqual(e.exception.errors[0]['property'], 'amount')
+        mock_gateway.submit_transaction_instruction.assert_not_called()
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_get_3d_secure_status__not_sent_when_invalid(self, mock_gateway):
+        self.transaction.transaction_id = 'dummy-transaction-id'
+
+        with self.assertRaises(PreflightError):
+            self.transaction.get_3d_secure_status('')
+
+        mock_gateway.get_3d_secure_status.assert_not_called()
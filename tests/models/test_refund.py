@@ -3,7 +3,7 @@ import mock
 from sagepaypi.exceptions import InvalidTransactionStatus
 from sagepaypi.models import Transaction
 
-from tests.mocks import created_refund_response
+from tests.mocks import created_refund_response, gone_response
 from tests.test_case import AppTestCase
 
 
@@ -101,6 +101,7 @@ class TestRefundTransaction(AppTestCase):
         transaction.transaction_id = 'dummy-transaction-id'
         transaction.type = 'Payment'
         transaction.status_code = '0000'
+        transaction.amount = 100
 
         refund = transaction.refund(amount=50, description='refund payment', vendor_tx_code='refund-123')
 
@@ -145,3 +146,68 @@ class TestRefundTransaction(AppTestCase):
         self.assertEqual(refund.transaction_id, json['transactionId'])
         self.assertEqual(refund.retrieval_reference, json['retrievalReference'])
         self.assertEqual(refund.bank_authorisation_code, json['bankAuthorisationCode'])
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_error__over_refund(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = created_refund_response()
+
+        transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+        transaction.transaction_id = 'dummy-transaction-id'
+        transaction.type = 'Payment'
+        transaction.status_code = '0000'
+        transaction.amount = 100
+        transaction.save()
+
+        transaction.refund(amount=60)
+
+        with self.assertRaises(InvalidTransactionStatus) as e:
+            transaction.refund(amount=50)
+
+        self.assertEqual(
+            e.exception.args[0],
+            'can only refund up to the original amount and no more'
+        )
+
+        # defaults to the amount not refunded yet
+        refund = transaction.refund()
+
+        self.assertEqual(refund.amount, 40)
+        self.assertEqual(transaction.refunded_amount, 100)
+        self.assertEqual(transaction.refundable_amount, 0)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_error__nothing_left_to_refund(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = created_refund_response()
+
+        transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+        transaction.transaction_id = 'dummy-transaction-id'
+        transaction.type = 'Payment'
+        transaction.status_code = '0000'
+        transaction.save()
+
+        transaction.refund()
+
+        with self.assertRaises(InvalidTransactionStatus) as e:
+            transaction.refund()
+
+        self.assertEqual(e.exception.args[0], 'nothing left to refund')
+        self.assertEqual(Transaction.objects.filter(type='Refund').count(), 1)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_error__pending_refund(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = gone_response()
+
+        transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+        transaction.transaction_id = 'dummy-transaction-id'
+        transaction.type = 'Payment'
+        transaction.status_code = '0000'
+        transaction.amount = 100
+        transaction.save()
+
+        # a refund without a response may still have been made
+        transaction.refund(amount=60)
+
+        with self.assertRaises(InvalidTransactionStatus) as e:
+            transaction.refund(amount=50)
+
+        self.assertEqual(e.exception.args[0], 'can only refund up to the original amount and no more')
@@ -0,0 +1,159 @@
+from io import StringIO
+
+import mock
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import RequestFactory
+
+from sagepaypi.admin import TransactionAdmin
+from sagepaypi.backfill import backfill_response_details
+from sagepaypi.bulk import BulkResult, submit_transactions
+from sagepaypi.models import Transaction
+from tests.mocks import auth_required_response, created_payment_response, outcome_live_response, TRANSACTION_DATA
+from tests.test_case import AppTestCase
+
+
+def details(transaction):
+    return (
+        transaction.avs_cvc_status,
+        transaction.bank_response_code,
+        transaction.card_type,
+        transaction.card_last_four,
+        transaction.secure_status
+    )
+
+
+EXPECTED = ('NotChecked', '00', 'Visa', '5559', 'CardNotEnrolled')
+
+
+class TestResponseDetails(AppTestCase):
+    fixtures = ['tests/fixtures/test']
+
+    def setUp(self):
+        self.transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_submit(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = created_payment_response()
+
+        self.transaction.submit_transaction()
+
+        self.assertEqual(details(Transaction.objects.get(pk=self.transaction.pk)), EXPECTED)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_submit__requires_3d_auth(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = auth_required_response()
+
+        self.transaction.submit_transaction()
+
+        self.assertEqual(details(self.transaction), (None, None, None, None, None))
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_outcome(self, mock_gateway):
+        mock_gateway.get_transaction_outcome.return_value = outcome_live_response()
+
+        self.transaction.transaction_id = 'dummy-transaction-id'
+        self.transaction.get_transaction_outcome()
+
+        self.assertEqual(details(Transaction.objects.get(pk=self.transaction.pk)), EXPECTED)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_outcome__secure_status_kept(self, mock_gateway):
+        mock_gateway.get_transaction_outcome.return_value = outcome_live_response()
+
+        self.transaction.transaction_id = 'dummy-transaction-id'
+        self.transaction.secure_status = 'Authenticated'
+        self.transaction.get_transaction_outcome()
+
+        self.assertEqual(self.transaction.secure_status, 'Authenticated')
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_bulk(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = created_payment_response()
+
+        submit_transactions([self.transaction], BulkResult())
+
+        self.assertEqual(details(Transaction.objects.get(pk=self.transaction.pk)), EXPECTED)
+
+    def test_filter(self):
+        Transaction.objects.filter(pk=self.transaction.pk).update(avs_cvc_status='AllMatched')
+
+        model_admin = TransactionAdmin(Transaction, admin.site)
+        request = RequestFactory().get('/', {'avs_cvc_status': 'AllMatched'})
+        request.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+
+        changelist = model_admin.get_changelist_instance(request)
+
+        self.assertEqual(list(changelist.queryset), [self.transaction])
+
+
+class TestBackfillResponseDetails(AppTestCase):
+    fixtures = ['tests/fixtures/test']
+
+    def setUp(self):
+        self.transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+        Transaction.objects.filter(pk=self.transaction.pk).update(transaction_id='dummy-transaction-id')
+
+    def create_transaction(self, vendor_tx_code):
+        transaction = Transaction.objects.get(pk=self.transaction.pk)
+        transaction.pk = None
+        transaction.vendor_tx_code = vendor_tx_code
+        transaction.save()
+        return transaction
+
+    def test_backfill(self):
+        self.transaction.responses.create(step='submit_transaction', status_code=201, data=TRANSACTION_DATA)
+
+        updated, last_pk = backfill_response_details()
+
+        self.assertEqual(updated, 1)
+        self.assertEqual(last_pk, self.transaction.pk)
+        self.assertEqual(details(Transaction.objects.get(pk=self.transaction.pk)), EXPECTED)
+
+    def test_backfill__updated_at(self):
+        self.transaction.responses.create(step='submit_transaction', status_code=201, data=TRANSACTION_DATA)
+        updated_at = Transaction.objects.get(pk=self.transaction.pk).updated_at
+
+        backfill_response_details()
+
+        # so the daily summaries refresh the days of the transactions
+        self.assertGreater(Transaction.objects.get(pk=self.transaction.pk).updated_at, updated_at)
+
+    def test_backfill__latest_response(self):
+        self.transaction.responses.create(step='submit_transaction', status_code=202, data={'statusCode': '2007'})
+        self.transaction.responses.create(step='get_transaction_outcome', status_code=200, data=TRANSACTION_DATA)
+        self.transaction.responses.create(step='get_transaction_outcome', status_code=404, data={})
+        self.transaction.responses.create(step='void_transaction', status_code=201, data={'instructionType': 'void'})
+
+        backfill_response_details()
+
+        self.assertEqual(details(Transaction.objects.get(pk=self.transaction.pk)), EXPECTED)
+
+    def test_backfill__without_responses(self):
+        self.assertEqual(backfill_response_details()[0], 0)
+
+    def test_backfill__batches(self):
+        others = [self.create_transaction('other-%s' % i) for i in range(2)]
+        for transaction in [self.transaction] + others:
+            transaction.responses.create(step='submit_transaction', status_code=201, data=TRANSACTION_DATA)
+
+        pks = sorted(transaction.pk for transaction in [self.transaction] + others)
+
+        updated, last_pk = backfill_response_details(batch_size=2, max_batches=1)
+
+        self.assertEqual((updated, last_pk), (2, pks[1]))
+        self.assertIsNone(Transaction.objects.get(pk=pks[2]).card_type)
+
+        # resumed after the last transaction
+        self.assertEqual(backfill_response_details(after=last_pk, batch_size=2), (1, pks[2]))
+        self.assertEqual(Transaction.objects.get(pk=pks[2]).card_type, 'Visa')
+
+    def test_command(self):
+        self.transaction.responses.create(step='submit_transaction', status_code=201, data=TRANSACTION_DATA)
+        out = StringIO()
+
+        call_command('sagepaypi_backfill_response_details', batch_size=10, stdout=out)
+
+        self.assertIn('Transactions updated: 1', out.getvalue())
+        self.assertIn('Last transaction: %s' % self.transaction.pk, out.getvalue())
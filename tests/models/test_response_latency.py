@@ -0,0 +1,148 @@
+from datetime import date, datetime
+
+import mock
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.test import RequestFactory, override_settings
+from django.utils.timezone import utc
+
+from sagepaypi.admin import TransactionResponseAdmin
+from sagepaypi.bulk import BulkResult, submit_transactions
+from sagepaypi.models import Transaction, TransactionResponse
+from sagepaypi.results import TransactionResult
+from sagepaypi.transports import CallMetrics
+from tests.mocks import outcome_live_response, TRANSACTION_DATA
+from tests.test_case import AppTestCase
+
+
+def measured_response(status_code=201, data=TRANSACTION_DATA, duration=250.0):
+    return TransactionResult(status_code, data, metrics=CallMetrics(
+        duration=duration,
+        time_to_first_byte=200.0,
+        retry_count=1,
+        request_size=512,
+        response_size=1024
+    ))
+
+
+class TestResponseLatency(AppTestCase):
+    fixtures = ['tests/fixtures/test']
+
+    def setUp(self):
+        self.transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+
+    def create_response(self, step, duration, day=1, **kwargs):
+        response = self.transaction.responses.create(step=step, status_code=200, duration=duration, **kwargs)
+        TransactionResponse.objects.filter(pk=response.pk).update(created_at=datetime(2019, 1, day, 12, tzinfo=utc))
+        return response
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_metrics_recorded(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = measured_response()
+
+        self.transaction.submit_transaction()
+
+        response = self.transaction.responses.get(step='submit_transaction')
+        self.assertEqual(response.duration, 250.0)
+        self.assertEqual(response.time_to_first_byte, 200.0)
+        self.assertEqual(response.retry_count, 1)
+        self.assertEqual(response.request_size, 512)
+        self.assertEqual(response.response_size, 1024)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_metrics_recorded__not_measured(self, mock_gateway):
+        mock_gateway.get_transaction_outcome.return_value = outcome_live_response()
+
+        self.transaction.transaction_id = 'dummy-transaction-id'
+        self.transaction.get_transaction_outcome()
+
+        response = self.transaction.responses.get(step='get_transaction_outcome')
+        self.assertIsNone(response.duration)
+        self.assertIsNone(response.retry_count)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_metrics_recorded__bulk(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = measured_response()
+
+        submit_transactions([self.transaction], BulkResult())
+
+        self.assertEqual(self.transaction.responses.get(step='submit_transaction').duration, 250.0)
+
+    def test_latency_by(self):
+        self.create_response('submit_transaction', 100, retry_count=0, request_size=500, response_size=1000)
+        self.create_response('submit_transaction', 300, retry_count=2, request_size=700, response_size=1200)
+        self.create_response('get_transaction_outcome', 50)
+        self.create_response('submit_transaction', 400, day=2)
+        # not measured
+        self.transaction.responses.create(step='submit_transaction', status_code=200)
+
+        rows = TransactionResponse.objects.latency_by('day', 'step')
+
+        self.assertEqual([(row['day'], row['step'], row['count']) for row in rows], [
+            (date(2019, 1, 1), 'get_transaction_outcome', 1),
+            (date(2019, 1, 1), 'submit_transaction', 2),
+            (date(2019, 1, 2), 'submit_transaction', 1),
+        ])
+        self.assertEqual(rows[1]['avg_duration'], 200)
+        self.assertEqual(rows[1]['max_duration'], 300)
+        self.assertEqual(rows[1]['retry_count'], 2)
+        self.assertEqual(rows[1]['avg_request_size'], 600)
+        self.assertEqual(rows[1]['avg_response_size'], 1100)
+        self.assertEqual(rows[0]['retry_count'], 0)
+
+    def test_latency_by__step(self):
+        self.create_response('submit_transaction', 100)
+        self.create_response('submit_transaction', 400, day=2)
+
+        rows = TransactionResponse.objects.latency_by('step')
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['avg_duration'], 250)
+
+
+class TestResponseLatencyAdmin(AppTestCase):
+    fixtures = ['tests/fixtures/test']
+
+    def setUp(self):
+        self.model_admin = TransactionResponseAdmin(TransactionResponse, admin.site)
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+
+    def get_changelist(self, **params):
+        request = RequestFactory().get('/', params)
+        request.user = self.user
+        return self.model_admin.get_changelist_instance(request)
+
+    def test_latency(self):
+        self.transaction.responses.create(step='get_transaction_outcome', status_code=200, duration=50)
+        self.transaction.responses.create(step='submit_transaction', status_code=201, duration=300)
+        old = self.transaction.responses.create(step='submit_transaction', status_code=201, duration=900)
+        TransactionResponse.objects.filter(pk=old.pk).update(created_at=datetime(2019, 1, 1, tzinfo=utc))
+
+        latency = self.get_changelist().latency
+
+        # the slowest steps first, older responses are left out
+        self.assertEqual([(row['step'], row['avg_duration']) for row in latency], [
+            ('submit_transaction', 300),
+            ('get_transaction_outcome', 50),
+        ])
+
+        # filtered by the changelist
+        self.assertEqual(len(self.get_changelist(step='submit_transaction').latency), 1)
+
+    @override_settings(SAGEPAYPI_ADMIN_LATENCY_DAYS=100000)
+    def test_latency__days(self):
+        old = self.transaction.responses.create(step='submit_transaction', status_code=201, duration=900)
+        TransactionResponse.objects.filter(pk=old.pk).update(created_at=datetime(2019, 1, 1, tzinfo=utc))
+
+        self.assertEqual(len(self.get_changelist().latency), 1)
+
+    def test_changelist_view(self):
+        self.transaction.responses.create(step='submit_transaction', status_code=201, duration=300)
+
+        request = RequestFactory().get('/')
+        request.user = self.user
+
+        response = self.model_admin.changelist_view(request)
+
+        self.assertContains(response, '<table id="latency">')
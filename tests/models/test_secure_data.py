@@ -0,0 +1,115 @@
+import mock
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from sagepaypi.bulk import BulkResult, submit_transactions
+from sagepaypi.models import Transaction, TransactionSecureData
+from tests.mocks import auth_required_response, auth_success_response, created_payment_response, outcome_live_response
+from tests.test_case import AppTestCase
+
+
+class TestSecureData(AppTestCase):
+    fixtures = ['tests/fixtures/test']
+
+    def setUp(self):
+        self.transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+
+    def test_no_secure_data(self):
+        self.assertIsNone(self.transaction.get_secure_data())
+        self.assertIsNone(self.transaction.pareq)
+        self.assertIsNone(self.transaction.creq)
+
+    def test_new_transaction_not_looked_up(self):
+        with self.assertNumQueries(0):
+            self.assertIsNone(Transaction().pareq)
+
+    def test_set__saved_with_transaction(self):
+        self.transaction.pareq = 'pareq-data'
+        self.transaction.save()
+
+        secure_data = TransactionSecureData.objects.get(transaction=self.transaction)
+        self.assertEqual(secure_data.pareq, 'pareq-data')
+        self.assertEqual(Transaction.objects.get(pk=self.transaction.pk).pareq, 'pareq-data')
+
+    def test_set__empty_not_saved(self):
+        self.transaction.pareq = None
+        self.transaction.save()
+
+        self.assertFalse(TransactionSecureData.objects.exists())
+
+    def test_set__new_transaction(self):
+        transaction = Transaction.objects.get(pk=self.transaction.pk)
+        transaction.pk = None
+        transaction.vendor_tx_code = 'other'
+        transaction.creq = 'creq-data'
+        transaction.save()
+
+        self.assertEqual(TransactionSecureData.objects.get(transaction=transaction).creq, 'creq-data')
+
+    def test_transaction_row_not_loaded_with_secure_data(self):
+        self.transaction.pareq = 'pareq-data'
+        self.transaction.save()
+
+        with CaptureQueriesContext(connection) as queries:
+            Transaction.objects.get(pk=self.transaction.pk)
+
+        self.assertNotIn('pareq', queries[0]['sql'])
+
+    def test_purge(self):
+        self.transaction.pareq = 'pareq-data'
+        self.transaction.save()
+
+        self.transaction.purge_secure_data()
+
+        self.assertIsNone(self.transaction.pareq)
+        self.assertFalse(TransactionSecureData.objects.exists())
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_submit__requires_3d_auth(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = auth_required_response()
+
+        self.transaction.submit_transaction()
+
+        secure_data = TransactionSecureData.objects.get(transaction=self.transaction)
+        self.assertEqual(secure_data.pareq, auth_required_response().json()['paReq'])
+        self.assertIsNone(secure_data.creq)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_submit__no_3d_auth(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = created_payment_response()
+
+        self.transaction.submit_transaction()
+
+        self.assertFalse(TransactionSecureData.objects.exists())
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_submit__bulk(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = auth_required_response()
+
+        submit_transactions([self.transaction], BulkResult())
+
+        self.assertEqual(
+            Transaction.objects.get(pk=self.transaction.pk).pareq,
+            auth_required_response().json()['paReq']
+        )
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_purged_after_3d_secure(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = auth_required_response()
+        mock_gateway.get_3d_secure_status.return_value = auth_success_response()
+        mock_gateway.get_transaction_outcome.return_value = outcome_live_response()
+
+        self.transaction.submit_transaction()
+        self.transaction.get_3d_secure_status('pares-data')
+
+        self.assertFalse(TransactionSecureData.objects.exists())
+        self.assertIsNone(Transaction.objects.get(pk=self.transaction.pk).pareq)
+
+    def test_deleted_with_transaction(self):
+        self.transaction.pareq = 'pareq-data'
+        self.transaction.save()
+        self.transaction.responses.all().delete()
+
+        Transaction.objects.filter(pk=self.transaction.pk).delete()
+
+        self.assertFalse(TransactionSecureData.objects.exists())
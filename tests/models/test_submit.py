@@ -1,5 +1,6 @@
 import mock
 
+from sagepaypi.exceptions import InvalidTransactionStatus
 from sagepaypi.models import Transaction
 from tests.mocks import (
     gone_response,
@@ -91,3 +92,75 @@ class TestSubmitTransaction(AppTestCase):
         self.assertIsNone(transaction.bank_authorisation_code)
         self.assertIsNone(transaction.pareq)
         self.assertIsNone(transaction.acs_url)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_submit_transaction__save_card(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = created_payment_response()
+
+        transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+        transaction.save_card = True
+        transaction.submit_transaction()
+
+        payload = mock_gateway.submit_transaction.call_args[0][0]
+
+        self.assertEqual(
+            payload['paymentMethod']['card'],
+            {
+                'merchantSessionKey': 'C72FB248-1926-46D0-9DAA-B9EC0A8F1AF7',
+                'cardIdentifier': '9641440A-E5AC-4191-8CAE-DC6C1AE11BCA',
+                'save': True
+            }
+        )
+        self.assertEqual(payload['credentialType'], {'cofUsage': 'First', 'initiatedType': 'CIT'})
+
+        transaction.card_identifier.refresh_from_db()
+        self.assertTrue(transaction.card_identifier.reusable)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_submit_transaction__save_card_not_reusable_when_unsuccessful(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = auth_required_response()
+
+        transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+        transaction.save_card = True
+        transaction.submit_transaction()
+
+        transaction.card_identifier.refresh_from_db()
+        self.assertFalse(transaction.card_identifier.reusable)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_submit_transaction__reusable_card(self, mock_gateway):
+        mock_gateway.get_merchant_session_key.return_value = ('new-merchant-session-key', None)
+        mock_gateway.submit_transaction.return_value = created_payment_response()
+
+        transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+        transaction.card_identifier.reusable = True
+        transaction.submit_transaction()
+
+        payload = mock_gateway.submit_transaction.call_args[0][0]
+
+        self.assertEqual(
+            payload['paymentMethod']['card'],
+            {
+                'merchantSessionKey': 'new-merchant-session-key',
+                'cardIdentifier': '9641440A-E5AC-4191-8CAE-DC6C1AE11BCA',
+                'reusable': True
+            }
+        )
+        self.assertEqual(payload['credentialType'], {'cofUsage': 'Subsequent', 'initiatedType': 'CIT'})
+        self.assertTrue(transaction.successful)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_submit_transaction__reusable_card_without_session_key(self, mock_gateway):
+        mock_gateway.get_merchant_session_key.return_value = None
+
+        transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+        transaction.card_identifier.reusable = True
+
+        with self.assertRaises(InvalidTransactionStatus) as e:
+            transaction.submit_transaction()
+
+        self.assertEqual(
+            e.exception.args[0],
+            'cannot create a merchant session key for the reusable card identifier'
+        )
+        self.assertFalse(mock_gateway.submit_transaction.called)
@@ -1,10 +1,12 @@
 import uuid
 
+import mock
 from django.core.exceptions import ValidationError
 from django.db import models
 
 from sagepaypi.constants import TRANSACTION_TYPE_CHOICES
-from sagepaypi.models import CardIdentifier, Transaction
+from sagepaypi.ids import generate_vendor_tx_code
+from sagepaypi.models import CardIdentifier, Transaction, TransactionSecureData
 
 from tests.test_case import AppTestCase
 
@@ -18,6 +20,14 @@ class TestManager(AppTestCase):
         transaction_from_manager = Transaction.objects.get_for_token(tidb64, token)
         self.assertEqual(transaction, transaction_from_manager)
 
+    def test_get_for_3d_secure_session_data(self):
+        transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+        session_data = transaction.get_3d_secure_session_data()
+
+        self.assertEqual(Transaction.objects.get_for_3d_secure_session_data(session_data), transaction)
+        self.assertIsNone(Transaction.objects.get_for_3d_secure_session_data('invalid'))
+        self.assertIsNone(Transaction.objects.get_for_3d_secure_session_data(''))
+
     def test_get_for_token__invalid_args(self):
         transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
         tidb64, token = transaction.get_tokens()
@@ -58,7 +68,7 @@ class TestModel(AppTestCase):
 
     def test_vendor_tx_code(self):
         field = self.get_field(Transaction, 'vendor_tx_code')
-        self.assertModelField(field, models.CharField, default=uuid.uuid4)
+        self.assertModelField(field, models.CharField, default=generate_vendor_tx_code)
         self.assertEqual(field.max_length, 40)
         self.assertTrue(field.unique)
 
@@ -110,13 +120,25 @@ class TestModel(AppTestCase):
         self.assertModelField(field, models.URLField, True, True)
 
     def test_pareq(self):
-        field = self.get_field(Transaction, 'pareq')
+        field = self.get_field(TransactionSecureData, 'pareq')
         self.assertModelField(field, models.TextField, True, True)
 
     def test_pares(self):
-        field = self.get_field(Transaction, 'pares')
+        field = self.get_field(TransactionSecureData, 'pares')
+        self.assertModelField(field, models.TextField, True, True)
+
+    def test_creq(self):
+        field = self.get_field(TransactionSecureData, 'creq')
+        self.assertModelField(field, models.TextField, True, True)
+
+    def test_cres(self):
+        field = self.get_field(TransactionSecureData, 'cres')
         self.assertModelField(field, models.TextField, True, True)
 
+    def test_strong_customer_authentication(self):
+        field = self.get_field(Transaction, 'strong_customer_authentication')
+        self.assertModelField(field, models.JSONField, True, True)
+
     def test_secure_status(self):
         field = self.get_field(Transaction, 'secure_status')
         self.assertModelField(field, models.CharField, True, True)
@@ -135,6 +157,11 @@ class TestModel(AppTestCase):
         field = self.get_field(Transaction, 'reference_transaction')
         self.assertModelPKField(field, Transaction, models.CASCADE, True, True)
 
+    def test_save_card(self):
+        field = self.get_field(Transaction, 'save_card')
+        self.assertModelField(field, models.BooleanField)
+        self.assertFalse(field.default)
+
     # meta
 
     def test_ordering(self):
@@ -154,6 +181,11 @@ class TestModel(AppTestCase):
             Transaction(status_code='1234').requires_3d_secure
         )
 
+    def test_requires_3d_secure_challenge(self):
+        self.assertTrue(Transaction(status_code='2021').requires_3d_secure)
+        self.assertTrue(Transaction(status_code='2021').requires_3d_secure_challenge)
+        self.assertFalse(Transaction(status_code='2007').requires_3d_secure_challenge)
+
     def test_successful(self):
         self.assertTrue(
             Transaction(status_code='0000').successful
@@ -162,6 +194,20 @@ class TestModel(AppTestCase):
             Transaction(status_code='1234').successful
         )
 
+    def test_get_tokens(self):
+        transaction = Transaction(updated_at=Transaction.utc_now())
+
+        with mock.patch('sagepaypi.models.transaction.default_token_generator.make_token') as make_token:
+            make_token.return_value = 'token'
+
+            self.assertEqual(transaction.get_tokens(), transaction.get_tokens())
+            self.assertEqual(make_token.call_count, 1)
+
+            # the tokens are made again once the transaction changes
+            transaction.updated_at = Transaction.utc_now()
+            transaction.get_tokens()
+            self.assertEqual(make_token.call_count, 2)
+
     # validation
 
     def test_clean(self):
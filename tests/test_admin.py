@@ -0,0 +1,71 @@
+from datetime import datetime
+from unittest import mock
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.test import RequestFactory, override_settings
+from django.utils.timezone import utc
+
+from sagepaypi.admin import EstimatedCountPaginator, TransactionAdmin, TransactionResponseInline
+from sagepaypi.models import Transaction
+from tests.test_case import AppTestCase
+
+
+class TestTransactionAdmin(AppTestCase):
+    fixtures = ['tests/fixtures/test']
+
+    def setUp(self):
+        self.model_admin = TransactionAdmin(Transaction, admin.site)
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+
+    def get_changelist(self, **params):
+        request = RequestFactory().get('/', params)
+        request.user = self.user
+        return self.model_admin.get_changelist_instance(request)
+
+    def test_filters(self):
+        Transaction.objects.filter(pk=self.transaction.pk).update(status='Ok', instruction='release')
+
+        self.assertEqual(self.get_changelist(status='Ok', type='Payment', instruction='release').result_count, 1)
+        self.assertEqual(self.get_changelist(status='Rejected').result_count, 0)
+        self.assertEqual(self.get_changelist(instruction='abort').result_count, 0)
+
+    def test_search(self):
+        self.assertEqual(self.get_changelist(q='13bf01cf-81ef-4312-a3e5-11412e28e58e').result_count, 1)
+        # searches are exact matches
+        self.assertEqual(self.get_changelist(q='13bf01cf').result_count, 0)
+        self.assertEqual(self.get_changelist(q='13BF01CF-81EF-4312-A3E5-11412E28E58E').result_count, 0)
+
+    def test_estimated_count(self):
+        with mock.patch('sagepaypi.admin.estimated_count', return_value=20000):
+            changelist = self.get_changelist()
+            self.assertEqual(changelist.result_count, 20000)
+            self.assertIsNone(changelist.full_result_count)
+
+            # filtered changelists are counted
+            self.assertEqual(self.get_changelist(status='Ok').result_count, 0)
+
+    def test_estimated_count__below_threshold(self):
+        with mock.patch('sagepaypi.admin.estimated_count', return_value=5):
+            self.assertEqual(self.get_changelist().result_count, 1)
+
+    def test_estimated_count__not_postgresql(self):
+        paginator = EstimatedCountPaginator(Transaction.objects.all(), 100)
+        self.assertEqual(paginator.count, 1)
+
+    @override_settings(SAGEPAYPI_ADMIN_INLINE_RESPONSES=2)
+    def test_inline_latest_responses(self):
+        for day, step in enumerate(['one', 'two', 'three'], 1):
+            response = self.transaction.responses.create(step=step, status_code=200, data={'step': step})
+            self.transaction.responses.filter(pk=response.pk).update(created_at=datetime(2019, 1, day, tzinfo=utc))
+
+        request = RequestFactory().get('/')
+        request.user = self.user
+        inline = TransactionResponseInline(Transaction, admin.site)
+        formset = inline.get_formset(request, self.transaction)(instance=self.transaction)
+
+        responses = list(formset.get_queryset())
+
+        self.assertEqual([obj.step for obj in responses], ['three', 'two'])
+        self.assertEqual(responses[0].get_deferred_fields(), {'data'})
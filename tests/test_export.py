@@ -0,0 +1,91 @@
+import csv
+import json
+from io import StringIO
+
+from django.contrib import admin
+from django.core.management import call_command
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, override_settings
+
+from sagepaypi.admin import TransactionAdmin
+from sagepaypi.export import export_transactions
+from sagepaypi.models import Transaction
+from tests.test_case import AppTestCase
+
+
+class TestExport(AppTestCase):
+    fixtures = ['tests/fixtures/test']
+
+    def setUp(self):
+        self.transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+        self.transaction.responses.create(step='submit_transaction', status_code=500, data={})
+        self.transaction.responses.create(step='get_transaction_outcome', status_code=200, data={'status': 'Ok'})
+
+    def test_csv(self):
+        rows = list(csv.DictReader(export_transactions(Transaction.objects.all())))
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['id'], 'ec87ac03-7c34-472c-823b-1950da3568e6')
+        self.assertEqual(rows[0]['vendor_tx_code'], '13bf01cf-81ef-4312-a3e5-11412e28e58e')
+        self.assertEqual(rows[0]['amount'], '1')
+        self.assertNotIn('pareq', rows[0])
+        self.assertNotIn('response_step', rows[0])
+
+    def test_csv__include_response(self):
+        with self.assertNumQueries(1):
+            rows = list(csv.DictReader(export_transactions(Transaction.objects.all(), include_response=True)))
+
+        self.assertEqual(rows[0]['response_step'], 'get_transaction_outcome')
+        self.assertEqual(rows[0]['response_status_code'], '200')
+        self.assertEqual(json.loads(rows[0]['response_data']), {'status': 'Ok'})
+
+    def test_jsonl(self):
+        lines = list(export_transactions(Transaction.objects.all(), format='jsonl', include_response=True))
+
+        self.assertEqual(len(lines), 1)
+
+        row = json.loads(lines[0])
+        self.assertEqual(row['id'], 'ec87ac03-7c34-472c-823b-1950da3568e6')
+        self.assertEqual(row['response_data'], {'status': 'Ok'})
+
+    def test_invalid_format(self):
+        with self.assertRaises(ValueError):
+            export_transactions(Transaction.objects.all(), format='xml')
+
+    def test_command(self):
+        out = StringIO()
+        call_command('sagepaypi_export', format='jsonl', since='2018-12-01', until='2019-02-01', stdout=out)
+
+        self.assertEqual(json.loads(out.getvalue())['id'], 'ec87ac03-7c34-472c-823b-1950da3568e6')
+
+        out = StringIO()
+        call_command('sagepaypi_export', since='2019-02-01', stdout=out)
+
+        self.assertEqual(len(out.getvalue().splitlines()), 1)
+
+    @override_settings(TIME_ZONE='UTC')
+    def test_command__dates_from_midnight(self):
+        # created at midnight
+        out = StringIO()
+        call_command('sagepaypi_export', format='jsonl', since='2019-01-01', stdout=out)
+
+        self.assertEqual(len(out.getvalue().splitlines()), 1)
+
+        out = StringIO()
+        call_command('sagepaypi_export', format='jsonl', until='2019-01-01', stdout=out)
+
+        self.assertEqual(out.getvalue(), '')
+
+    def test_admin_action(self):
+        model_admin = TransactionAdmin(Transaction, admin.site)
+        request = RequestFactory().get('/')
+
+        response = model_admin.export_as_csv(request, Transaction.objects.all())
+
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('transactions.csv', response['Content-Disposition'])
+
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn('ec87ac03-7c34-472c-823b-1950da3568e6', content)
+        self.assertIn('get_transaction_outcome', content)
@@ -1,8 +1,12 @@
+from datetime import datetime, timedelta, timezone
+
 import dateutil
 import mock
 from django.test import override_settings
 
 from sagepaypi.gateway import default_gateway, SagepayGateway
+from sagepaypi.ratelimit import BATCH, INTERACTIVE, priority, TokenBucket
+from sagepaypi.transports import RequestsTransport
 from tests.mocks import MockResponse
 from tests.test_case import AppTestCase
 
@@ -52,7 +56,7 @@ class TestGateway(AppTestCase):
 
         self.assertEqual(url, 'https://pi-live.sagepay.com/api/v1')
 
-    @mock.patch('sagepaypi.gateway.requests.post', side_effect=mocked_success_requests)
+    @mock.patch('sagepaypi.transports.RequestsTransport.post', side_effect=mocked_success_requests)
     def test_get_merchant_session_key(self, mock_post):
         default_gateway.get_merchant_session_key()
 
@@ -65,20 +69,66 @@ class TestGateway(AppTestCase):
             mock_post.call_args_list
         )
 
-    @mock.patch('sagepaypi.gateway.requests.post', side_effect=mocked_success_requests)
+    @mock.patch('sagepaypi.transports.RequestsTransport.post', side_effect=mocked_success_requests)
     def test_get_merchant_session_key(self, mock_post):
         merchant_session_key = default_gateway.get_merchant_session_key()
 
         self.assertEqual(merchant_session_key[0], 'unique-key')
         self.assertEqual(merchant_session_key[1], dateutil.parser.parse('2015-08-11T11:45:16.285+01:00'))
 
-    @mock.patch('sagepaypi.gateway.requests.post', side_effect=mocked_gone_response)
+    @mock.patch('sagepaypi.transports.RequestsTransport.post', side_effect=mocked_gone_response)
     def test_get_merchant_session_key__returns_none_when_http_error(self, mock_post):
         merchant_session_key = default_gateway.get_merchant_session_key()
 
         self.assertIsNone(merchant_session_key)
 
-    @mock.patch('sagepaypi.gateway.requests.post', side_effect=mocked_success_requests)
+    @mock.patch('sagepaypi.transports.RequestsTransport.post', side_effect=mocked_success_requests)
+    def test_prefetch_merchant_session_key__used_once(self, mock_post):
+        expiry = datetime.now(timezone.utc) + timedelta(seconds=400)
+        mock_post.side_effect = [
+            MockResponse({'merchantSessionKey': 'prefetched', 'expiry': expiry.isoformat()}, 201),
+            MockResponse({'merchantSessionKey': 'fetched', 'expiry': expiry.isoformat()}, 201),
+        ]
+
+        default_gateway.prefetch_merchant_session_key()
+
+        self.assertEqual(default_gateway.get_merchant_session_key()[0], 'prefetched')
+        self.assertEqual(default_gateway.get_merchant_session_key()[0], 'fetched')
+        self.assertEqual(mock_post.call_count, 2)
+
+    @mock.patch('sagepaypi.transports.RequestsTransport.post', side_effect=mocked_success_requests)
+    def test_prefetch_merchant_session_key__not_used_when_about_to_expire(self, mock_post):
+        expiry = datetime.now(timezone.utc) + timedelta(seconds=30)
+        mock_post.side_effect = [
+            MockResponse({'merchantSessionKey': 'prefetched', 'expiry': expiry.isoformat()}, 201),
+            MockResponse({'merchantSessionKey': 'fetched', 'expiry': expiry.isoformat()}, 201),
+        ]
+
+        default_gateway.prefetch_merchant_session_key()
+
+        self.assertEqual(default_gateway.get_merchant_session_key()[0], 'fetched')
+
+    def test_transport__shared(self):
+        transport = default_gateway.transport
+
+        self.assertIsInstance(transport, RequestsTransport)
+        self.assertIs(SagepayGateway().transport, transport)
+
+    def test_transport__per_gateway(self):
+        transport = mock.Mock()
+        transport.post.return_value = MockResponse({}, 201)
+        gateway = SagepayGateway(transport)
+
+        gateway.submit_transaction({'foo': 1})
+
+        self.assertIs(gateway.transport, transport)
+        transport.post.assert_called_once_with(
+            'https://pi-test.sagepay.com/api/v1/transactions',
+            json={'foo': 1},
+            auth=gateway.basic_auth()
+        )
+
+    @mock.patch('sagepaypi.transports.RequestsTransport.post', side_effect=mocked_success_requests)
     def test_create_card_identifier(self, mock_post):
         default_gateway.create_card_identifier({'foo': 1})
 
@@ -99,7 +149,7 @@ class TestGateway(AppTestCase):
             mock_post.call_args_list
         )
 
-    @mock.patch('sagepaypi.gateway.requests.post', side_effect=mocked_success_requests)
+    @mock.patch('sagepaypi.transports.RequestsTransport.post', side_effect=mocked_success_requests)
     def test_get_3d_secure_status(self, mock_post):
         default_gateway.get_3d_secure_status('123', {'foo': 1})
 
@@ -112,7 +162,7 @@ class TestGateway(AppTestCase):
             mock_post.call_args_list
         )
 
-    @mock.patch('sagepaypi.gateway.requests.get', side_effect=mocked_success_requests)
+    @mock.patch('sagepaypi.transports.RequestsTransport.get', side_effect=mocked_success_requests)
     def test_get_transaction_outcome(self, mock_get):
         default_gateway.get_transaction_outcome('123')
 
@@ -124,7 +174,7 @@ class TestGateway(AppTestCase):
             mock_get.call_args_list
         )
 
-    @mock.patch('sagepaypi.gateway.requests.post', side_effect=mocked_success_requests)
+    @mock.patch('sagepaypi.transports.RequestsTransport.post', side_effect=mocked_success_requests)
     def test_submit_transaction(self, mock_post):
         default_gateway.submit_transaction({'foo': 1})
 
@@ -137,7 +187,7 @@ class TestGateway(AppTestCase):
             mock_post.call_args_list
         )
 
-    @mock.patch('sagepaypi.gateway.requests.post', side_effect=mocked_success_requests)
+    @mock.patch('sagepaypi.transports.RequestsTransport.post', side_effect=mocked_success_requests)
     def test_submit_transaction_instruction(self, mock_post):
         default_gateway.submit_transaction_instruction('123', {'foo': 1})
 
@@ -149,3 +199,40 @@ class TestGateway(AppTestCase):
             ),
             mock_post.call_args_list
         )
+
+    def test_get_rate_limiter__not_limited_by_default(self):
+        self.assertIsNone(default_gateway.get_rate_limiter('transactions'))
+
+    @override_settings(SAGEPAYPI_RATE_LIMITS={'default': 5, 'transactions': 10})
+    def test_get_rate_limiter(self):
+        limiter = default_gateway.get_rate_limiter('transactions')
+
+        self.assertIsInstance(limiter, TokenBucket)
+        self.assertEqual(limiter.rate, 10)
+        self.assertEqual(limiter.reserve, 2)
+        self.assertEqual(default_gateway.get_rate_limiter('instructions').rate, 5)
+
+        # shared between gateways
+        self.assertIs(SagepayGateway().get_rate_limiter('transactions'), limiter)
+
+    @override_settings(SAGEPAYPI_RATE_LIMITS={'transactions': 10})
+    @mock.patch('sagepaypi.transports.RequestsTransport.post', side_effect=mocked_success_requests)
+    def test_submit_transaction__throttled(self, mock_post):
+        limiter = default_gateway.get_rate_limiter('transactions')
+
+        with mock.patch.object(limiter, 'acquire') as mock_acquire:
+            default_gateway.submit_transaction({'foo': 1})
+            mock_acquire.assert_called_once_with(priority=INTERACTIVE)
+
+            with priority(BATCH):
+                default_gateway.submit_transaction({'foo': 1})
+            mock_acquire.assert_called_with(priority=BATCH)
+
+    @override_settings(SAGEPAYPI_RATE_LIMITS={'transaction-outcome': 10})
+    @mock.patch('sagepaypi.transports.RequestsTransport.get', return_value=MockResponse({}, 429))
+    def test_get_transaction_outcome__drains_limiter_when_throttled(self, mock_get):
+        limiter = default_gateway.get_rate_limiter('transaction-outcome')
+
+        with mock.patch.object(limiter, 'drain') as mock_drain:
+            default_gateway.get_transaction_outcome('123')
+            mock_drain.assert_called_once_with()
@@ -0,0 +1,80 @@
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils.encoding import force_str
+
+from sagepaypi.http import get_strong_customer_authentication, get_term_url, SecureRedirectResponse
+from sagepaypi.models import Transaction
+from tests.test_case import AppTestCase
+
+
+class TestSecureRedirectResponse(AppTestCase):
+    fixtures = ['tests/fixtures/test']
+
+    def setUp(self):
+        self.transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+        self.transaction.transaction_id = 'some-unique-key'
+        self.transaction.acs_url = 'https://acs.example.com/?a=1&b=2'
+        self.transaction.pareq = 'some-unique-string'
+        self.transaction.save()
+
+        self.request = RequestFactory().get('/')
+
+    def test_get_term_url(self):
+        tidb64, token = self.transaction.get_tokens()
+        expected = 'http://testserver' + reverse(
+            'sagepaypi:complete_3d_secure',
+            kwargs={'tidb64': force_str(tidb64), 'token': token}
+        )
+
+        self.assertEqual(get_term_url(self.request, self.transaction), expected)
+
+    def test_response(self):
+        response = SecureRedirectResponse(self.request, self.transaction)
+        html = response.content.decode()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('action="https://acs.example.com/?a=1&amp;b=2"', html)
+        self.assertIn('name="PaReq" value="some-unique-string"', html)
+        self.assertIn('name="TermUrl" value="%s"' % get_term_url(self.request, self.transaction), html)
+        self.assertIn('name="MD" value="some-unique-key"', html)
+        self.assertIn(".submit()", html)
+
+    def test_response__challenge(self):
+        self.transaction.creq = 'some-challenge-request'
+
+        response = SecureRedirectResponse(self.request, self.transaction)
+        html = response.content.decode()
+
+        self.assertIn('action="https://acs.example.com/?a=1&amp;b=2"', html)
+        self.assertIn('name="creq" value="some-challenge-request"', html)
+        self.assertIn(
+            'name="threeDSSessionData" value="%s"' % self.transaction.get_3d_secure_session_data(),
+            html
+        )
+        self.assertNotIn('PaReq', html)
+
+
+class TestStrongCustomerAuthentication(AppTestCase):
+
+    def test_get_strong_customer_authentication(self):
+        request = RequestFactory().get(
+            '/',
+            HTTP_ACCEPT='text/html,application/xhtml+xml',
+            HTTP_ACCEPT_LANGUAGE='en-GB,en;q=0.9',
+            HTTP_USER_AGENT='Mozilla/5.0',
+            REMOTE_ADDR='1.2.3.4'
+        )
+
+        data = get_strong_customer_authentication(request, browserJavascriptEnabled=True, browserColorDepth='24')
+
+        self.assertEqual(data, {
+            'notificationURL': 'http://testserver/sagepay/transactions/3d-secure/challenge/complete/',
+            'browserIP': '1.2.3.4',
+            'browserAcceptHeader': 'text/html,application/xhtml+xml',
+            'browserJavascriptEnabled': True,
+            'browserColorDepth': '24',
+            'browserLanguage': 'en-GB',
+            'browserUserAgent': 'Mozilla/5.0',
+            'challengeWindowSize': 'FullScreen',
+            'transType': 'GoodsAndServicePurchase',
+        })
@@ -0,0 +1,63 @@
+import time
+import uuid
+
+import mock
+from django.test import override_settings
+
+from sagepaypi import ids
+from sagepaypi.ids import generate_id, generate_vendor_tx_code, uuid7
+from sagepaypi.models import CardIdentifier, Transaction
+from tests.test_case import AppTestCase
+
+
+class TestUUID7(AppTestCase):
+
+    def test_version(self):
+        value = uuid7()
+
+        self.assertEqual(value.version, 7)
+        self.assertEqual(value.variant, uuid.RFC_4122)
+
+    def test_time(self):
+        before = time.time_ns() // 1000000
+        value = uuid7()
+        after = time.time_ns() // 1000000
+
+        self.assertGreaterEqual(value.int >> 80, before)
+        self.assertLessEqual(value.int >> 80, after + 1)
+
+    def test_ordered(self):
+        values = [uuid7() for i in range(10000)]
+
+        self.assertEqual(sorted(values), values)
+        self.assertEqual(len(set(values)), len(values))
+        self.assertEqual(sorted(str(value) for value in values), [str(value) for value in values])
+
+    @mock.patch.object(ids, '_uuid7_last', [0, 0])
+    @mock.patch('sagepaypi.ids.time.time_ns', return_value=1000000000000 * 1000000)
+    def test_ordered__within_a_millisecond(self, time_ns):
+        values = [uuid7() for i in range(5000)]
+
+        # the counter overflows into the next millisecond
+        self.assertEqual(sorted(values), values)
+        self.assertGreater(ids._uuid7_last[0], 1000000000000)
+
+
+class TestGenerateId(AppTestCase):
+
+    def test_default(self):
+        self.assertEqual(generate_id().version, 4)
+        self.assertEqual(uuid.UUID(generate_vendor_tx_code()).version, 4)
+
+    @override_settings(SAGEPAYPI_ID_GENERATOR='sagepaypi.ids.uuid7')
+    def test_setting(self):
+        self.assertEqual(generate_id().version, 7)
+        self.assertEqual(uuid.UUID(generate_vendor_tx_code()).version, 7)
+
+    @override_settings(SAGEPAYPI_ID_GENERATOR='sagepaypi.ids.uuid7')
+    def test_model_defaults(self):
+        transaction = Transaction()
+
+        self.assertEqual(transaction.pk.version, 7)
+        self.assertEqual(uuid.UUID(transaction.vendor_tx_code).version, 7)
+        self.assertEqual(CardIdentifier().pk.version, 7)
@@ -0,0 +1,79 @@
+from decimal import Decimal
+import sys
+import uuid
+
+import mock
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import override_settings
+
+from sagepaypi.jsoncodec import get_codec, JSONCodec, loads_raw, OrjsonCodec, RawJSON
+from sagepaypi.models import Transaction, TransactionResponse
+from tests.mocks import TRANSACTION_DATA
+from tests.test_case import AppTestCase
+
+
+class TestJSONCodec(AppTestCase):
+
+    def test_round_trip(self):
+        for codec in [JSONCodec(), OrjsonCodec()]:
+            self.assertEqual(codec.loads(codec.dumps(TRANSACTION_DATA)), TRANSACTION_DATA)
+
+    def test_dumps__django_types(self):
+        pk = uuid.uuid4()
+
+        for codec in [JSONCodec(), OrjsonCodec()]:
+            self.assertEqual(codec.loads(codec.dumps({'id': pk, 'amount': Decimal('1.10')})), {
+                'id': str(pk),
+                'amount': '1.10'
+            })
+
+    def test_orjson_codec__requires_orjson(self):
+        with mock.patch.dict(sys.modules, {'orjson': None}):
+            with self.assertRaises(ImproperlyConfigured):
+                OrjsonCodec()
+
+    def test_get_codec__orjson_by_default(self):
+        self.assertIsInstance(get_codec(), OrjsonCodec)
+
+    @override_settings(SAGEPAYPI_JSON_CODEC='sagepaypi.jsoncodec.JSONCodec')
+    def test_get_codec__setting(self):
+        self.assertIs(type(get_codec()), JSONCodec)
+
+    def test_loads_raw(self):
+        data = loads_raw(b'{"status":"Ok"}')
+
+        self.assertIsInstance(data, RawJSON)
+        self.assertEqual(data, {'status': 'Ok'})
+        self.assertEqual(data.raw, b'{"status":"Ok"}')
+
+    def test_loads_raw__not_an_object(self):
+        self.assertEqual(loads_raw(b'[1]'), [1])
+
+
+class TestCodecJSONField(AppTestCase):
+    fixtures = ['tests/fixtures/test']
+
+    def stored(self, response):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT data FROM sagepaypi_transactionresponse WHERE id = %s', [response.pk])
+            return cursor.fetchone()[0]
+
+    def test_raw_json_stored_as_received(self):
+        transaction = Transaction.objects.get()
+        raw = b'{"status": "Ok",  "statusCode": "0000"}'
+
+        response = transaction.responses.create(step='submit_transaction', data=loads_raw(raw))
+
+        self.assertEqual(self.stored(response), raw.decode())
+        self.assertEqual(TransactionResponse.objects.get(pk=response.pk).data, {'status': 'Ok', 'statusCode': '0000'})
+
+    def test_dict_encoded(self):
+        transaction = Transaction.objects.get()
+
+        response = transaction.responses.create(step='submit_transaction', data=TRANSACTION_DATA)
+
+        self.assertEqual(TransactionResponse.objects.get(pk=response.pk).data, TRANSACTION_DATA)
+        self.assertTrue(
+            TransactionResponse.objects.filter(pk=response.pk, data__statusCode='0000').exists()
+        )
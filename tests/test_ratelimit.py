@@ -0,0 +1,153 @@
+from django.core.cache import cache
+from django.test import override_settings
+
+from sagepaypi.ratelimit import (
+    BATCH,
+    CacheRateLimiter,
+    current_priority,
+    get_rate_limiter,
+    INTERACTIVE,
+    NoRateLimit,
+    priority,
+    TokenBucket
+)
+from tests.test_case import AppTestCase
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestTokenBucket(AppTestCase):
+
+    def test_try_acquire(self):
+        clock = FakeClock()
+        bucket = TokenBucket(2, capacity=2, clock=clock, sleep=clock.sleep)
+
+        self.assertEqual(bucket.try_acquire(), 0)
+        self.assertEqual(bucket.try_acquire(), 0)
+        self.assertEqual(bucket.try_acquire(), 0.5)
+
+        clock.now = 0.5
+        self.assertEqual(bucket.try_acquire(), 0)
+
+    def test_acquire_waits(self):
+        clock = FakeClock()
+        bucket = TokenBucket(10, capacity=1, clock=clock, sleep=clock.sleep)
+
+        for i in range(5):
+            bucket.acquire()
+
+        self.assertAlmostEqual(clock.now, 0.4)
+
+    def test_get_rate_limiter(self):
+        self.assertIsInstance(get_rate_limiter(None), NoRateLimit)
+        self.assertIsInstance(get_rate_limiter(0), NoRateLimit)
+        self.assertIsInstance(get_rate_limiter(5), TokenBucket)
+
+    def test_batch_leaves_reserve_for_interactive(self):
+        clock = FakeClock()
+        bucket = TokenBucket(10, capacity=10, reserve=2, clock=clock, sleep=clock.sleep)
+
+        for i in range(8):
+            self.assertEqual(bucket.try_acquire(priority=BATCH), 0)
+
+        # batch calls have to wait while interactive calls can use the reserve
+        self.assertAlmostEqual(bucket.try_acquire(priority=BATCH), 0.1)
+        self.assertEqual(bucket.try_acquire(priority=INTERACTIVE), 0)
+        self.assertEqual(bucket.try_acquire(priority=INTERACTIVE), 0)
+
+    def test_reserve_leaves_a_token_for_batch(self):
+        clock = FakeClock()
+        bucket = TokenBucket(1, capacity=1, reserve=0.2, clock=clock, sleep=clock.sleep)
+
+        self.assertEqual(bucket.reserve, 0)
+        self.assertEqual(bucket.try_acquire(priority=BATCH), 0)
+
+        # batch calls wait for the next token rather than forever
+        bucket.acquire(priority=BATCH)
+        self.assertAlmostEqual(clock.now, 1)
+
+    def test_drain(self):
+        clock = FakeClock()
+        bucket = TokenBucket(10, capacity=10, clock=clock, sleep=clock.sleep)
+        bucket.drain()
+
+        self.assertAlmostEqual(bucket.try_acquire(), 0.1)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TestCacheRateLimiter(AppTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_try_acquire(self):
+        clock = FakeClock()
+        clock.now = 100.25
+        limiter = CacheRateLimiter(2, name='test', clock=clock, sleep=clock.sleep)
+
+        self.assertEqual(limiter.try_acquire(), 0)
+        self.assertEqual(limiter.try_acquire(), 0)
+        self.assertAlmostEqual(limiter.try_acquire(), 0.75)
+
+        clock.now = 101
+        self.assertEqual(limiter.try_acquire(), 0)
+
+    def test_shared_between_instances(self):
+        clock = FakeClock()
+        first = CacheRateLimiter(1, name='test', clock=clock, sleep=clock.sleep)
+        second = CacheRateLimiter(1, name='test', clock=clock, sleep=clock.sleep)
+
+        self.assertEqual(first.try_acquire(), 0)
+        self.assertEqual(second.try_acquire(), 1)
+
+    def test_batch_leaves_reserve_for_interactive(self):
+        clock = FakeClock()
+        limiter = CacheRateLimiter(5, reserve=2, name='test', clock=clock, sleep=clock.sleep)
+
+        for i in range(3):
+            self.assertEqual(limiter.try_acquire(priority=BATCH), 0)
+
+        self.assertEqual(limiter.try_acquire(priority=BATCH), 1)
+        self.assertEqual(limiter.try_acquire(priority=INTERACTIVE), 0)
+        self.assertEqual(limiter.try_acquire(priority=INTERACTIVE), 0)
+        self.assertEqual(limiter.try_acquire(priority=INTERACTIVE), 1)
+
+    def test_reserve_leaves_a_call_for_batch(self):
+        clock = FakeClock()
+        limiter = CacheRateLimiter(1, capacity=1, reserve=0.2, name='test', clock=clock, sleep=clock.sleep)
+
+        self.assertEqual(limiter.reserve, 0)
+
+        limiter.acquire(priority=BATCH)
+        limiter.acquire(priority=BATCH)
+
+        self.assertEqual(clock.now, 1)
+
+    def test_acquire_waits_for_next_window(self):
+        clock = FakeClock()
+        limiter = CacheRateLimiter(1, name='test', clock=clock, sleep=clock.sleep)
+
+        limiter.acquire()
+        limiter.acquire()
+
+        self.assertEqual(clock.now, 1)
+
+
+class TestPriority(AppTestCase):
+
+    def test_priority(self):
+        self.assertEqual(current_priority(), INTERACTIVE)
+
+        with priority(BATCH):
+            self.assertEqual(current_priority(), BATCH)
+
+        self.assertEqual(current_priority(), INTERACTIVE)
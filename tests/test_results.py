@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta, timezone
+
+import mock
+
+from sagepaypi.results import (
+    CardIdentifierResult,
+    GatewayResult,
+    InstructionResult,
+    parse_datetime,
+    TransactionResult
+)
+from tests.mocks import MockResponse, TRANSACTION_DATA
+from tests.test_case import AppTestCase
+
+
+class TestParseDatetime(AppTestCase):
+
+    def test_iso_format(self):
+        self.assertEqual(
+            parse_datetime('2015-08-11T11:45:16.285+01:00'),
+            datetime(2015, 8, 11, 11, 45, 16, 285000, tzinfo=timezone(timedelta(hours=1)))
+        )
+
+    def test_falls_back_to_dateutil(self):
+        self.assertEqual(
+            parse_datetime('11 Aug 2015 10:45:16 UTC'),
+            datetime(2015, 8, 11, 10, 45, 16, tzinfo=timezone.utc)
+        )
+
+    def test_empty(self):
+        self.assertIsNone(parse_datetime(None))
+        self.assertIsNone(parse_datetime(''))
+
+
+class TestGatewayResult(AppTestCase):
+
+    def test_from_response(self):
+        result = GatewayResult.from_response(MockResponse({'foo': 'bar'}, 200))
+
+        self.assertEqual(result.status_code, 200)
+        self.assertEqual(result.data, {'foo': 'bar'})
+        self.assertEqual(result.json(), {'foo': 'bar'})
+
+    def test_from_response__invalid_json(self):
+        response = mock.Mock(status_code=500, content=b'Internal Server Error')
+        response.json.side_effect = ValueError
+
+        result = GatewayResult.from_response(response)
+
+        self.assertEqual(result.status_code, 500)
+        self.assertEqual(result.data, {})
+        self.assertEqual(result.raw, b'Internal Server Error')
+
+    def test_from_response__result_returned_as_is(self):
+        result = TransactionResult(201, TRANSACTION_DATA)
+
+        self.assertIs(TransactionResult.from_response(result), result)
+
+    def test_errors(self):
+        errors = [{'property': 'amount', 'clientMessage': 'is required'}]
+
+        self.assertEqual(GatewayResult(422, {'errors': errors}).errors, errors)
+        self.assertEqual(GatewayResult(422, {'errors': 'invalid'}).errors, [])
+        self.assertEqual(GatewayResult(422, {}).errors, [])
+
+    def test_no_instance_dict(self):
+        result = TransactionResult(201, TRANSACTION_DATA)
+
+        with self.assertRaises(AttributeError):
+            result.__dict__
+
+
+class TestTransactionResult(AppTestCase):
+
+    def test_attributes(self):
+        result = TransactionResult(201, TRANSACTION_DATA)
+
+        self.assertEqual(result.transaction_id, TRANSACTION_DATA['transactionId'])
+        self.assertEqual(result.transaction_type, TRANSACTION_DATA['transactionType'])
+        self.assertEqual(result.status, TRANSACTION_DATA['status'])
+        self.assertEqual(result.transaction_status_code, TRANSACTION_DATA['statusCode'])
+        self.assertEqual(result.status_detail, TRANSACTION_DATA['statusDetail'])
+        self.assertEqual(result.retrieval_reference, TRANSACTION_DATA['retrievalReference'])
+        self.assertEqual(result.bank_authorisation_code, TRANSACTION_DATA['bankAuthorisationCode'])
+        self.assertEqual(result.secure_status, TRANSACTION_DATA['3DSecure']['status'])
+        self.assertEqual(result.avs_cvc_status, TRANSACTION_DATA['avsCvcCheck']['status'])
+        self.assertEqual(result.bank_response_code, TRANSACTION_DATA['bankResponseCode'])
+        self.assertEqual(result.card_type, 'Visa')
+        self.assertEqual(result.card_last_four, '5559')
+
+    def test_3d_secure_auth(self):
+        result = TransactionResult(202, {'statusCode': '2007', 'acsUrl': 'https://acs', 'paReq': 'pareq'})
+
+        self.assertEqual(result.acs_url, 'https://acs')
+        self.assertEqual(result.pareq, 'pareq')
+        self.assertIsNone(result.creq)
+        self.assertIsNone(result.secure_status)
+        self.assertIsNone(result.avs_cvc_status)
+        self.assertIsNone(result.card_type)
+
+
+class TestInstructionResult(AppTestCase):
+
+    def test_attributes(self):
+        result = InstructionResult(201, {'instructionType': 'void', 'date': '2015-08-11T11:45:16.285+01:00'})
+
+        self.assertEqual(result.instruction_type, 'void')
+        self.assertEqual(result.date, datetime(2015, 8, 11, 10, 45, 16, 285000, tzinfo=timezone.utc))
+
+
+class TestCardIdentifierResult(AppTestCase):
+
+    def test_attributes(self):
+        result = CardIdentifierResult(201, {
+            'cardIdentifier': 'card-identifier',
+            'expiry': '2015-06-16T10:46:23.683+01:00',
+            'cardType': 'Visa'
+        }, merchant_session_key='merchant-session-key')
+
+        self.assertEqual(result.merchant_session_key, 'merchant-session-key')
+        self.assertEqual(result.card_identifier, 'card-identifier')
+        self.assertEqual(result.expiry, datetime(2015, 6, 16, 9, 46, 23, 683000, tzinfo=timezone.utc))
+        self.assertEqual(result.card_type, 'Visa')
@@ -0,0 +1,115 @@
+import mock
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.response import SimpleTemplateResponse
+from django.test import override_settings
+
+from sagepaypi.models import ArchivedTransaction, DailySummary, Transaction
+from sagepaypi.routers import (
+    get_replica,
+    is_pinned_to_primary,
+    pin_to_primary,
+    read_replica,
+    ReplicaRouter,
+    use_read_replica
+)
+from tests.mocks import created_payment_response
+from tests.test_case import AppTestCase
+
+
+@override_settings(SAGEPAYPI_READ_REPLICAS=['replica'])
+class TestReplicaRouter(AppTestCase):
+    fixtures = ['tests/fixtures/test']
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+        cache.clear()
+
+    def test_db_for_read(self):
+        self.assertEqual(self.router.db_for_read(Transaction), 'default')
+
+        with read_replica():
+            self.assertEqual(self.router.db_for_read(Transaction), 'replica')
+
+        self.assertEqual(self.router.db_for_read(Transaction), 'default')
+
+    def test_db_for_read__summaries(self):
+        self.assertEqual(self.router.db_for_read(DailySummary), 'replica')
+
+    def test_db_for_read__other_models(self):
+        with read_replica():
+            self.assertIsNone(self.router.db_for_read(ArchivedTransaction))
+
+    @override_settings(SAGEPAYPI_READ_REPLICAS=[])
+    def test_db_for_read__no_replicas(self):
+        with read_replica():
+            self.assertIsNone(self.router.db_for_read(Transaction))
+            self.assertIsNone(self.router.db_for_write(Transaction))
+
+    def test_db_for_read__after_write(self):
+        with read_replica():
+            self.assertEqual(self.router.db_for_write(Transaction), 'default')
+            # the changes are read back from the primary
+            self.assertEqual(self.router.db_for_read(Transaction), 'default')
+
+        with read_replica():
+            self.assertEqual(self.router.db_for_read(Transaction), 'replica')
+
+    def test_db_for_read__pinned(self):
+        pin_to_primary(self.transaction)
+
+        with read_replica():
+            self.assertEqual(self.router.db_for_read(Transaction, instance=self.transaction), 'default')
+
+    def test_pin_to_primary(self):
+        self.assertFalse(is_pinned_to_primary(self.transaction.pk))
+        pin_to_primary(self.transaction)
+        self.assertTrue(is_pinned_to_primary(self.transaction.pk))
+
+        with override_settings(SAGEPAYPI_READ_REPLICAS=[]):
+            self.assertFalse(is_pinned_to_primary(self.transaction.pk))
+
+    def test_get_replica(self):
+        self.assertEqual(get_replica(), 'replica')
+
+        with override_settings(SAGEPAYPI_READ_REPLICAS=[]):
+            self.assertEqual(get_replica(), 'default')
+
+    def test_allow_migrate(self):
+        self.assertFalse(self.router.allow_migrate('replica', 'sagepaypi', 'transaction'))
+        self.assertIsNone(self.router.allow_migrate('default', 'sagepaypi', 'transaction'))
+
+    def test_use_read_replica(self):
+        databases = []
+
+        @use_read_replica
+        def view(request):
+            databases.append(self.router.db_for_read(Transaction))
+            return HttpResponse()
+
+        view(None)
+
+        self.assertEqual(databases, ['replica'])
+
+    def test_use_read_replica__renders_template_response(self):
+        @use_read_replica
+        def view(request):
+            return SimpleTemplateResponse('home.html')
+
+        self.assertTrue(view(None).is_rendered)
+
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_submit_transaction__pins_to_primary(self, mock_gateway):
+        mock_gateway.submit_transaction.return_value = created_payment_response()
+
+        self.transaction.submit_transaction()
+
+        self.assertTrue(is_pinned_to_primary(self.transaction.pk))
+
+    def test_get_for_token__pinned(self):
+        tidb64, token = self.transaction.get_tokens()
+        pin_to_primary(self.transaction)
+
+        with read_replica():
+            self.assertEqual(Transaction.objects.get_for_token(tidb64, token), self.transaction)
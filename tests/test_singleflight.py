@@ -0,0 +1,135 @@
+import threading
+import time
+
+import mock
+from django.core.cache import caches
+
+from sagepaypi.singleflight import SingleFlight
+from tests.test_case import AppTestCase
+
+
+def wait_for_waiters(flight, key, count):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        with flight.lock:
+            if key in flight.flights and flight.flights[key].waiters >= count:
+                return
+        time.sleep(0.001)
+    raise AssertionError('calls did not wait')
+
+
+class TestSingleFlight(AppTestCase):
+
+    def setUp(self):
+        self.flight = SingleFlight('test')
+        caches['default'].clear()
+
+    def test_do(self):
+        self.assertEqual(self.flight.do('key', lambda: 'result'), ('result', False))
+        self.assertEqual(self.flight.flights, {})
+
+    def test_do__concurrent_calls_share_the_result(self):
+        calls = []
+        results = []
+
+        def follow():
+            results.append(self.flight.do('key', lambda: calls.append('follower')))
+
+        def lead():
+            followers = [threading.Thread(target=follow) for i in range(3)]
+            for thread in followers:
+                thread.start()
+            wait_for_waiters(self.flight, 'key', 3)
+            calls.append('leader')
+            return 'result', followers
+
+        (result, followers), shared = self.flight.do('key', lead)
+        for thread in followers:
+            thread.join()
+
+        self.assertEqual(calls, ['leader'])
+        self.assertFalse(shared)
+        self.assertEqual([shared for result, shared in results], [True, True, True])
+
+    def test_do__other_keys_are_not_shared(self):
+        self.assertEqual(self.flight.do('one', lambda: self.flight.do('two', lambda: 2)), ((2, False), False))
+
+    def test_do__error_shared(self):
+        errors = []
+
+        def follow():
+            try:
+                self.flight.do('key', lambda: None)
+            except ValueError as e:
+                errors.append(e)
+
+        follower = threading.Thread(target=follow)
+
+        def lead():
+            follower.start()
+            wait_for_waiters(self.flight, 'key', 1)
+            raise ValueError('failed')
+
+        with self.assertRaises(ValueError):
+            self.flight.do('key', lead)
+        follower.join()
+
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(self.flight.flights, {})
+
+    def test_do__cache(self):
+        cache = caches['default']
+
+        self.assertEqual(self.flight.do('key', lambda: 'result', cache_alias='default'), ('result', False))
+
+        # the lock is released
+        self.assertIsNone(cache.get(self.flight.lock_key('key')))
+
+    def test_do__cache_shares_the_result_of_another_process(self):
+        cache = caches['default']
+        cache.set(self.flight.lock_key('key'), 'token')
+        cache.set(self.flight.result_key('key', 'token'), 'result')
+        func = mock.Mock()
+
+        self.assertEqual(self.flight.do('key', func, cache_alias='default'), ('result', True))
+        func.assert_not_called()
+
+    def test_do__cache_waits_for_another_process(self):
+        cache = caches['default']
+        cache.set(self.flight.lock_key('key'), 'token')
+
+        def sleep(seconds):
+            # the other process stores its result and releases the lock
+            cache.set(self.flight.result_key('key', 'token'), 'result')
+            cache.delete(self.flight.lock_key('key'))
+
+        self.flight.sleep = sleep
+        func = mock.Mock()
+
+        self.assertEqual(self.flight.do('key', func, cache_alias='default'), ('result', True))
+        func.assert_not_called()
+
+    def test_do__cache_call_made_when_the_other_process_fails(self):
+        cache = caches['default']
+        cache.set(self.flight.lock_key('key'), 'token')
+        self.flight.sleep = lambda seconds: cache.delete(self.flight.lock_key('key'))
+
+        self.assertEqual(self.flight.do('key', lambda: 'result', cache_alias='default'), ('result', False))
+
+    def test_do__cache_call_made_after_timeout(self):
+        cache = caches['default']
+        cache.set(self.flight.lock_key('key'), 'token')
+        self.flight.sleep = lambda seconds: None
+
+        self.assertEqual(self.flight.do('key', lambda: 'result', cache_alias='default', timeout=0.01), ('result', False))
+
+    def test_do__cache_dumps_and_loads(self):
+        flight = SingleFlight('test', dumps=lambda result: result * 2, loads=lambda value: value + 1)
+
+        flight.do('key', lambda: 5, cache_alias='default')
+
+        cache = caches['default']
+        cache.set(flight.lock_key('key'), 'token')
+        cache.set(flight.result_key('key', 'token'), 10)
+
+        self.assertEqual(flight.do('key', mock.Mock(), cache_alias='default'), (11, True))
@@ -23,3 +23,20 @@ class TestTemplateTags(AppTestCase):
         )
 
         self.assertIn('form', html)
+
+    def test_sagepay_secure_redirect_form_renders__challenge(self):
+        transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+        transaction.transaction_id = 'some-unique-key'
+        transaction.acs_url = 'http://url.com'
+        transaction.creq = 'some-challenge-request'
+        transaction.save()
+
+        fake_request = RequestFactory().get('/')
+
+        html = self.render_template(
+            """{% load sagepaypi_tags %}{% sagepay_secure_redirect_form transaction %}""",
+            {'request': fake_request, 'transaction': transaction}
+        )
+
+        self.assertIn('name="creq" value="some-challenge-request"', html)
+        self.assertIn('name="threeDSSessionData" value="%s"' % transaction.get_3d_secure_session_data(), html)
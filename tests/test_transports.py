@@ -0,0 +1,145 @@
+from datetime import timedelta
+import sys
+import unittest
+
+import mock
+import requests
+from django.core.exceptions import ImproperlyConfigured
+from django.test import override_settings
+from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import RequestHistory, Retry
+
+from sagepaypi.transports import HTTP2Transport, RequestsTransport
+from tests.test_case import AppTestCase
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+def requests_response(status_code, content, body=None, retries=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = content
+    response.elapsed = timedelta(milliseconds=12)
+    response.request = requests.Request('POST', 'https://pi-test.sagepay.com', data=body).prepare()
+    response.raw = mock.Mock(retries=retries)
+    return response
+
+
+class TestRequestsTransport(AppTestCase):
+
+    def test_pool_size(self):
+        transport = RequestsTransport()
+
+        self.assertEqual(transport.session.get_adapter('https://pi-test.sagepay.com')._pool_maxsize, 10)
+
+    @override_settings(SAGEPAYPI_CONNECTION_POOL_SIZE=4)
+    def test_pool_size__setting(self):
+        transport = RequestsTransport()
+
+        self.assertEqual(transport.session.get_adapter('https://pi-test.sagepay.com')._pool_maxsize, 4)
+
+    @mock.patch('sagepaypi.transports.requests.Session.post')
+    def test_post__encodes_json(self, mock_post):
+        mock_post.return_value = requests_response(201, b'{"status":"Ok"}')
+        auth = HTTPBasicAuth('user', 'pass')
+
+        response = RequestsTransport().post('https://pi-test.sagepay.com', json={'foo': 1}, auth=auth)
+
+        mock_post.assert_called_once_with(
+            'https://pi-test.sagepay.com',
+            data=b'{"foo":1}',
+            headers={'Content-Type': 'application/json'},
+            auth=auth
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {'status': 'Ok'})
+        self.assertEqual(response.json().raw, b'{"status":"Ok"}')
+
+    @mock.patch('sagepaypi.transports.requests.Session.post')
+    def test_post__keeps_headers(self, mock_post):
+        mock_post.return_value = requests_response(201, b'{}')
+
+        RequestsTransport().post('https://pi-test.sagepay.com', json={}, headers={'Authorization': 'Bearer key'})
+
+        mock_post.assert_called_once_with(
+            'https://pi-test.sagepay.com',
+            data=b'{}',
+            headers={'Authorization': 'Bearer key', 'Content-Type': 'application/json'}
+        )
+
+    @mock.patch('sagepaypi.transports.requests.Session.get')
+    def test_get(self, mock_get):
+        mock_get.return_value = requests_response(200, b'{}')
+
+        RequestsTransport().get('https://pi-test.sagepay.com', auth=None)
+
+        mock_get.assert_called_once_with('https://pi-test.sagepay.com', auth=None)
+
+    @mock.patch('sagepaypi.transports.requests.Session.post')
+    def test_metrics(self, mock_post):
+        mock_post.return_value = requests_response(201, b'{"status":"Ok"}', body=b'{"foo":1}')
+
+        metrics = RequestsTransport().post('https://pi-test.sagepay.com', json={'foo': 1}).metrics
+
+        self.assertEqual(metrics.time_to_first_byte, 12)
+        self.assertGreaterEqual(metrics.duration, 0)
+        self.assertEqual(metrics.retry_count, 0)
+        self.assertEqual(metrics.request_size, 9)
+        self.assertEqual(metrics.response_size, 15)
+
+    @mock.patch('sagepaypi.transports.requests.Session.post')
+    def test_metrics__retries(self, mock_post):
+        history = (RequestHistory('POST', '/', ConnectionError(), None, None),) * 2
+        mock_post.return_value = requests_response(201, b'{}', retries=Retry(history=history))
+
+        metrics = RequestsTransport().post('https://pi-test.sagepay.com', json={}).metrics
+
+        self.assertEqual(metrics.retry_count, 2)
+
+    def test_connect_retries(self):
+        retries = RequestsTransport().session.get_adapter('https://pi-test.sagepay.com').max_retries
+
+        self.assertEqual(retries.connect, 0)
+        self.assertEqual(retries.read, 0)
+
+    @override_settings(SAGEPAYPI_CONNECT_RETRIES=3)
+    def test_connect_retries__setting(self):
+        retries = RequestsTransport().session.get_adapter('https://pi-test.sagepay.com').max_retries
+
+        # only connections are retried, a request that was sent is never sent again
+        self.assertEqual(retries.connect, 3)
+        self.assertEqual(retries.read, 0)
+        self.assertEqual(retries.status, 0)
+        self.assertEqual(retries.other, 0)
+
+
+class TestHTTP2Transport(AppTestCase):
+
+    def test_requires_httpx(self):
+        with mock.patch.dict(sys.modules, {'httpx': None}):
+            with self.assertRaises(ImproperlyConfigured):
+                HTTP2Transport()
+
+    @unittest.skipUnless(httpx, 'httpx is not installed')
+    def test_post(self):
+        transport = HTTP2Transport(pool_size=2)
+
+        request = httpx.Request('POST', 'https://pi-test.sagepay.com', content=b'{"foo":1}')
+        response = httpx.Response(201, content=b'{}', request=request)
+
+        with mock.patch.object(transport.client, 'post', return_value=response) as mock_post:
+            metrics = transport.post(
+                'https://pi-test.sagepay.com', json={'foo': 1}, auth=HTTPBasicAuth('user', 'pass')
+            ).metrics
+
+        mock_post.assert_called_once_with(
+            'https://pi-test.sagepay.com',
+            content=b'{"foo":1}',
+            headers={'Content-Type': 'application/json'},
+            auth=('user', 'pass')
+        )
+        self.assertEqual(metrics.request_size, 9)
+        self.assertEqual(metrics.response_size, 2)
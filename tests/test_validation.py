@@ -0,0 +1,141 @@
+import copy
+
+from sagepaypi.exceptions import InvalidTransactionStatus
+from sagepaypi.validation import get_errors, PreflightError, validate
+from tests.test_case import AppTestCase
+
+
+PAYMENT = {
+    'transactionType': 'Payment',
+    'vendorTxCode': '13bf01cf-81ef-4312-a3e5-11412e28e58e',
+    'amount': 100,
+    'currency': 'GBP',
+    'description': 'Payment for goods',
+    'paymentMethod': {
+        'card': {
+            'merchantSessionKey': 'C72FB248-1926-46D0-9DAA-B9EC0A8F1AF7',
+            'cardIdentifier': '9641440A-E5AC-4191-8CAE-DC6C1AE11BCA'
+        }
+    },
+    'customerFirstName': 'Sam',
+    'customerLastName': 'Jones',
+    'billingAddress': {
+        'address1': '88 The Road',
+        'city': 'City',
+        'postalCode': '412',
+        'country': 'GB'
+    }
+}
+
+REFUND = {
+    'transactionType': 'Refund',
+    'vendorTxCode': 'refund-123',
+    'amount': 50,
+    'currency': 'GBP',
+    'description': 'Refund',
+    'referenceTransactionId': 'C105B177-C8D2-0EDF-50A3-16EEBD6D4FFB'
+}
+
+
+def changed(payload, path, value):
+    payload = copy.deepcopy(payload)
+    *parents, key = path.split('.')
+    data = payload
+    for parent in parents:
+        data = data[parent]
+    if value is None:
+        del data[key]
+    else:
+        data[key] = value
+    return payload
+
+
+# payloads rejected by Sage Pay with a 422 and the property of the error
+CORPUS_422 = [
+    ('transaction', changed(PAYMENT, 'transactionType', 'Sale'), 'transactionType'),
+    ('transaction', changed(PAYMENT, 'vendorTxCode', None), 'vendorTxCode'),
+    ('transaction', changed(PAYMENT, 'vendorTxCode', 'x' * 41), 'vendorTxCode'),
+    ('transaction', changed(PAYMENT, 'amount', 0), 'amount'),
+    ('transaction', changed(PAYMENT, 'amount', '100'), 'amount'),
+    ('transaction', changed(PAYMENT, 'currency', 'gbp'), 'currency'),
+    ('transaction', changed(PAYMENT, 'description', ''), 'description'),
+    ('transaction', changed(PAYMENT, 'description', 'x' * 101), 'description'),
+    ('transaction', changed(PAYMENT, 'paymentMethod.card.merchantSessionKey', ''), 'paymentMethod.card.merchantSessionKey'),
+    ('transaction', changed(PAYMENT, 'paymentMethod.card.cardIdentifier', None), 'paymentMethod.card.cardIdentifier'),
+    ('transaction', changed(PAYMENT, 'customerFirstName', 'x' * 21), 'customerFirstName'),
+    ('transaction', changed(PAYMENT, 'customerLastName', None), 'customerLastName'),
+    ('transaction', changed(PAYMENT, 'billingAddress.address1', 'x' * 51), 'billingAddress.address1'),
+    ('transaction', changed(PAYMENT, 'billingAddress.address2', 'x' * 51), 'billingAddress.address2'),
+    ('transaction', changed(PAYMENT, 'billingAddress.city', 'x' * 41), 'billingAddress.city'),
+    ('transaction', changed(PAYMENT, 'billingAddress.postalCode', None), 'billingAddress.postalCode'),
+    ('transaction', changed(PAYMENT, 'billingAddress.postalCode', 'x' * 11), 'billingAddress.postalCode'),
+    ('transaction', changed(PAYMENT, 'billingAddress.country', 'GBR'), 'billingAddress.country'),
+    (
+        'transaction',
+        changed(changed(PAYMENT, 'billingAddress.country', 'US'), 'billingAddress.state', 'AL'),
+        'billingAddress.postalCode'
+    ),
+    (
+        'transaction',
+        changed(changed(PAYMENT, 'billingAddress.country', 'US'), 'billingAddress.postalCode', '35004'),
+        'billingAddress.state'
+    ),
+    (
+        'transaction',
+        changed(changed(PAYMENT, 'billingAddress.country', 'CA'), 'billingAddress.postalCode', '12345'),
+        'billingAddress.postalCode'
+    ),
+    ('transaction', changed(REFUND, 'referenceTransactionId', None), 'referenceTransactionId'),
+    ('instruction', {'instructionType': 'cancel'}, 'instructionType'),
+    ('instruction', {'instructionType': 'release'}, 'amount'),
+    ('instruction', {'instructionType': 'release', 'amount': 0}, 'amount'),
+    ('3d-secure', {'paRes': ''}, 'paRes'),
+    ('3d-secure-challenge', {'cRes': 'cres'}, 'threeDSSessionData'),
+]
+
+# payloads accepted by Sage Pay
+CORPUS_VALID = [
+    ('transaction', PAYMENT),
+    ('transaction', changed(PAYMENT, 'transactionType', 'Deferred')),
+    ('transaction', changed(changed(PAYMENT, 'billingAddress.country', 'IE'), 'billingAddress.postalCode', None)),
+    (
+        'transaction',
+        changed(
+            changed(changed(PAYMENT, 'billingAddress.country', 'US'), 'billingAddress.postalCode', '35004-1234'),
+            'billingAddress.state',
+            'AL'
+        )
+    ),
+    ('transaction', REFUND),
+    ('transaction', changed(REFUND, 'transactionType', 'Repeat')),
+    ('instruction', {'instructionType': 'release', 'amount': 100}),
+    ('instruction', {'instructionType': 'void'}),
+    ('3d-secure', {'paRes': 'pares'}),
+    ('3d-secure-challenge', {'cRes': 'cres', 'threeDSSessionData': 'data'}),
+]
+
+
+class TestValidation(AppTestCase):
+
+    def test_corpus_422(self):
+        for schema, payload, prop in CORPUS_422:
+            with self.subTest(schema=schema, property=prop):
+                self.assertEqual([e['property'] for e in get_errors(schema, payload)], [prop])
+
+    def test_corpus_valid(self):
+        for schema, payload in CORPUS_VALID:
+            with self.subTest(schema=schema, payload=payload):
+                self.assertEqual(get_errors(schema, payload), [])
+
+    def test_validate(self):
+        payload = changed(changed(PAYMENT, 'amount', 0), 'description', '')
+
+        with self.assertRaises(PreflightError) as e:
+            validate('transaction', payload)
+
+        self.assertIsInstance(e.exception, InvalidTransactionStatus)
+        self.assertEqual(e.exception.errors, [
+            {'property': 'amount', 'clientMessage': 'must be at least 1'},
+            {'property': 'description', 'clientMessage': 'is required'},
+        ])
+        self.assertEqual(e.exception.args[0], 'amount: must be at least 1; description: is required')
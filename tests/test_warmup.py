@@ -0,0 +1,114 @@
+import socket
+
+import mock
+from django.test import override_settings
+
+import sagepaypi
+
+from sagepaypi.apps import SagepayPIConfig
+from sagepaypi.gateway import default_gateway, SagepayGateway
+from sagepaypi.signals import warmed_up
+from sagepaypi.warmup import open_connections, resolve_hosts, warm_up, warm_up_after_fork
+from tests.test_case import AppTestCase
+
+
+ADDRESS_INFO = [
+    (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('10.0.0.1', 443)),
+    (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('10.0.0.2', 443)),
+]
+
+
+@override_settings(SAGEPAYPI_TEST_MODE=True)
+class TestWarmUp(AppTestCase):
+
+    def setUp(self):
+        SagepayGateway._merchant_session_key = None
+
+    def tearDown(self):
+        SagepayGateway._merchant_session_key = None
+
+    @mock.patch('sagepaypi.warmup.socket.getaddrinfo', return_value=ADDRESS_INFO)
+    def test_resolve_hosts(self, mock_getaddrinfo):
+        hosts = resolve_hosts(['https://pi-test.sagepay.com/api/v1'])
+
+        self.assertEqual(hosts, {'pi-test.sagepay.com': ['10.0.0.1', '10.0.0.2']})
+        mock_getaddrinfo.assert_called_once_with('pi-test.sagepay.com', 443, type=socket.SOCK_STREAM)
+
+    @mock.patch('sagepaypi.warmup.socket.getaddrinfo', side_effect=socket.gaierror('unknown'))
+    def test_resolve_hosts__leaves_out_unresolved(self, mock_getaddrinfo):
+        self.assertEqual(resolve_hosts(['https://pi-test.sagepay.com/api/v1']), {})
+
+    @mock.patch('sagepaypi.transports.RequestsTransport.head')
+    def test_open_connections(self, mock_head):
+        self.assertEqual(open_connections(default_gateway, 3), 3)
+        mock_head.assert_called_with('https://pi-test.sagepay.com/api/v1', timeout=5)
+
+    @mock.patch('sagepaypi.transports.RequestsTransport.head', side_effect=ConnectionError('refused'))
+    def test_open_connections__counts_failures(self, mock_head):
+        self.assertEqual(open_connections(default_gateway, 2), 0)
+
+    @override_settings(SAGEPAYPI_WARM_UP_MERCHANT_SESSION_KEY=True)
+    @mock.patch('sagepaypi.gateway.SagepayGateway.prefetch_merchant_session_key', return_value=('key', None))
+    @mock.patch('sagepaypi.transports.RequestsTransport.head')
+    @mock.patch('sagepaypi.warmup.socket.getaddrinfo', return_value=ADDRESS_INFO)
+    def test_warm_up(self, mock_getaddrinfo, mock_head, mock_prefetch):
+        receiver = mock.Mock()
+        warmed_up.connect(receiver)
+
+        try:
+            duration = warm_up()
+        finally:
+            warmed_up.disconnect(receiver)
+
+        self.assertEqual(mock_head.call_count, 2)
+        mock_prefetch.assert_called_once_with()
+        receiver.assert_called_once_with(
+            signal=warmed_up,
+            sender=SagepayGateway,
+            duration=duration,
+            hosts={'pi-test.sagepay.com': ['10.0.0.1', '10.0.0.2']},
+            connections=2,
+            merchant_session_key=True
+        )
+
+    @mock.patch('sagepaypi.gateway.SagepayGateway.prefetch_merchant_session_key')
+    @mock.patch('sagepaypi.transports.RequestsTransport.head')
+    @mock.patch('sagepaypi.warmup.socket.getaddrinfo', return_value=ADDRESS_INFO)
+    def test_warm_up__no_merchant_session_key_by_default(self, mock_getaddrinfo, mock_head, mock_prefetch):
+        warm_up()
+
+        mock_prefetch.assert_not_called()
+
+    @mock.patch('sagepaypi.transports.RequestsTransport.head')
+    @mock.patch('sagepaypi.warmup.socket.getaddrinfo', side_effect=socket.gaierror('unknown'))
+    def test_warm_up__no_connections_when_unresolved(self, mock_getaddrinfo, mock_head):
+        warm_up()
+
+        mock_head.assert_not_called()
+
+    @mock.patch('sagepaypi.warmup.start_warm_up')
+    def test_ready__off_by_default(self, mock_start):
+        SagepayPIConfig('sagepaypi', sagepaypi).ready()
+
+        mock_start.assert_not_called()
+
+    @override_settings(SAGEPAYPI_WARM_UP=True)
+    @mock.patch('sagepaypi.warmup.register_fork_hook')
+    @mock.patch('sagepaypi.warmup.start_warm_up')
+    def test_ready(self, mock_start, mock_register):
+        SagepayPIConfig('sagepaypi', sagepaypi).ready()
+
+        mock_start.assert_called_once_with()
+        mock_register.assert_called_once_with()
+
+    @mock.patch('sagepaypi.warmup.start_warm_up')
+    def test_warm_up_after_fork(self, mock_start):
+        transport = default_gateway.transport
+        SagepayGateway._merchant_session_key = ('key', None)
+
+        warm_up_after_fork()
+
+        # the connections and the merchant session key of the parent are not shared
+        self.assertIsNot(default_gateway.transport, transport)
+        self.assertIsNone(SagepayGateway._merchant_session_key)
+        mock_start.assert_called_once_with()
@@ -1,8 +1,11 @@
+from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import TemplateView
 
 urlpatterns = [
+    path('admin/', admin.site.urls),
     path('sagepay/', include('sagepaypi.urls')),
+    path('sagepay-api/', include('sagepaypi.api_urls')),
     path('secure-post-redirect/<tidb64>/<token>/',
          TemplateView.as_view(template_name='home.html'),
          name='secure_post_redirect'),
@@ -0,0 +1,200 @@
+import json
+from datetime import datetime
+
+from django.contrib.auth.models import Permission, User
+from django.test import override_settings
+from django.urls import reverse
+from django.utils.timezone import utc
+
+from sagepaypi.models import CardIdentifier, Transaction
+from sagepaypi.views.api import decode_cursor, encode_cursor
+from tests.test_case import AppTestCase
+
+
+class TestApi(AppTestCase):
+    fixtures = ['tests/fixtures/test']
+
+    def setUp(self):
+        self.transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(self.user)
+        self.url = reverse('sagepaypi_api:transactions')
+
+    def create_transactions(self, count, created_at=None):
+        transactions = []
+        for i in range(count):
+            transaction = Transaction.objects.get(pk=self.transaction.pk)
+            transaction.pk = None
+            transaction.vendor_tx_code = 'other-%s' % i
+            transaction.save()
+            if created_at:
+                Transaction.objects.filter(pk=transaction.pk).update(created_at=created_at)
+            transactions.append(transaction)
+        return transactions
+
+    def get(self, url=None, **params):
+        response = self.client.get(url or self.url, params)
+        return response, json.loads(response.content)
+
+    def test_permission__anonymous(self):
+        self.client.logout()
+
+        response, data = self.get()
+
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('error', data)
+
+    def test_permission__not_staff(self):
+        user = User.objects.create_user('user', 'user@example.com', 'password')
+        user.user_permissions.add(Permission.objects.get(codename='view_transaction'))
+        self.client.force_login(user)
+
+        self.assertEqual(self.get()[0].status_code, 403)
+
+    def test_permission__view_permission(self):
+        user = User.objects.create_user('staff', 'staff@example.com', 'password', is_staff=True)
+        self.client.force_login(user)
+
+        self.assertEqual(self.get()[0].status_code, 403)
+
+        user.user_permissions.add(Permission.objects.get(codename='view_transaction'))
+        user = User.objects.get(pk=user.pk)
+        self.client.force_login(user)
+
+        self.assertEqual(self.get()[0].status_code, 200)
+        # other models need their own permission
+        self.assertEqual(self.get(reverse('sagepaypi_api:card_identifiers'))[0].status_code, 403)
+
+    def test_read_only(self):
+        self.assertEqual(self.client.post(self.url).status_code, 405)
+
+    def test_list(self):
+        response, data = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual([row['id'] for row in data['results']], [str(self.transaction.pk)])
+        self.assertEqual(data['results'][0]['vendor_tx_code'], self.transaction.vendor_tx_code)
+        self.assertNotIn('pareq', data['results'][0])
+        self.assertIsNone(data['next'])
+
+    def test_fields(self):
+        response, data = self.get(fields='status,amount')
+
+        self.assertEqual(data['results'], [{'status': self.transaction.status, 'amount': self.transaction.amount}])
+
+    def test_fields__unknown(self):
+        response, data = self.get(fields='status,pareq')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(data['error'], 'Unknown fields: pareq.')
+
+    def test_filters(self):
+        other = self.create_transactions(1)[0]
+        Transaction.objects.filter(pk=other.pk).update(avs_cvc_status='AllMatched', status='Rejected')
+
+        self.assertEqual([row['id'] for row in self.get(avs_cvc_status='AllMatched')[1]['results']], [str(other.pk)])
+        self.assertEqual([row['id'] for row in self.get(status='Rejected')[1]['results']], [str(other.pk)])
+        self.assertEqual(len(self.get(card_identifier=self.transaction.card_identifier_id)[1]['results']), 2)
+
+    def test_filters__created(self):
+        old = self.create_transactions(1, created_at=datetime(2018, 1, 1, tzinfo=utc))[0]
+
+        self.assertEqual([row['id'] for row in self.get(created_before='2018-01-02')[1]['results']], [str(old.pk)])
+        self.assertEqual(
+            [row['id'] for row in self.get(created_after='2018-01-02T00:00:00Z')[1]['results']],
+            [str(self.transaction.pk)]
+        )
+
+    def test_filters__invalid(self):
+        response, data = self.get(card_identifier='not-a-uuid')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(data['error'], 'Invalid card_identifier.')
+
+    def test_pagination(self):
+        # rows created at the same time are split on the id
+        self.create_transactions(4, created_at=datetime(2019, 1, 1, tzinfo=utc))
+        expected = list(Transaction.objects.order_by('-created_at', '-pk').values_list('pk', flat=True))
+
+        seen = []
+        response, data = self.get(limit=2)
+        while True:
+            seen += [row['id'] for row in data['results']]
+            if not data['next']:
+                break
+            response, data = self.get(data['next'])
+
+        self.assertEqual(seen, [str(pk) for pk in expected])
+
+    def test_pagination__ascending(self):
+        self.create_transactions(3, created_at=datetime(2019, 1, 1, tzinfo=utc))
+        expected = list(Transaction.objects.order_by('created_at', 'pk').values_list('pk', flat=True))
+
+        response, data = self.get(limit=3, order='asc')
+        self.assertIn('order=asc', data['next'])
+        seen = [row['id'] for row in data['results']]
+        seen += [row['id'] for row in self.get(data['next'])[1]['results']]
+
+        self.assertEqual(seen, [str(pk) for pk in expected])
+
+    def test_pagination__keeps_filters(self):
+        self.create_transactions(3)
+
+        response, data = self.get(limit=1, type='Payment', fields='id')
+
+        self.assertIn('type=Payment', data['next'])
+        self.assertIn('fields=id', data['next'])
+
+    @override_settings(SAGEPAYPI_API_MAX_PAGE_SIZE=2)
+    def test_limit__max(self):
+        self.create_transactions(3)
+
+        self.assertEqual(len(self.get(limit=100)[1]['results']), 2)
+
+    def test_limit__invalid(self):
+        self.assertEqual(self.get(limit='none')[0].status_code, 400)
+        self.assertEqual(self.get(limit=0)[0].status_code, 400)
+
+    def test_cursor__invalid(self):
+        response, data = self.get(cursor='invalid')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(data['error'], 'Invalid cursor.')
+
+    def test_cursor(self):
+        created_at = datetime(2019, 1, 1, 12, 30, 15, 123456, tzinfo=utc)
+
+        self.assertEqual(
+            decode_cursor(Transaction, encode_cursor(created_at, self.transaction.pk)),
+            (created_at, self.transaction.pk)
+        )
+
+    def test_transaction_responses(self):
+        response = self.transaction.responses.create(step='submit_transaction', status_code=201, data={'status': 'Ok'})
+        url = reverse('sagepaypi_api:transaction_responses')
+
+        data = self.get(url, transaction=self.transaction.pk)[1]
+
+        self.assertEqual(data['results'][0]['id'], response.pk)
+        self.assertEqual(data['results'][0]['transaction_id'], str(self.transaction.pk))
+        # the data is only fetched when selected
+        self.assertNotIn('data', data['results'][0])
+        self.assertEqual(self.get(url, fields='id,data')[1]['results'], [{'id': response.pk, 'data': {'status': 'Ok'}}])
+
+    def test_card_identifiers(self):
+        card_identifier = CardIdentifier.objects.get()
+        url = reverse('sagepaypi_api:card_identifiers')
+
+        data = self.get(url)[1]
+
+        self.assertEqual(data['results'][0]['id'], str(card_identifier.pk))
+        self.assertNotIn('card_identifier', data['results'][0])
+        self.assertEqual(self.get(url, fields='card_identifier')[0].status_code, 400)
+
+    def test_queries(self):
+        self.create_transactions(3)
+
+        # the session, the user and the page
+        with self.assertNumQueries(3):
+            self.get(limit=2)
@@ -0,0 +1,58 @@
+import mock
+from django.conf import settings
+from django.test import override_settings
+from django.urls import reverse
+from django.utils.encoding import force_str
+
+from sagepaypi.models import Transaction
+from tests.mocks import challenge_success_response, outcome_live_response
+
+from tests.test_case import AppTestCase
+
+
+class TestView(AppTestCase):
+    fixtures = ['tests/fixtures/test']
+
+    def setUp(self):
+        self.transaction = Transaction.objects.get(pk='ec87ac03-7c34-472c-823b-1950da3568e6')
+        self.transaction.transaction_id = 'random-id'
+        self.transaction.save()
+
+        self.session_data = self.transaction.get_3d_secure_session_data()
+        self.url = reverse('sagepaypi:complete_3d_secure_challenge')
+
+    def test_get_not_allowed(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 405)
+
+    def test_post_with_invalid_session_data_raises_404(self):
+        response = self.client.post(self.url, data={'cres': 'random-cres'})
+        self.assertEqual(response.status_code, 404)
+
+        response = self.client.post(self.url, data={'cres': 'random-cres', 'threeDSSessionData': 'invalid'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_post_with_invalid_data_raises_404(self):
+        response = self.client.post(self.url, data={'threeDSSessionData': self.session_data})
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(SAGEPAYPI_POST_3D_SECURE_REDIRECT_URL='secure_post_redirect')
+    @mock.patch('sagepaypi.gateway.default_gateway')
+    def test_post_with_valid_data(self, mock_gateway):
+        mock_gateway.complete_3d_secure_challenge.return_value = challenge_success_response()
+        mock_gateway.get_transaction_outcome.return_value = outcome_live_response()
+
+        response = self.client.post(self.url, data={'cres': 'random-cres', 'threeDSSessionData': self.session_data})
+
+        self.transaction.refresh_from_db()
+
+        self.assertIsNone(self.transaction.cres)
+        self.assertEqual(self.transaction.secure_status, 'Authenticated')
+
+        tidb64, token = self.transaction.get_tokens()
+
+        expected_url = reverse(
+            settings.SAGEPAYPI_POST_3D_SECURE_REDIRECT_URL,
+            kwargs={'tidb64': force_str(tidb64), 'token': token})
+
+        self.assertRedirects(response, expected_url)